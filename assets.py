@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Static asset pipeline for the web player: writes dist/.
+
+Every asset is copied to a content-addressed name under dist/assets/
+(`radio.js` -> `assets/radio.3f2a1b9c0d.js`), so server.py can serve it with a year-long
+`immutable` Cache-Control and a release never leaves a stale script in a
+browser cache. References between assets are rewritten before hashing:
+radio.js's `./scheduler.js` import points at the fingerprinted scheduler
+(so its hash changes when the scheduler does), and dist/index.html points
+at the fingerprinted stylesheet and script. index.html itself keeps its
+name and is served with `no-cache` — it is the one file that must always
+be revalidated.
+
+Text assets also get precompressed variants next to them: `.gz` (gzip -9)
+and, when the `brotli` package is installed, `.br` (quality 11). Each is
+kept only if it is smaller. server.py picks one per request from
+Accept-Encoding, so nothing is compressed at request time.
+
+Album art is left alone: radio.js loads covers from the URLs in tracks.json.
+
+dist/ is the static part of the player, served by server.py at /player
+(assets under /assets/) next to its live /tracks.json. Publishing it
+anywhere else needs the data files radio.js fetches beside index.html
+(tracks.json, and firebase-config.json for synced mode). An ASSETS entry
+missing from the tree is reported and left unrewritten, so references to
+it 404 as they would in the unbuilt site.
+
+dist/manifest.json maps original names to fingerprinted ones and lists the
+variants of each, so the server needs no directory scans or stat() calls
+to negotiate. Unchanged files keep their names and are not rewritten; files
+from older builds are removed.
+
+Usage:
+    python assets.py [--out dist]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+
+import lazy
+
+DIST_DIR = "dist"
+ASSET_DIR = "assets"    # fingerprinted files, relative to DIST_DIR
+ENTRY = "index.html"
+# Dependencies before dependants: a file's references are rewritten before it is hashed
+ASSETS = ["scheduler.js", "style.css", "placeholder.png", "radio.js"]
+MANIFEST = "manifest.json"
+COMPRESSIBLE = {".js", ".css", ".html", ".json", ".svg", ".txt"}
+SUFFIX = {"gzip": ".gz", "br": ".br"}      # Content-Encoding -> file suffix
+HASH_LENGTH = 10
+
+
+def fingerprint(name, data):
+    """`assets/dir/name.<hash>.ext` for `name` with content `data`."""
+    stem, ext = os.path.splitext(name)
+    return f"{ASSET_DIR}/{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}"
+
+
+def rewrite_references(text, names, where):
+    """
+    Point quoted (or CSS url()) references to the keys of `names`, optionally
+    `./`-prefixed, at their fingerprinted values, relative to `where` (the
+    referencing file's directory in dist/).
+    """
+    for name, hashed in names.items():
+        hashed = posixpath.relpath(hashed, where or ".")
+        pattern = r"""((?:["']|url\())(\./)?%s(["')])""" % re.escape(name)
+        text = re.sub(pattern, lambda m, h=hashed: f"{m.group(1)}{m.group(2) or ''}{h}{m.group(3)}", text)
+    return text
+
+
+def compressed_variants(data):
+    """{encoding: bytes} of the precompressed variants worth keeping."""
+    variants = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+    brotli = lazy.optional("brotli")
+    if brotli is not None:
+        variants["br"] = brotli.compress(data, quality=11)
+    return {encoding: body for encoding, body in variants.items() if len(body) < len(data)}
+
+
+def write_if_changed(path, data):
+    """Write `data` to `path` unless an identical file is already there."""
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, "rb") as f:
+                if f.read() == data:
+                    return
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def add_file(out, manifest, name, data, hashed=None):
+    """Write one asset (under `hashed`, default its fingerprint) and its variants."""
+    fingerprinted = hashed is None
+    hashed = hashed or fingerprint(name, data)
+    outputs = [(hashed, data)]
+    encodings = []
+    if os.path.splitext(name)[1].lower() in COMPRESSIBLE:
+        for encoding, body in compressed_variants(data).items():
+            outputs.append((hashed + SUFFIX[encoding], body))
+            encodings.append(encoding)
+    for filename, body in outputs:
+        path = os.path.join(out, filename)
+        # an existing fingerprinted file already has this content
+        if not (fingerprinted and os.path.exists(path)):
+            write_if_changed(path, body)
+    manifest["files"][name] = hashed
+    manifest["encodings"][hashed] = encodings
+    return hashed
+
+
+def prune(out, manifest):
+    """Delete files in `out` that the new manifest does not reference."""
+    keep = {MANIFEST}
+    for hashed, encodings in manifest["encodings"].items():
+        keep.add(hashed)
+        keep.update(hashed + SUFFIX[e] for e in encodings)
+    removed = 0
+    for dirpath, dirnames, filenames in os.walk(out, topdown=False):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            if os.path.relpath(path, out).replace(os.sep, "/") not in keep:
+                os.remove(path)
+                removed += 1
+        if dirpath != out and not os.listdir(dirpath):
+            os.rmdir(dirpath)
+    return removed
+
+
+def build_assets(root=".", out=DIST_DIR):
+    """Build `out` from the player files under `root`. Returns the manifest."""
+    out = os.path.join(root, out)
+    manifest = {"files": {}, "encodings": {}}
+    for name in ASSETS:
+        path = os.path.join(root, name)
+        if not os.path.exists(path):
+            print(f"assets: {name} not found; references to it are left as-is")
+            continue
+        with open(path, "rb") as f:
+            data = f.read()
+        if os.path.splitext(name)[1] in COMPRESSIBLE:
+            data = rewrite_references(data.decode("utf-8"), manifest["files"], ASSET_DIR).encode("utf-8")
+        add_file(out, manifest, name, data)
+
+    with open(os.path.join(root, ENTRY), encoding="utf-8") as f:
+        html = rewrite_references(f.read(), manifest["files"], "")
+    add_file(out, manifest, ENTRY, html.encode("utf-8"), hashed=ENTRY)
+
+    removed = prune(out, manifest)
+    write_if_changed(os.path.join(out, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"))
+    print(f"assets: {len(manifest['files'])} files in {out}/ ({removed} stale removed)")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fingerprint and precompress the web player into dist/")
+    parser.add_argument("--out", default=DIST_DIR, help="output directory")
+    args = parser.parse_args()
+    build_assets(out=args.out)
+
+
+if __name__ == "__main__":
+    main()
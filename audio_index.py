@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Track ID -> local audio file index for server.py's /api/audio.
+
+Built once per catalog: each track's `file` is reduced to a bare filename,
+validated (no separators, dot-names or NUL; the real path must sit directly
+in music/, so neither `..` nor a symlink leads outside it) and stat'ed
+once. Requests then cost no path handling and no stat() at all:
+
+- `lookup(track_id)` is a list index plus a dict get, returning an
+  AudioFile with its absolute path, size, mtime and ETag;
+- the bytes come from `os.pread` on a cached descriptor (FD_CACHE most
+  recently used files stay open), so a Range request is one pread per
+  chunk, with no open() or seek() and no shared file position between
+  threads.
+
+Tracks whose `file` is a URL, or whose file is missing, map to None.
+
+The index only re-checks the disk for names passed to `invalidate()`, which
+server.py calls from its library watcher (see watcher.py). Files that vanish
+without a watcher are dropped at the next failed open(); a replaced file
+keeps being served from its old descriptor until invalidated.
+"""
+
+import os
+import stat
+import threading
+from collections import OrderedDict
+
+FD_CACHE = 64           # open descriptors kept for the most recently served files
+CHUNK = 256 * 1024      # bytes per pread when streaming
+
+
+def safe_name(file_field):
+    """The bare filename a local `file` value refers to, or None if unusable."""
+    if not file_field or file_field.startswith(('http://', 'https://')):
+        return None
+    name = file_field.rsplit('/', 1)[-1]
+    if not name or name in ('.', '..') or name.startswith('.') or '\\' in name or '\0' in name:
+        return None
+    return name
+
+
+class AudioFile:
+    """One validated file: path, size, mtime and an ETag derived from them."""
+
+    __slots__ = ('name', 'path', 'size', 'mtime', 'etag', '_fd', '_refs', '_evicted')
+
+    def __init__(self, name, path, st):
+        self.name = name
+        self.path = path
+        self.size = st.st_size
+        self.mtime = st.st_mtime
+        self.etag = f'{st.st_ino:x}-{st.st_size:x}-{st.st_mtime_ns:x}'
+        self._fd = None
+        self._refs = 0          # streams currently reading _fd
+        self._evicted = False   # close _fd once the last stream finishes
+
+
+class AudioIndex:
+    """Track ID -> AudioFile for one music directory, with an LRU of open descriptors."""
+
+    def __init__(self, music_dir, fd_cache=FD_CACHE):
+        self.music_dir = os.path.realpath(music_dir)
+        self.fd_cache = fd_cache
+        self._source = None         # catalog the names were built from
+        # (track ID -> filename or None, filename -> AudioFile or None if unusable),
+        # one tuple so a rebuild swaps both at once for readers
+        self._index = ([], {})
+        self._open = OrderedDict()  # filename -> AudioFile with an open descriptor, LRU order
+        self._lock = threading.Lock()
+
+    def _stat(self, name):
+        path = os.path.join(self.music_dir, name)
+        try:
+            if os.path.dirname(os.path.realpath(path)) != self.music_dir:
+                return None
+            st = os.stat(path)
+        except OSError:
+            return None
+        return AudioFile(name, path, st) if stat.S_ISREG(st.st_mode) else None
+
+    def rebuild(self, catalog):
+        """Index `catalog` (list or catalog.Catalog); only names not seen before are stat'ed."""
+        if catalog is self._source:
+            return
+        get = getattr(catalog, 'get', None)
+        if get is not None:
+            names = [safe_name(get(i, 'file', '')) for i in range(len(catalog))]
+        else:
+            names = [safe_name(t.get('file', '')) for t in catalog]
+        known = self._index[1]
+        files = {name: known[name] if name in known else self._stat(name)
+                 for name in set(names) if name}
+        with self._lock:
+            for name in [n for n in self._open if n not in files]:
+                self._evict(self._open.pop(name))
+            self._index, self._source = (names, files), catalog
+
+    def lookup(self, track_id):
+        """AudioFile for `track_id`, or None if it is remote, missing or out of range."""
+        names, files = self._index
+        if not 0 <= track_id < len(names) or names[track_id] is None:
+            return None
+        return files.get(names[track_id])
+
+    def invalidate(self, names):
+        """Re-check `names` on disk (they were added, changed or removed)."""
+        fresh = {name: self._stat(name) for name in names}
+        with self._lock:
+            files = self._index[1]
+            for name, audio in fresh.items():
+                if name in self._open:
+                    self._evict(self._open.pop(name))
+                if name in files or audio is not None:
+                    files[name] = audio
+
+    def _evict(self, audio):
+        audio._evicted = True
+        if audio._refs == 0 and audio._fd is not None:
+            os.close(audio._fd)
+            audio._fd = None
+
+    def _acquire(self, audio):
+        with self._lock:
+            if audio._fd is None:
+                audio._fd = os.open(audio.path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+                audio._evicted = False
+                self._open[audio.name] = audio
+                while len(self._open) > self.fd_cache:
+                    self._evict(self._open.popitem(last=False)[1])
+            elif audio.name in self._open:
+                self._open.move_to_end(audio.name)
+            audio._refs += 1
+            return audio._fd
+
+    def _release(self, audio):
+        with self._lock:
+            audio._refs -= 1
+            if audio._evicted:
+                self._evict(audio)
+
+    def read(self, audio, start, stop):
+        """
+        Iterable of the bytes [start, stop) of `audio`, read with pread from
+        a cached descriptor; close() it (the WSGI server does) when done.
+        Raises OSError if the file is gone, and drops it from the index.
+        """
+        try:
+            fd = self._acquire(audio)
+        except OSError:
+            with self._lock:
+                files = self._index[1]
+                if files.get(audio.name) is audio:
+                    files[audio.name] = None
+            raise
+        return _Stream(self, audio, fd, start, stop)
+
+    def stats(self):
+        names, files = self._index
+        return {'tracks': len(names), 'files': sum(1 for f in files.values() if f),
+                'open': len(self._open)}
+
+
+class _Stream:
+    """WSGI body over one byte range; close() gives the descriptor back even if never iterated."""
+
+    def __init__(self, index, audio, fd, start, stop):
+        self.index = index
+        self.audio = audio
+        self.fd = fd
+        self.offset = start
+        self.stop = stop
+        self.closed = False
+
+    def __iter__(self):
+        while self.offset < self.stop and not self.closed:
+            chunk = _pread(self.fd, min(CHUNK, self.stop - self.offset), self.offset)
+            if not chunk:
+                break   # truncated since it was indexed
+            self.offset += len(chunk)
+            yield chunk
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.index._release(self.audio)
+
+
+if hasattr(os, 'pread'):
+    _pread = os.pread
+else:
+    _seek_lock = threading.Lock()
+
+    def _pread(fd, n, offset):
+        """os.pread stand-in for Windows: seek and read under a lock."""
+        with _seek_lock:
+            os.lseek(fd, offset, os.SEEK_SET)
+            return os.read(fd, n)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Startup and RSS benchmark: tracks.json (json.load) vs tracks.bin (mmap).
+
+Generates a synthetic catalog with N tracks, then for each format runs a
+fresh interpreter that loads the catalog and looks up a handful of tracks,
+reporting load time, lookup time and anonymous RSS growth (Linux only;
+file-backed mmap pages are shared page cache and not counted).
+
+Usage:
+    python benchmarks/bench_catalog.py [--tracks 50000]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from catalog import write_catalog  # noqa: E402
+
+PROBE = r'''
+import json, sys, time
+sys.path.insert(0, {root!r})
+
+def rss_kb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('RssAnon:'):
+                return int(line.split()[1])
+    return 0
+
+base = rss_kb()
+t0 = time.perf_counter()
+if {fmt!r} == 'json':
+    with open({path!r}, encoding='utf-8') as f:
+        tracks = json.load(f)
+else:
+    from catalog import Catalog
+    tracks = Catalog({path!r})
+t1 = time.perf_counter()
+n = len(tracks)
+for i in range(0, n, max(1, n // 100)):
+    tracks[i]['file']
+t2 = time.perf_counter()
+rss = rss_kb()
+print(json.dumps({{'load_ms': (t1 - t0) * 1000, 'lookup_ms': (t2 - t1) * 1000,
+                  'rss_kb': rss - base}}))
+'''
+
+
+def synthetic_tracks(count):
+    base = 'https://raw.githubusercontent.com/LeakySponge/radiothingymagiy.github.io/main/music/'
+    tracks = []
+    for i in range(count):
+        name = f'Artist {i % 997} - Song Number {i}'
+        tracks.append({
+            'file': base + name.replace(' ', '%20') + '.mp3',
+            'title': name,
+            'cover': f'album-art/{name}.jpg',
+            'selectedBy': f'curator{i % 13}',
+        })
+    return tracks
+
+
+def run_probe(fmt, path):
+    code = PROBE.format(root=str(ROOT), fmt=fmt, path=str(path))
+    out = subprocess.run([sys.executable, '-c', code], check=True,
+                         capture_output=True, text=True).stdout
+    return json.loads(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark catalog loading')
+    parser.add_argument('--tracks', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = Path(tmp) / 'tracks.json'
+        bin_path = Path(tmp) / 'tracks.bin'
+        tracks = synthetic_tracks(args.tracks)
+        json_path.write_text(json.dumps(tracks, indent=4), encoding='utf-8')
+        write_catalog(tracks, bin_path)
+        print(f'{args.tracks} tracks: json {json_path.stat().st_size / 1e6:.1f} MB, '
+              f'bin {bin_path.stat().st_size / 1e6:.1f} MB')
+
+        for fmt, path in (('json', json_path), ('bin', bin_path)):
+            runs = [run_probe(fmt, path) for _ in range(args.repeat)]
+            best = min(runs, key=lambda r: r['load_ms'])
+            print(f'{fmt:>4}: load {best["load_ms"]:8.2f} ms  '
+                  f'lookup {best["lookup_ms"]:6.2f} ms  '
+                  f'rss +{best["rss_kb"] / 1024:6.1f} MB')
+
+
+if __name__ == '__main__':
+    main()
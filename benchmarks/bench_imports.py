@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Import-time budgets for the radio entry points.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter for
+each entry point and fails (exit status 1) if
+
+- the module's cumulative import time exceeds its budget, or
+- a heavy optional dependency is imported at module load instead of on
+  first use (see lazy.py).
+
+Budgets are for a desktop-class machine; pass --scale 8 (or so) on a Pi.
+Interpreter startup and `site` are not counted. tests/test_import_budgets.py
+runs the same check under pytest (RADIO_IMPORT_BUDGET_SCALE scales it).
+
+Usage:
+    python benchmarks/bench_imports.py [--runs 5] [--scale 1.0]
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# module: (budget_ms, modules that must not be imported at load time)
+BUDGETS = {
+    'radio_player': (50, ('requests', 'rich', 'numpy', 'pydub', 'pygame')),
+    'pi_radio_client_simple': (250, ('pygame', 'numpy', 'pydub', 'rich')),
+    'pi_radio_client': (250, ('firebase_admin', 'pygame')),
+    'radio_display': (250, ('numpy', 'pydub', 'pygame', 'requests')),
+}
+
+
+def measure(module):
+    """(cumulative_ms, set of every module imported) for one cold import."""
+    res = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                         capture_output=True, text=True, cwd=ROOT)
+    if res.returncode:
+        raise RuntimeError(res.stderr.strip().splitlines()[-1])
+    imported = set()
+    total_us = None
+    for line in res.stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        imported.add(name)
+        if name == module:
+            total_us = int(cumulative)
+    if total_us is None:
+        raise RuntimeError(f'{module} not found in -X importtime output')
+    return total_us / 1000, imported
+
+
+def check(runs=5, scale=1.0, modules=None):
+    """Return ({module: best_ms}, [failure messages]) for `modules` (default all)."""
+    times, failures = {}, []
+    for module in modules or BUDGETS:
+        budget, forbidden = BUDGETS[module]
+        try:
+            samples = [measure(module) for _ in range(runs)]
+        except RuntimeError as e:
+            failures.append(f'{module}: import failed: {e}')
+            continue
+        best = times[module] = min(ms for ms, _ in samples)
+        eager = sorted({name for name in forbidden
+                        for _, imported in samples if name in imported})
+        if best > budget * scale:
+            failures.append(f'{module}: {best:.0f} ms exceeds budget of {budget * scale:.0f} ms')
+        if eager:
+            failures.append(f'{module}: imports {", ".join(eager)} at load time')
+    return times, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check import-time budgets')
+    parser.add_argument('--runs', type=int, default=5, help='take the best of N cold imports')
+    parser.add_argument('--scale', type=float, default=1.0, help='multiply every budget')
+    args = parser.parse_args()
+
+    times, failures = check(args.runs, args.scale)
+    for module, ms in times.items():  # modules that failed to import are only in failures
+        budget = BUDGETS[module][0] * args.scale
+        print(f'{module:<24} {ms:7.1f} ms   budget {budget:5.0f} ms')
+    for failure in failures:
+        print(f'[Budget] {failure}')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
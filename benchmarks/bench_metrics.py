@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Overhead benchmark for the metrics subsystem.
+
+1. Micro: nanoseconds per Counter.inc / Histogram.observe on a cached child.
+2. Per request: mean time of GET /health through Flask's test client with
+   the metrics middleware on (RADIO_METRICS=1) and off (RADIO_METRICS=0),
+   each in a fresh interpreter.
+
+Usage:
+    python benchmarks/bench_metrics.py [--requests 5000]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import metrics  # noqa: E402
+
+PROBE = r'''
+import json, logging, sys, time
+sys.path.insert(0, {root!r})
+import server
+logging.disable(logging.INFO)
+client = server.app.test_client()
+for _ in range(200):
+    client.get('/health')
+t0 = time.perf_counter()
+for _ in range({n}):
+    client.get('/health')
+print(json.dumps({{'us_per_request': (time.perf_counter() - t0) / {n} * 1e6}}))
+'''
+
+
+def micro(n=200000):
+    registry = []
+    counter = metrics.Counter('bench_total', 'bench', ('route',), registry=registry).labels('/x')
+    hist = metrics.Histogram('bench_seconds', 'bench', ('route',), registry=registry).labels('/x')
+    t0 = time.perf_counter()
+    for _ in range(n):
+        counter.inc()
+    t1 = time.perf_counter()
+    for i in range(n):
+        hist.observe(i * 1e-6)
+    t2 = time.perf_counter()
+    return (t1 - t0) / n * 1e9, (t2 - t1) / n * 1e9
+
+
+def per_request(enabled, n):
+    env = dict(os.environ, RADIO_METRICS='1' if enabled else '0')
+    out = subprocess.run([sys.executable, '-c', PROBE.format(root=str(ROOT), n=n)],
+                         check=True, capture_output=True, text=True, env=env, cwd=ROOT).stdout
+    return json.loads(out.strip().splitlines()[-1])['us_per_request']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark metrics overhead')
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    inc_ns, observe_ns = micro()
+    print(f'Counter.inc      {inc_ns:7.0f} ns')
+    print(f'Histogram.observe {observe_ns:6.0f} ns')
+
+    off = min(per_request(False, args.requests) for _ in range(3))
+    on = min(per_request(True, args.requests) for _ in range(3))
+    print(f'GET /health      off {off:7.1f} us   on {on:7.1f} us   '
+          f'overhead {on - off:+.1f} us ({(on - off) / off * 100:+.1f}%)')
+
+
+if __name__ == '__main__':
+    main()
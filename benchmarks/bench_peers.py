@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+LAN peer cache on one machine: several clients, one server.py.
+
+Serves a synthetic library from server.py on a local port and starts
+--clients PeerCache instances, each with its own cache directory and peer
+port (as separate Pis would have). Then, per track, every client downloads
+it at the same moment — the thundering herd after a track change — the way
+pi_radio_client_simple.download_audio does: peers first (waiting for a
+claimed copy), origin otherwise.
+
+Reports how many downloads went to the origin versus peers; with sharing
+it should be about one origin fetch per track however many clients there
+are. --no-peers runs the same herd straight against the origin.
+
+Usage:
+    python benchmarks/bench_peers.py [--clients 8] [--tracks 5] [--mb 4] [--no-peers]
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+from mirrors import selector  # noqa: E402
+from peer_cache import PeerCache  # noqa: E402
+
+
+def make_library(root, count, size):
+    music = root / 'music'
+    music.mkdir()
+    tracks = []
+    for i in range(count):
+        data = os.urandom(size)
+        name = f'track-{i:03d}.mp3'
+        (music / name).write_bytes(data)
+        tracks.append({'file': f'music/{name}', 'title': name[:-4],
+                       'sha256': hashlib.sha256(data).hexdigest()})
+    (root / 'tracks.json').write_text(json.dumps(tracks))
+    return tracks
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark LAN peer cache sharing')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--tracks', type=int, default=5)
+    parser.add_argument('--mb', type=float, default=4.0, help='size of each track')
+    parser.add_argument('--no-peers', action='store_true', help='every client downloads from the origin')
+    args = parser.parse_args()
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        tracks = make_library(root, args.tracks, int(args.mb * (1 << 20)))
+        server.TRACKS_FILE = root / 'tracks.json'
+        server.CATALOG_FILE = root / 'tracks.bin'
+        server.MUSIC_DIR = root / 'music'
+        from werkzeug.serving import make_server
+        httpd = make_server('127.0.0.1', 0, server.app, threaded=True)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{httpd.server_port}'
+
+        clients = []
+        for i in range(args.clients):
+            cache = root / f'client-{i}'
+            cache.mkdir()
+            peers = None if args.no_peers else PeerCache(cache, url, advertise_host='127.0.0.1').start()
+            clients.append((cache, peers))
+
+        counts = {'origin': 0, 'peer': 0, 'failed': 0}
+        lock = threading.Lock()
+
+        def download(client, index):
+            cache, peers = client
+            track = tracks[index]
+            name = track['file'].split('/')[-1]
+            dest = cache / name
+            if peers and peers.fetch(track['sha256'], dest):
+                source = 'peer'
+            elif selector.download([f'{url}/api/audio/{index}'], dest):
+                source = 'origin'
+            else:
+                source = 'failed'
+            if peers and source != 'failed':
+                peers.add(track['sha256'], name)
+            with lock:
+                counts[source] += 1
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.clients) as pool:
+            for index in range(args.tracks):
+                list(pool.map(download, clients, [index] * args.clients))
+        elapsed = time.perf_counter() - t0
+        for _, peers in clients:
+            if peers:
+                peers.stop()
+        httpd.shutdown()
+
+    total = args.clients * args.tracks
+    origin_mb = counts['origin'] * args.mb
+    print(f'{total} downloads by {args.clients} clients in {elapsed:.2f}s: '
+          f'{counts["origin"]} from the origin ({origin_mb:.0f} MB), {counts["peer"]} from peers, '
+          f'{counts["failed"]} failed')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Song-request burst: many threads submitting at once, each waiting for its
+fsync like the POST handler does.
+
+Reports requests per second and how many fsyncs group commit needed; with
+COMMIT_INTERVAL batching the fsync count should be a small fraction of the
+request count.
+
+Usage:
+    python benchmarks/bench_requests.py [--requests 5000] [--threads 32]
+"""
+
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from song_requests import SongRequests  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark song-request group commit')
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=32)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = SongRequests(Path(tmp) / 'requests.jsonl', rate_limit=1 << 30).start()
+
+        def worker(k):
+            for i in range(k, args.requests, args.threads):
+                _, done, _ = queue.submit('main', f'track-{i}', 'Title', 'bench', f'client-{i}')
+                done.wait()
+
+        threads = [threading.Thread(target=worker, args=(k,)) for k in range(args.threads)]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - t0
+        queue.stop()
+        stats = queue.stats()
+
+    print(f'{args.requests} requests in {elapsed:.2f}s ({args.requests / elapsed:,.0f}/s), '
+          f'{stats["commits"]} fsyncs ({args.requests / max(stats["commits"], 1):.0f} per fsync)')
+
+
+if __name__ == '__main__':
+    main()
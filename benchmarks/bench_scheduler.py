@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Cost of Scheduler.next() as the library grows.
+
+next() touches a fixed window of candidates, so the per-call time should
+stay flat from a hundred tracks to a million; construction (building the
+order and per-track arrays) is the only O(n) part.
+
+Usage:
+    python benchmarks/bench_scheduler.py [--picks 20000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scheduler import Scheduler  # noqa: E402
+
+
+def synthetic_tracks(n, artists=500, curators=12):
+    return [{'title': f'Artist {i % artists} - Track {i}', 'selectedBy': f'curator{i % curators}'}
+            for i in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Scheduler.next()')
+    parser.add_argument('--picks', type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f'{"tracks":>9} {"build ms":>9} {"next us":>8}')
+    for n in (100, 1_000, 10_000, 100_000, 1_000_000):
+        tracks = synthetic_tracks(n)
+        t0 = time.perf_counter()
+        sched = Scheduler(tracks, seed='bench')
+        t1 = time.perf_counter()
+        for _ in range(args.picks):
+            sched.next()
+        t2 = time.perf_counter()
+        print(f'{n:>9} {(t1 - t0) * 1000:9.1f} {(t2 - t1) / args.picks * 1e6:8.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Startup time and memory: radio_player.py in two-process vs single-process mode.
+
+Serves a small synthetic library (see run.py) on a local port, then for
+each mode launches radio_player.py against it and measures:
+
+    startup_ms   spawn until both the client has loaded the track list and
+                 the display has drawn its banner
+    rss_mb       summed VmRSS of every Python process in the player's tree
+    pss_mb       the same with shared pages divided between processes
+                 (/proc/<pid>/smaps_rollup), the fairer memory number
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 3] [--settle 5]
+"""
+
+import argparse
+import logging
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+sys.path.insert(0, str(HERE))
+
+import run  # noqa: E402
+
+MARKERS = ('[Tracks] Loaded', 'Radio TUI Display')
+
+
+def process_tree(root_pid):
+    """Pids of root_pid and all its descendants."""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            stat = Path(f'/proc/{entry}/stat').read_text()
+        except OSError:
+            continue
+        ppid = int(stat.rsplit(')', 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+    pids, todo = [], [root_pid]
+    while todo:
+        pid = todo.pop()
+        pids.append(pid)
+        todo.extend(children.get(pid, ()))
+    return pids
+
+
+def memory_kb(pid):
+    """(rss_kb, pss_kb) for one process, or None if it is not Python."""
+    try:
+        if not Path(f'/proc/{pid}/comm').read_text().startswith('python'):
+            return None
+        rss = pss = 0
+        for line in Path(f'/proc/{pid}/status').read_text().splitlines():
+            if line.startswith('VmRSS:'):
+                rss = int(line.split()[1])
+        for line in Path(f'/proc/{pid}/smaps_rollup').read_text().splitlines():
+            if line.startswith('Pss:'):
+                pss = int(line.split()[1])
+        return rss, pss
+    except OSError:
+        return None
+
+
+def measure(mode, server_url, settle, timeout=60):
+    args = [sys.executable, str(ROOT / 'radio_player.py')]
+    if mode == 'single':
+        args.append('--single-process')
+    with tempfile.TemporaryDirectory(prefix='radio-startup-') as cache:
+        env = dict(os.environ, RADIO_SERVER_URL=server_url, RADIO_CACHE_DIR=cache,
+                   PYTHONUNBUFFERED='1')
+        seen = {}
+        t0 = time.perf_counter()
+        proc = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                env=env, cwd=ROOT, start_new_session=True)
+
+        def reader():
+            for raw in proc.stdout:
+                line = raw.decode('utf-8', 'replace')
+                for marker in MARKERS:
+                    if marker in line and marker not in seen:
+                        seen[marker] = time.perf_counter() - t0
+
+        threading.Thread(target=reader, daemon=True).start()
+        try:
+            deadline = time.monotonic() + timeout
+            while len(seen) < len(MARKERS):
+                if time.monotonic() > deadline or proc.poll() is not None:
+                    raise RuntimeError(f'{mode}: markers not seen (got {sorted(seen)})')
+                time.sleep(0.01)
+            startup = max(seen.values())
+            time.sleep(settle)
+            samples = [m for m in map(memory_kb, process_tree(proc.pid)) if m]
+        finally:
+            os.killpg(proc.pid, signal.SIGINT)
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                os.killpg(proc.pid, signal.SIGKILL)
+                proc.wait()
+    return {
+        'startup_ms': startup * 1000,
+        'processes': len(samples),
+        'rss_mb': sum(s[0] for s in samples) / 1024,
+        'pss_mb': sum(s[1] for s in samples) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark player startup and memory')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--settle', type=float, default=5.0,
+                        help='seconds to run before sampling memory')
+    parser.add_argument('--tracks', type=int, default=20)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory(prefix='radio-startup-lib-') as workdir:
+        ctx = run.Context(workdir, SimpleNamespace(tracks=args.tracks, seconds=30.0, workers=None))
+        url = ctx.ensure_server()
+        try:
+            results = {}
+            for mode in ('multi', 'single'):
+                runs = [measure(mode, url, args.settle) for _ in range(args.runs)]
+                results[mode] = {k: statistics.median(r[k] for r in runs) for k in runs[0]}
+        finally:
+            ctx.close()
+
+    for mode, r in results.items():
+        print(f'{mode:<7} startup {r["startup_ms"]:7.0f} ms   processes {r["processes"]:.0f}   '
+              f'RSS {r["rss_mb"]:6.1f} MB   PSS {r["pss_mb"]:6.1f} MB')
+    multi, single = results['multi'], results['single']
+    print(f'saving  startup {multi["startup_ms"] - single["startup_ms"]:7.0f} ms   '
+          f'RSS {multi["rss_mb"] - single["rss_mb"]:6.1f} MB   '
+          f'PSS {multi["pss_mb"] - single["pss_mb"]:6.1f} MB')
+
+
+if __name__ == '__main__':
+    main()
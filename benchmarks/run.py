@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for the whole radio pipeline.
+
+Generates a synthetic library (benchmarks/synth.py) in a scratch workspace
+and times each stage:
+
+    build     build.py cold scan with art extraction, then a warm rescan
+    server    /api/tracks and /api/audio/<id> under concurrent clients
+    client    pi_radio_client_simple.download_audio against the local server,
+              cold (download) and warm (cache hit)
+    display   per-frame cost of radio_display's layout build + render
+    catalog   tracks.json vs tracks.bin load (see bench_catalog.py)
+    imports   cold import time of each entry point (see bench_imports.py)
+
+Results are written as JSON. With --baseline, every metric ending in _ms
+(lower is better) or _per_s (higher is better) is compared against the
+baseline and changes worse than --threshold are reported as regressions
+(exit status 1).
+
+Usage:
+    python benchmarks/run.py --tracks 200 --output bench.json
+    python benchmarks/run.py --baseline bench.json --threshold 0.15
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(HERE))
+
+from synth import make_library  # noqa: E402
+
+STAGES = {}
+
+
+def stage(name):
+    def register(fn):
+        STAGES[name] = fn
+        return fn
+    return register
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class Context:
+    """Scratch workspace plus lazily started shared pieces (build, server)."""
+
+    def __init__(self, workdir, args):
+        self.dir = Path(workdir)
+        self.args = args
+        self.built = False
+        self.server_url = None
+        self._server = None
+
+    def ensure_library(self):
+        make_library(self.dir / 'music', self.args.tracks, self.args.seconds)
+
+    def ensure_built(self):
+        if not self.built:
+            self.ensure_library()
+            with chdir(self.dir):
+                import build
+                build.build(workers=self.args.workers, loudness=False)
+            self.built = True
+
+    def ensure_server(self):
+        if self.server_url:
+            return self.server_url
+        self.ensure_built()
+        from werkzeug.serving import make_server
+        import server
+        server.TRACKS_FILE = self.dir / 'tracks.json'
+        server.CATALOG_FILE = self.dir / 'tracks.bin'
+        server.MUSIC_DIR = self.dir / 'music'
+        server._tracks = (None, None)
+        server._catalog = None
+        self._server = make_server('127.0.0.1', 0, server.app, threaded=True)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self.server_url = f'http://127.0.0.1:{self._server.server_port}'
+        return self.server_url
+
+    def close(self):
+        if self._server:
+            self._server.shutdown()
+
+
+class chdir:
+    def __init__(self, path):
+        self.path = path
+
+    def __enter__(self):
+        self.old = os.getcwd()
+        os.chdir(self.path)
+
+    def __exit__(self, *exc):
+        os.chdir(self.old)
+
+
+@stage('build')
+def bench_build(ctx):
+    ctx.ensure_library()
+    import build
+    for leftover in ('album-art', build.CACHE_FILE):
+        path = ctx.dir / leftover
+        if path.is_dir():
+            shutil.rmtree(path)
+        elif path.exists():
+            path.unlink()
+    with chdir(ctx.dir):
+        t0 = time.perf_counter()
+        # loudness analysis is measured on its own (stage 'loudness')
+        tracks = build.build(full=True, workers=ctx.args.workers, loudness=False)
+        t1 = time.perf_counter()
+        build.build(workers=ctx.args.workers, loudness=False)
+        t2 = time.perf_counter()
+    ctx.built = True
+    return {
+        'tracks': len(tracks),
+        'cold_ms': (t1 - t0) * 1000,
+        'warm_ms': (t2 - t1) * 1000,
+        'cold_files_per_s': len(tracks) / (t1 - t0),
+    }
+
+
+def load_test(url_for, requests_total, concurrency):
+    import requests
+
+    local = threading.local()
+
+    def one(i):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        t0 = time.perf_counter()
+        res = session.get(url_for(i), timeout=30)
+        res.raise_for_status()
+        return time.perf_counter() - t0, len(res.content)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(one, range(requests_total)))
+    wall = time.perf_counter() - t0
+    latencies = [s[0] * 1000 for s in samples]
+    total_bytes = sum(s[1] for s in samples)
+    return {
+        'req_per_s': requests_total / wall,
+        'p50_ms': percentile(latencies, 0.5),
+        'p99_ms': percentile(latencies, 0.99),
+        'mb_per_s': total_bytes / wall / 1e6,
+    }
+
+
+@stage('server')
+def bench_server(ctx):
+    url = ctx.ensure_server()
+    n, c = ctx.args.requests, ctx.args.concurrency
+    tracks = load_test(lambda i: f'{url}/api/tracks', n, c)
+    audio = load_test(lambda i: f'{url}/api/audio/{i % ctx.args.tracks}', n, c)
+    result = {f'tracks_{k}': v for k, v in tracks.items() if k != 'mb_per_s'}
+    result.update({f'audio_{k}': v for k, v in audio.items()})
+    result['concurrency'] = c
+    return result
+
+
+@stage('client')
+def bench_client(ctx):
+    url = ctx.ensure_server()
+    cache = ctx.dir / 'client-cache'
+    shutil.rmtree(cache, ignore_errors=True)
+    cache.mkdir()
+    os.environ['RADIO_CACHE_DIR'] = str(cache)
+    import pi_radio_client_simple as client
+    client.SERVER_URL = url
+    client.CACHE_DIR = cache
+
+    tracks = json.loads((ctx.dir / 'tracks.json').read_text())[:ctx.args.client_tracks]
+    names = [t['file'].split('/')[-1] for t in tracks]
+    t0 = time.perf_counter()
+    for i, name in enumerate(names):
+        if not client.download_audio(i, name):
+            raise RuntimeError(f'download failed: {name}')
+    t1 = time.perf_counter()
+    for i, name in enumerate(names):
+        client.download_audio(i, name)
+    t2 = time.perf_counter()
+    total = sum((cache / name).stat().st_size for name in names)
+    return {
+        'tracks': len(names),
+        'cold_download_ms': (t1 - t0) / len(names) * 1000,
+        'download_mb_per_s': total / (t1 - t0) / 1e6,
+        'warm_lookup_ms': (t2 - t1) / len(names) * 1000,
+    }
+
+
+@stage('display')
+def bench_display(ctx):
+    from rich.console import Console
+    import radio_display
+
+    console = Console(file=io.StringIO(), width=100, height=30,
+                      force_terminal=True, color_system='truecolor')
+    segment = None
+    mode = 'fallback'
+    if radio_display.audio_libs():
+        ctx.ensure_library()
+        segment = radio_display.load_segment_for_file(next((ctx.dir / 'music').glob('*.mp3')))
+        mode = 'rms' if segment is not None else mode
+
+    frames = []
+    for i in range(ctx.args.frames):
+        t0 = time.perf_counter()
+        amps = radio_display.compute_amplitudes(segment, i * 0.05)
+        layout = radio_display.build_now_playing('Synth Artist - Benchmark Track', 'bench', i * 0.05, amps)
+        console.print(layout)
+        frames.append((time.perf_counter() - t0) * 1000)
+        console.file.seek(0)
+        console.file.truncate()
+    return {
+        'mode': mode,
+        'frames': len(frames),
+        'frame_mean_ms': statistics.fmean(frames),
+        'frame_p99_ms': percentile(frames, 0.99),
+    }
+
+
+@stage('catalog')
+def bench_catalog_stage(ctx):
+    import bench_catalog
+    from catalog import write_catalog
+
+    tracks = bench_catalog.synthetic_tracks(ctx.args.catalog_tracks)
+    json_path = ctx.dir / 'catalog-bench.json'
+    bin_path = ctx.dir / 'catalog-bench.bin'
+    json_path.write_text(json.dumps(tracks, indent=4), encoding='utf-8')
+    write_catalog(tracks, bin_path)
+    result = {'tracks': len(tracks)}
+    for fmt, path in (('json', json_path), ('bin', bin_path)):
+        best = min((bench_catalog.run_probe(fmt, path) for _ in range(3)), key=lambda r: r['load_ms'])
+        result[f'{fmt}_load_ms'] = best['load_ms']
+        result[f'{fmt}_rss_mb'] = best['rss_kb'] / 1024
+    return result
+
+
+@stage('loudness')
+def bench_loudness(ctx):
+    import numpy as np
+    import loudness
+
+    seconds = 60
+    pcm = np.random.default_rng(0).standard_normal((2, loudness.RATE * seconds)) * 0.1
+    loudness.integrated_loudness(pcm[:, :loudness.RATE])  # build the filters outside the timing
+    loudness.true_peak(pcm[:, :loudness.RATE])
+    t0 = time.perf_counter()
+    loudness.integrated_loudness(pcm)
+    t1 = time.perf_counter()
+    loudness.true_peak(pcm)
+    t2 = time.perf_counter()
+    return {
+        'integrated_ms': (t1 - t0) * 1000,
+        'true_peak_ms': (t2 - t1) * 1000,
+        'audio_seconds_per_s': seconds / (t2 - t0),
+    }
+
+
+@stage('imports')
+def bench_imports_stage(ctx):
+    import bench_imports
+
+    times, failures = bench_imports.check(runs=3)
+    for failure in failures:
+        print(f'    [Budget] {failure}')
+    return {f'{module}_ms': ms for module, ms in times.items()}
+
+
+def compare(results, baseline, threshold):
+    """Return [(stage, metric, old, new, change)] for regressions beyond threshold."""
+    regressions = []
+    for name, metrics in results.items():
+        old_metrics = baseline.get('results', {}).get(name, {})
+        for metric, new in metrics.items():
+            old = old_metrics.get(metric)
+            if not isinstance(new, (int, float)) or not isinstance(old, (int, float)) or not old:
+                continue
+            if metric.endswith('_ms'):
+                change = (new - old) / old
+            elif metric.endswith('_per_s'):
+                change = (old - new) / old
+            else:
+                continue
+            if change > threshold:
+                regressions.append((name, metric, old, new, change))
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the radio pipeline')
+    parser.add_argument('--stages', default=','.join(STAGES),
+                        help=f'comma-separated subset of: {", ".join(STAGES)}')
+    parser.add_argument('--tracks', type=int, default=200, help='synthetic library size')
+    parser.add_argument('--seconds', type=float, default=30.0, help='length of each synthetic track')
+    parser.add_argument('--workers', type=int, default=None, help='build.py probe threads')
+    parser.add_argument('--requests', type=int, default=400, help='requests per server load test')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--client-tracks', type=int, default=20)
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--catalog-tracks', type=int, default=20000)
+    parser.add_argument('--workdir', default=None, help='reuse a workspace instead of a temp dir')
+    parser.add_argument('--output', default=None, help='write results JSON here')
+    parser.add_argument('--baseline', default=None, help='results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='relative change counted as a regression (default 0.2 = 20%%)')
+    args = parser.parse_args()
+
+    names = [s.strip() for s in args.stages.split(',') if s.strip()]
+    unknown = [s for s in names if s not in STAGES]
+    if unknown:
+        parser.error(f'unknown stages: {", ".join(unknown)}')
+
+    logging.disable(logging.INFO)
+    tmp = None
+    if args.workdir:
+        Path(args.workdir).mkdir(parents=True, exist_ok=True)
+        workdir = args.workdir
+    else:
+        tmp = tempfile.TemporaryDirectory(prefix='radio-bench-')
+        workdir = tmp.name
+
+    ctx = Context(workdir, args)
+    results = {}
+    try:
+        for name in names:
+            print(f'[Bench] {name}...', flush=True)
+            results[name] = STAGES[name](ctx)
+            for metric, value in results[name].items():
+                shown = f'{value:.3f}' if isinstance(value, float) else value
+                print(f'    {metric:<28} {shown}')
+    finally:
+        ctx.close()
+        if tmp:
+            tmp.cleanup()
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'git': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'args': vars(args),
+        },
+        'results': results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f'[Bench] Results written to {args.output}')
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare(results, baseline, args.threshold)
+        for name, metric, old, new, change in regressions:
+            print(f'[Regression] {name}.{metric}: {old:.3f} -> {new:.3f} ({change * 100:+.1f}% worse)')
+        if regressions:
+            return 1
+        print(f'[Bench] No regressions beyond {args.threshold * 100:.0f}% vs {args.baseline}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Synthetic MP3 library generator for benchmarks.
+
+Each file is a run of silent MPEG-1 Layer III frames (128 kbps, 44.1 kHz)
+behind an ID3v2 tag with a title and an APIC picture, so mutagen, build.py
+and decoders all treat it as a real track. Files are deterministic for a
+given index, so two runs over the same size produce identical libraries.
+
+Usage:
+    python benchmarks/synth.py OUT_DIR [--tracks 200] [--seconds 30]
+"""
+
+import argparse
+import hashlib
+from pathlib import Path
+
+from mutagen.id3 import APIC, ID3, TIT2, TPE1
+
+FRAME_HEADER = bytes([0xFF, 0xFB, 0x90, 0x64])   # MPEG-1 L3, 128 kbps, 44.1 kHz, joint stereo
+FRAME_SIZE = 417                                 # 144 * 128000 / 44100
+SAMPLES_PER_FRAME = 1152
+SAMPLE_RATE = 44100
+
+
+def silent_frames(seconds):
+    count = int(seconds * SAMPLE_RATE / SAMPLES_PER_FRAME)
+    frame = FRAME_HEADER + bytes(FRAME_SIZE - len(FRAME_HEADER))
+    return frame * count
+
+
+def fake_art(index, size):
+    """Deterministic bytes with a JPEG SOI/EOI marker around them."""
+    seed = hashlib.sha256(str(index).encode()).digest()
+    body = (seed * (size // len(seed) + 1))[:size]
+    return b'\xff\xd8\xff\xe0' + body + b'\xff\xd9'
+
+
+def make_library(out_dir, tracks=200, seconds=30.0, art_bytes=30_000):
+    """Write `tracks` MP3s into out_dir; returns the list of paths."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    audio = silent_frames(seconds)
+    paths = []
+    for i in range(tracks):
+        artist = f'Synth Artist {i % 37:02d}'
+        title = f'Track {i:05d}'
+        path = out_dir / f'{artist} - {title}.mp3'
+        if not path.exists():
+            path.write_bytes(audio)
+            tags = ID3()
+            tags.add(TIT2(encoding=3, text=title))
+            tags.add(TPE1(encoding=3, text=artist))
+            tags.add(APIC(encoding=3, mime='image/jpeg', type=3, desc='Cover',
+                          data=fake_art(i, art_bytes)))
+            tags.save(path)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic MP3 library')
+    parser.add_argument('out_dir')
+    parser.add_argument('--tracks', type=int, default=200)
+    parser.add_argument('--seconds', type=float, default=30.0)
+    args = parser.parse_args()
+    paths = make_library(args.out_dir, args.tracks, args.seconds)
+    print(f'Wrote {len(paths)} tracks to {args.out_dir}')
+
+
+if __name__ == '__main__':
+    main()
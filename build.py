@@ -1,45 +1,336 @@
-import os
+#!/usr/bin/env python3
+"""
+Library indexer: scans music/ once and writes tracks.json, tracks.bin and
+music_list.json.
+
+Per-file metadata (size, duration, sha256) is cached in .build_cache.json
+keyed by size and mtime, so a rebuild only re-reads files that changed.
+New files are probed in a thread pool. Existing tracks.json entries keep
+their `file` URL (e.g. after convert_to_github_urls.py) and `selectedBy`.
+
+Files are also analysed once for integrated loudness, true peak and the
+playback gain to -18 LUFS (see loudness.py; needs numpy plus ffmpeg or
+mpg123), in a process pool since the analysis is CPU-bound. Clients apply
+`gain` as a volume.
+
+For gapless playback each track gets `trimStart`/`trimEnd`: the positions
+(seconds into the file as a plain decoder plays it) where sound starts and
+ends. They combine the LAME tag's encoder delay and padding with the
+leading and trailing silence found by the loudness pass, so clients can
+skip dead air by seeking and stopping early instead of decoding to find it.
+
+With --watch the build stays running after the first pass and rebuilds on
+every change to music/ (see watcher.py), re-reading only the files that
+changed; a new song is in tracks.json well under a second after it lands
+(plus its loudness analysis).
+
+Usage:
+    python build.py [--no-art] [--no-loudness] [--full] [--workers 8] [--watch]
+"""
+
+import argparse
+import hashlib
 import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
 from mutagen.mp3 import MP3
-from mutagen.id3 import ID3
+
+import lazy
+from catalog import write_catalog
 
 MUSIC_DIR = "music"
 ART_DIR = "album-art"
 OUTPUT_JSON = "tracks.json"
+OUTPUT_CATALOG = "tracks.bin"
+OUTPUT_LIST = "music_list.json"
+CACHE_FILE = ".build_cache.json"
+CACHE_VERSION = 2
+DECODER_DELAY = 529  # samples every MP3 decoder adds on top of the LAME encoder delay
+
+
+def art_name(filename):
+    return os.path.splitext(filename)[0] + ".jpg"
 
-os.makedirs(ART_DIR, exist_ok=True)
 
-tracks = []
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
 
-for filename in os.listdir(MUSIC_DIR):
-    if not filename.lower().endswith(".mp3"):
-        continue
 
-    mp3_path = os.path.join(MUSIC_DIR, filename)
-    art_path = os.path.join(ART_DIR, filename.replace(".mp3", ".jpg"))
+def lame_gap(path, info):
+    """(delay, padding) in samples from the Xing/LAME tag, including decoder delay; (0, 0) if absent."""
+    if info.layer != 3:
+        return 0, 0
+    if info.version == 1:
+        side_info = 32 if info.channels == 2 else 17
+    else:
+        side_info = 17 if info.channels == 2 else 9
+    with open(path, "rb") as f:
+        f.seek(info.frame_offset + 4 + side_info)
+        data = f.read(8 + 4 + 4 + 100 + 4 + 24)
+    if data[:4] not in (b"Xing", b"Info"):
+        return 0, 0
+    flags = int.from_bytes(data[4:8], "big")
+    pos = 8 + 4 * bool(flags & 1) + 4 * bool(flags & 2) + 100 * bool(flags & 4) + 4 * bool(flags & 8)
+    lame = data[pos:pos + 24]
+    if len(lame) < 24 or not lame[:4].isalnum():  # "LAME", "Lavc" (ffmpeg), ...
+        return 0, 0
+    packed = int.from_bytes(lame[21:24], "big")  # 12 bits delay, 12 bits padding
+    delay, padding = packed >> 12, packed & 0xFFF
+    return delay + DECODER_DELAY, max(0, padding - DECODER_DELAY)
 
-    title = filename.rsplit(".", 1)[0]
-    selected_by = "Unknown"  # You can edit this if needed
 
-    # extract album art
+def probe_file(music_dir, filename, st, extract_art=True, art_dir=ART_DIR):
+    """Read duration, hash and (optionally) album art for one MP3."""
+    mp3_path = os.path.join(music_dir, filename)
+    info = {
+        "size": st.st_size,
+        "mtime": st.st_mtime_ns,
+        "duration": None,
+        "sha256": file_digest(mp3_path),
+        "art": False,
+    }
     try:
-        tags = ID3(mp3_path)
-        for tag in tags.values():
+        audio = MP3(mp3_path)
+        info["duration"] = round(audio.info.length, 3)
+        info["sampleRate"] = audio.info.sample_rate
+        info["encoderDelay"], info["encoderPadding"] = lame_gap(mp3_path, audio.info)
+        for tag in (audio.tags or {}).values():
             if tag.FrameID == "APIC":
-                with open(art_path, "wb") as img:
-                    img.write(tag.data)
+                info["art"] = True
+                if extract_art:
+                    with open(os.path.join(art_dir, art_name(filename)), "wb") as img:
+                        img.write(tag.data)
                 break
     except Exception as e:
+        print("Could not read tags for", filename, e)
+    if not info["art"]:
         print("No album art found for", filename)
+    return info
+
+
+def load_cache(path):
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+        if cache.get("version") == CACHE_VERSION:
+            return cache["files"]
+    except (OSError, ValueError, KeyError):
+        pass
+    return {}
+
+
+def scan_library(music_dir=MUSIC_DIR, cache=None, extract_art=True, workers=None, only=None,
+                 art_dir=ART_DIR):
+    """
+    Return {filename: info} for every MP3 in music_dir.
+
+    Entries in `cache` whose size and mtime still match are reused without
+    opening the file. If `only` is given, just those filenames are
+    re-checked and every other cached entry is trusted as-is.
+    """
+    cache = cache or {}
+    result = {}
+    todo = []
+    with os.scandir(music_dir) as it:
+        for entry in it:
+            name = entry.name
+            if not name.lower().endswith(".mp3") or not entry.is_file():
+                continue
+            cached = cache.get(name)
+            if cached and only is not None and name not in only:
+                result[name] = cached
+                continue
+            st = entry.stat()
+            art_missing = (extract_art and cached and cached.get("art")
+                           and not os.path.exists(os.path.join(art_dir, art_name(name))))
+            if (cached and cached["size"] == st.st_size
+                    and cached["mtime"] == st.st_mtime_ns and not art_missing):
+                result[name] = cached
+            else:
+                todo.append((name, st))
+
+    if todo:
+        if extract_art:
+            os.makedirs(art_dir, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            probed = pool.map(lambda job: probe_file(music_dir, job[0], job[1], extract_art, art_dir), todo)
+            for (name, _), info in zip(todo, probed):
+                result[name] = info
+    return result
+
+
+def measure_loudness(path):
+    """Loudness fields for one file; runs in a worker process."""
+    try:
+        return lazy.optional("loudness").analyze(path)
+    except Exception as e:
+        print("Could not analyse loudness of", path, e)
+        # don't retry every build
+        return {"loudness": None, "truePeak": None, "gain": None, "silenceStart": None, "silenceEnd": None}
+
+
+def analyze_loudness(music_dir, files, workers=None, pool=None, only=None):
+    """
+    Add loudness, gain and silence fields to every entry of `files` (or of
+    those named in `only`) that lacks them, in `pool` or else a process pool
+    made for this call.
+    """
+    todo = [name for name, info in files.items()
+            if "loudness" not in info and (only is None or name in only)]
+    if not todo:
+        return
+    loudness = lazy.optional("loudness")
+    if loudness is None or loudness.decoder() is None:
+        print(f"Skipping loudness analysis of {len(todo)} files (needs numpy and ffmpeg or mpg123)")
+        return
+    paths = [os.path.join(music_dir, name) for name in todo]
+    if pool is None:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(measure_loudness, paths))
+    else:
+        results = pool.map(measure_loudness, paths)
+    for name, result in zip(todo, results):
+        if result is not None:
+            files[name] = dict(files[name], **result)
+
+
+def build_tracks(files, previous=None):
+    """Build the tracks.json list (sorted by filename) from scan results."""
+    previous = {t.get("title"): t for t in (previous or [])}
+    tracks = []
+    for filename in sorted(files):
+        info = files[filename]
+        title = os.path.splitext(filename)[0]
+        old = previous.get(title, {})
+        track = {
+            "file": old.get("file", f"{MUSIC_DIR}/{filename}"),
+            "title": title,
+            "cover": f"{ART_DIR}/{art_name(filename)}",
+            "selectedBy": old.get("selectedBy", "Unknown"),  # You can edit this if needed
+            "duration": info["duration"],
+            "size": info["size"],
+            "sha256": info["sha256"],
+        }
+        if info.get("gain") is not None:
+            track.update(loudness=info["loudness"], truePeak=info["truePeak"], gain=info["gain"])
+        track.update(trim_points(info))
+        tracks.append(track)
+    return tracks
+
+
+def trim_points(info):
+    """
+    {trimStart, trimEnd, sampleRate} (seconds into the raw file; the rate lets
+    frame-based players like mpg123 seek), or {} if there is nothing to trim.
+    """
+    rate = info.get("sampleRate")
+    duration = info.get("duration")
+    if not rate or not duration:
+        return {}
+    # mutagen's duration already excludes the encoder delay and padding
+    start = info.get("encoderDelay", 0) / rate + (info.get("silenceStart") or 0)
+    end = info.get("encoderDelay", 0) / rate + duration - (info.get("silenceEnd") or 0)
+    if end - start < 1.0 or (start <= 0 and not info.get("silenceEnd")):
+        return {}
+    return {"trimStart": round(start, 3), "trimEnd": round(end, 3), "sampleRate": rate}
+
+
+def build_music_list(files):
+    return [
+        {
+            "name": filename,
+            "size": files[filename]["size"],
+            "duration": files[filename]["duration"],
+            "sha256": files[filename]["sha256"],
+        }
+        for filename in sorted(files)
+    ]
+
+
+def write_json(path, data):
+    """Write JSON atomically so readers never see a half-written file."""
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=4)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def load_previous_tracks(path=OUTPUT_JSON):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def build(extract_art=True, full=False, workers=None, only=None, loudness=True, root=".",
+          pool=None, analyse=None):
+    """
+    Scan the library under `root` and write every output file there.
+    Returns the track list. With `only`, just those filenames are re-read
+    (an empty `only` re-reads nothing). `analyse` limits the loudness pass
+    to those filenames, and `pool` is a process pool to run it in instead
+    of a fresh one.
+    """
+    def path(name):
+        return os.path.join(root, name)
+
+    music_dir = path(MUSIC_DIR)
+    cache = {} if full else load_cache(path(CACHE_FILE))
+    files = scan_library(music_dir, cache, extract_art, workers, only, path(ART_DIR))
+    if loudness:
+        analyze_loudness(music_dir, files, workers, pool, analyse)
+
+    tracks = build_tracks(files, load_previous_tracks(path(OUTPUT_JSON)))
+    write_json(path(OUTPUT_JSON), tracks)
+    # compact columnar copy for fast mmap loading (see catalog.py)
+    write_catalog(tracks, path(OUTPUT_CATALOG))
+    write_json(path(OUTPUT_LIST), build_music_list(files))
+    write_json(path(CACHE_FILE), {"version": CACHE_VERSION, "files": dict(sorted(files.items()))})
+    return tracks
+
+
+def watch(extract_art=True, workers=None, loudness=True):
+    """Rebuild on every change to music/ until interrupted (see watcher.py)."""
+    from watcher import LibraryWatcher
+
+    def rebuild(names):
+        t0 = time.perf_counter()
+        tracks = build(extract_art, workers=workers, only=names, loudness=loudness, analyse=names)
+        print(f"rebuilt {len(names)} changed file(s) in {time.perf_counter() - t0:.2f}s; "
+              f"{len(tracks)} tracks")
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    try:
+        LibraryWatcher(MUSIC_DIR, rebuild).run()
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index music/ into tracks.json and music_list.json")
+    parser.add_argument("--no-art", action="store_true", help="skip album art extraction")
+    parser.add_argument("--no-loudness", action="store_true", help="skip loudness analysis")
+    parser.add_argument("--full", action="store_true", help="ignore the build cache and re-read every file")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="threads probing new files / processes analysing loudness")
+    parser.add_argument("--watch", action="store_true", help="keep running and rebuild when music/ changes")
+    args = parser.parse_args()
 
-    tracks.append({
-        "file": f"music/{filename}",
-        "title": title,
-        "cover": f"album-art/{filename.replace('.mp3', '.jpg')}",
-        "selectedBy": selected_by
-    })
+    tracks = build(extract_art=not args.no_art, full=args.full, workers=args.workers,
+                   loudness=not args.no_loudness)
+    print(f"build complete! {len(tracks)} tracks; tracks.json, tracks.bin and music_list.json generated.")
+    if args.watch:
+        watch(extract_art=not args.no_art, workers=args.workers, loudness=not args.no_loudness)
 
-with open(OUTPUT_JSON, "w") as f:
-    json.dump(tracks, f, indent=4)
 
-print("build complete! tracks.json generated.")
+if __name__ == "__main__":
+    main()
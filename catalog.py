@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Compact columnar track catalog (tracks.bin).
+
+tracks.json is pretty-printed and has to be parsed in full before the first
+track can be looked up. tracks.bin stores the same data as a string table
+plus a fixed-width offset array, so a reader can mmap the file and decode a
+single track (or a single field) without touching the rest.
+
+Layout (little-endian):
+    header   magic(8) version(u32) count(u32) nfields(u32) fields_len(u32)
+             index_off(u64) strings_off(u64)
+    fields   JSON list of field names (utf-8)
+    index    count * nfields cells of (offset u32, length u32) into strings
+    strings  utf-8 string table
+
+A cell with length MISSING means the track has no such field. Values that are
+not strings are stored JSON-encoded with the JSON_FLAG bit set on the length.
+
+Usage:
+    python catalog.py [tracks.json] [tracks.bin]
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+
+MAGIC = b'RTCAT\x00\x00\x01'
+VERSION = 1
+HEADER = struct.Struct('<8sIIIIQQ')
+CELL = struct.Struct('<II')
+MISSING = 0xFFFFFFFF
+JSON_FLAG = 0x80000000
+
+
+def write_catalog(tracks, path):
+    """Write a list of track dicts to `path` in the columnar format."""
+    fields = []
+    for track in tracks:
+        for key in track:
+            if key not in fields:
+                fields.append(key)
+    field_blob = json.dumps(fields).encode('utf-8')
+
+    strings = bytearray()
+    interned = {}
+    index = bytearray()
+    for track in tracks:
+        for key in fields:
+            if key not in track:
+                index += CELL.pack(0, MISSING)
+                continue
+            value = track[key]
+            flag = 0
+            if not isinstance(value, str):
+                value = json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+                flag = JSON_FLAG
+            raw = value.encode('utf-8')
+            offset = interned.get(raw)
+            if offset is None:
+                offset = len(strings)
+                interned[raw] = offset
+                strings += raw
+            index += CELL.pack(offset, len(raw) | flag)
+
+    index_off = HEADER.size + len(field_blob)
+    strings_off = index_off + len(index)
+    header = HEADER.pack(MAGIC, VERSION, len(tracks), len(fields),
+                         len(field_blob), index_off, strings_off)
+
+    path = Path(path)
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(header)
+        f.write(field_blob)
+        f.write(index)
+        f.write(strings)
+    os.replace(tmp, path)
+
+
+class Catalog:
+    """Read-only, mmap-backed view of a tracks.bin file.
+
+    Opening is O(1) in the number of tracks; `catalog[i]` decodes one track.
+    Supports len(), indexing and iteration so it can stand in for the list
+    returned by json.load.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, nfields, fields_len, index_off, strings_off = \
+            HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f'Not a track catalog: {self.path}')
+        self._count = count
+        self._nfields = nfields
+        self._index_off = index_off
+        self._strings_off = strings_off
+        self.fields = json.loads(self._mm[HEADER.size:HEADER.size + fields_len])
+        self._field_pos = {name: i for i, name in enumerate(self.fields)}
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._count))]
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError('track index out of range')
+        track = {}
+        for pos, name in enumerate(self.fields):
+            found, value = self._cell(i, pos)
+            if found:
+                track[name] = value
+        return track
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self[i]
+
+    def get(self, i, field, default=None):
+        """Return a single field of track `i` without decoding the others."""
+        pos = self._field_pos.get(field)
+        if pos is None or not 0 <= i < self._count:
+            return default
+        found, value = self._cell(i, pos)
+        return value if found else default
+
+    def to_list(self):
+        return list(self)
+
+    def close(self):
+        self._mm.close()
+
+    def _cell(self, i, pos):
+        offset, length = CELL.unpack_from(
+            self._mm, self._index_off + (i * self._nfields + pos) * CELL.size)
+        if length == MISSING:
+            return False, None
+        start = self._strings_off + offset
+        raw = self._mm[start:start + (length & ~JSON_FLAG)]
+        if length & JSON_FLAG:
+            return True, json.loads(raw)
+        return True, raw.decode('utf-8')
+
+
+def main():
+    src = Path(sys.argv[1] if len(sys.argv) > 1 else 'tracks.json')
+    dst = Path(sys.argv[2] if len(sys.argv) > 2 else src.with_suffix('.bin'))
+    tracks = json.loads(src.read_text(encoding='utf-8'))
+    write_catalog(tracks, dst)
+    print(f'Wrote {len(tracks)} tracks to {dst}')
+
+
+if __name__ == '__main__':
+    main()
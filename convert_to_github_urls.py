@@ -8,12 +8,16 @@ Usage:
       --release-tag v1 \
       --input tracks.json \
       --output tracks.json
+
+Thin wrapper around rewrite_urls.py (rule: local-to-release); the catalog is
+streamed rather than loaded, and filenames are fully percent-encoded.
 """
 
-import json
 import argparse
 from pathlib import Path
 
+import rewrite_urls
+
 
 def convert_tracks_to_urls(tracks, github_repo, release_tag):
     """
@@ -24,12 +28,11 @@ def convert_tracks_to_urls(tracks, github_repo, release_tag):
       becomes:
       "file": "https://github.com/LeakySponge/radiothingymagiy/releases/download/v1/Song%20Name.mp3"
     """
+    options = rewrite_urls.build_parser().parse_args(
+        ['--github-repo', github_repo, '--release-tag', release_tag])
     for track in tracks:
-        if 'file' in track and track['file'].startswith('music/'):
-            filename = track['file'].replace('music/', '')
-            # URL-encode the filename (spaces → %20, etc.)
-            filename_encoded = filename.replace(' ', '%20')
-            track['file'] = f"https://github.com/{github_repo}/releases/download/{release_tag}/{filename_encoded}"
+        if isinstance(track.get('file'), str):
+            track['file'] = rewrite_urls.local_to_release(track['file'], options)
     
     return tracks
 
@@ -44,32 +47,23 @@ def main():
                         help='Input tracks.json file')
     parser.add_argument('--output', default='tracks.json',
                         help='Output tracks.json file (will overwrite if same as input)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Print the URLs that would change without writing')
     
     args = parser.parse_args()
     
-    # Load tracks.json
     input_path = Path(args.input)
     if not input_path.exists():
         print(f"Error: {args.input} not found")
         return
     
-    with open(input_path, 'r') as f:
-        tracks = json.load(f)
-    
-    print(f"Loaded {len(tracks)} tracks from {args.input}")
-    
-    # Convert file paths to GitHub URLs
-    tracks = convert_tracks_to_urls(tracks, args.github_repo, args.release_tag)
-    
-    # Save converted tracks
-    output_path = Path(args.output)
-    with open(output_path, 'w') as f:
-        json.dump(tracks, f, indent=4)
-    
-    print(f"Saved {len(tracks)} tracks to {args.output}")
-    print(f"\nExample converted URL:")
-    if tracks and 'file' in tracks[0]:
-        print(f"  {tracks[0]['file']}")
+    rewrite_urls.main([
+        '--rule', 'local-to-release',
+        '--github-repo', args.github_repo,
+        '--release-tag', args.release_tag,
+        '--input', args.input,
+        '--output', args.output,
+    ] + (['--dry-run'] if args.dry_run else []))
 
 
 if __name__ == '__main__':
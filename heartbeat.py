@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Liveness heartbeats for processes run under radio_player.py.
+
+The supervisor sets RADIO_HEARTBEAT to a per-child file path. The child
+calls `beat()` from its main loop (and from long blocking waits); each call
+touches the file at most once per INTERVAL seconds. The supervisor treats a
+file that has not been touched recently as a hung process and restarts it.
+
+Without RADIO_HEARTBEAT set, `beat()` is a no-op.
+
+`ready(name)` logs how long the process took from exec to being useful:
+first audio for the clients, first frame for the display.
+"""
+
+import os
+import time
+
+ENV = 'RADIO_HEARTBEAT'
+INTERVAL = 1.0
+
+_path = os.getenv(ENV) or None
+_last = 0.0
+_imported_at = time.monotonic()
+_ready = set()
+
+
+def beat(now=None, force=False):
+    """Touch the heartbeat file (throttled). Safe to call from any loop."""
+    global _last
+    if _path is None:
+        return
+    now = time.monotonic() if now is None else now
+    if now - _last < INTERVAL and not force:
+        return
+    _last = now
+    try:
+        os.utime(_path)
+    except FileNotFoundError:
+        try:
+            open(_path, 'a').close()
+        except OSError:
+            pass
+    except OSError:
+        pass
+
+
+def age(path):
+    """Seconds since `path` was last touched, or None if it does not exist."""
+    try:
+        return time.time() - os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def process_age():
+    """Seconds since this process was exec'd (Linux), else since this module loaded."""
+    try:
+        with open('/proc/self/stat') as f:
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf('SC_CLK_TCK'))
+    except (OSError, ValueError, IndexError):
+        return time.monotonic() - _imported_at
+
+
+def ready(name, what=''):
+    """Log '[name] Ready in N ms' the first time it is called for `name`."""
+    if name in _ready:
+        return
+    _ready.add(name)
+    print(f'[{name}] Ready in {process_age() * 1000:.0f} ms' + (f' ({what})' if what else ''))
+    beat(force=True)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Deferred imports for optional or heavy modules.
+
+    pygame = lazy.optional('pygame')          # module or None, imported now
+    db = lazy.lazy_import('firebase_admin.db')  # imported on first attribute
+
+Both import a module at most once per process; `optional` also remembers
+a failed import so missing packages are not retried on every call. Entry
+points keep these out of module scope so `python -X importtime` stays
+within the budgets checked by benchmarks/bench_imports.py.
+"""
+
+import importlib
+import threading
+
+_lock = threading.Lock()
+_optional = {}
+
+
+def optional(name):
+    """Import `name` once and return it, or None if it is not installed."""
+    try:
+        return _optional[name]
+    except KeyError:
+        pass
+    with _lock:
+        if name not in _optional:
+            try:
+                _optional[name] = importlib.import_module(name)
+            except ImportError:
+                _optional[name] = None
+        return _optional[name]
+
+
+class LazyModule:
+    """Stand-in that imports the real module on first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        module = self._module
+        if module is None:
+            module = self._module = importlib.import_module(self._name)
+        return getattr(module, attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f'<lazy module {self._name!r} ({state})>'
+
+
+def lazy_import(name):
+    return LazyModule(name)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Integrated loudness and true peak (ITU-R BS.1770-4 / EBU R128) for build.py.
+
+Audio is decoded once to 48 kHz stereo float PCM by ffmpeg (or mpg123) and
+analysed with numpy only:
+
+- K-weighting: the standard two-biquad cascade (high shelf + RLB high-pass),
+  applied as its impulse response with FFT overlap-add over many blocks at
+  once. The response decays to nothing well within FIR_TAPS samples.
+- Gating: mean square per 100 ms segment, summed four at a time into 400 ms
+  blocks with 75% overlap, then the -70 LUFS absolute and -10 LU relative
+  gates.
+- True peak: 4x polyphase (windowed-sinc) oversampling, all four phases
+  evaluated as one matrix product over sliding windows, max |sample|.
+
+`gain` is the ReplayGain-style adjustment to REFERENCE_LUFS, reduced if
+needed so the true peak stays at or below PEAK_CEILING. Clients apply it as
+a volume, so playback does no DSP.
+
+The same decode also yields the leading and trailing silence (10 ms windows
+below SILENCE_DB, found with one vectorized pass), which build.py turns into
+gapless trim points together with the LAME encoder delay and padding.
+
+Usage:
+    python loudness.py music/song.mp3 [...]
+"""
+
+import math
+import shutil
+import subprocess
+import sys
+
+import numpy as np
+
+RATE = 48000
+REFERENCE_LUFS = -18.0      # ReplayGain 2.0 reference level
+PEAK_CEILING = -1.0         # dBTP
+FIR_TAPS = 8192
+OVERSAMPLE = 4
+TP_TAPS_PER_PHASE = 12
+BLOCK = 1 << 15             # overlap-add block, samples per channel
+BATCH = 16                  # blocks transformed per numpy call (bounds memory)
+SILENCE_DB = -60.0          # dBFS RMS below which a window counts as silence
+SILENCE_WINDOW = 0.01       # seconds
+
+
+def decoder():
+    """Command prefix that writes 48 kHz stereo PCM to stdout, or None."""
+    if shutil.which('ffmpeg'):
+        return ['ffmpeg', '-v', 'error', '-i', '{path}', '-f', 'f32le', '-ac', '2', '-ar', str(RATE), '-']
+    if shutil.which('mpg123'):
+        return ['mpg123', '-q', '-s', '-e', 'f32', '--stereo', '-r', str(RATE), '{path}']
+    return None
+
+
+def decode(path):
+    """(2, n) float64 PCM of `path`, or None if no decoder is installed."""
+    cmd = decoder()
+    if cmd is None:
+        return None
+    cmd = [path if part == '{path}' else part for part in cmd]
+    res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    pcm = np.frombuffer(res.stdout, dtype='<f4')
+    return pcm[:len(pcm) // 2 * 2].reshape(-1, 2).T.astype(np.float64)
+
+
+def _biquad_impulse(sections, n):
+    """Impulse response of cascaded (b, a) biquads, n samples."""
+    x = np.zeros(n)
+    x[0] = 1.0
+    for b, a in sections:
+        y = np.zeros(n)
+        x1 = x2 = y1 = y2 = 0.0
+        for i in range(n):
+            y[i] = b[0] * x[i] + b[1] * x1 + b[2] * x2 - a[1] * y1 - a[2] * y2
+            x2, x1, y2, y1 = x1, x[i], y1, y[i]
+        x = y
+    return x
+
+
+def k_weighting(rate=RATE, taps=FIR_TAPS):
+    """K-weighting filter as an FIR (coefficients per BS.1770 for any rate)."""
+    # Stage 1: high shelf, +4 dB above ~1.7 kHz (head diffraction)
+    f0, gain_db, q = 1681.974450955533, 3.999843853973347, 0.7071752369554196
+    k = math.tan(math.pi * f0 / rate)
+    vh = 10 ** (gain_db / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf = ([(vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0],
+             [1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0])
+    # Stage 2: RLB high-pass at ~38 Hz
+    f0, q = 38.13547087602444, 0.5003270373238773
+    k = math.tan(math.pi * f0 / rate)
+    a0 = 1 + k / q + k * k
+    highpass = ([1.0, -2.0, 1.0], [1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0])
+    return _biquad_impulse([shelf, highpass], taps)
+
+
+def oversampling_phases(factor=OVERSAMPLE, taps=TP_TAPS_PER_PHASE):
+    """Polyphase components of a windowed-sinc interpolator, shape (factor, taps)."""
+    n = np.arange(factor * taps) - (factor * taps - 1) / 2
+    h = np.sinc(n / factor) * np.kaiser(factor * taps, 8.0)
+    phases = h.reshape(taps, factor).T
+    return phases / phases.sum(axis=1, keepdims=True)
+
+
+def fir_filter(x, h, block=BLOCK, batch=BATCH):
+    """Each row of `x` convolved with a long FIR `h` (first len(x) outputs), by FFT overlap-add."""
+    channels, n = x.shape
+    m = len(h)
+    nfft = 1 << (block + m - 1).bit_length()
+    H = np.fft.rfft(h, nfft)
+    nblocks = -(-n // block)
+    padded = np.zeros((channels, nblocks * block))
+    padded[:, :n] = x
+    blocks = padded.reshape(channels, nblocks, block)
+    # output block j gets the head of input block j and the tail of block j - 1
+    out = np.zeros((channels, nblocks + 1, block))
+    for start in range(0, nblocks, batch):
+        chunk = blocks[:, start:start + batch]
+        count = chunk.shape[1]
+        y = np.fft.irfft(np.fft.rfft(chunk, nfft, axis=-1) * H, nfft, axis=-1)
+        out[:, start:start + count] += y[..., :block]
+        out[:, start + 1:start + 1 + count, :m - 1] += y[..., block:block + m - 1]
+    return out.reshape(channels, -1)[:, :n]
+
+
+def _max_interpolated(x, phases, chunk=1 << 18):
+    """max |x| over every phase of the interpolator, via sliding windows (BLAS matmul)."""
+    taps = phases.shape[1]
+    padded = np.concatenate([np.zeros(taps - 1), x, np.zeros(taps - 1)])
+    windows = np.lib.stride_tricks.sliding_window_view(padded, taps)
+    peak = 0.0
+    for start in range(0, len(windows), chunk):
+        peak = max(peak, float(np.abs(windows[start:start + chunk] @ phases[:, ::-1].T).max()))
+    return peak
+
+
+_K = None
+_PHASES = None
+
+
+def integrated_loudness(pcm, rate=RATE):
+    """Gated integrated loudness in LUFS (-inf for silence)."""
+    global _K
+    if _K is None:
+        _K = k_weighting(rate)
+    weighted = fir_filter(pcm, _K)
+    segment = rate // 10
+    nseg = weighted.shape[1] // segment
+    if nseg < 4:
+        return float('-inf')
+    # mean square per 100 ms segment, per channel; 400 ms blocks overlap by 75%
+    seg = np.square(weighted[:, :nseg * segment]).reshape(len(pcm), nseg, segment).mean(axis=2)
+    z = (seg[:, :-3] + seg[:, 1:-2] + seg[:, 2:-1] + seg[:, 3:]) / 4
+    power = z.sum(axis=0)  # channel weights are 1 for left and right
+    with np.errstate(divide='ignore'):
+        block_lufs = -0.691 + 10 * np.log10(power)
+    gated = power[block_lufs > -70.0]
+    if not len(gated):
+        return float('-inf')
+    relative = -0.691 + 10 * np.log10(gated.mean()) - 10.0
+    gated = power[(block_lufs > -70.0) & (block_lufs > relative)]
+    return float(-0.691 + 10 * np.log10(gated.mean()))
+
+
+def true_peak(pcm):
+    """Maximum absolute 4x-oversampled sample value, in dBTP."""
+    global _PHASES
+    if _PHASES is None:
+        _PHASES = oversampling_phases()
+    peak = float(np.abs(pcm).max(initial=0.0))
+    for channel in pcm:
+        peak = max(peak, _max_interpolated(channel, _PHASES))
+    return 20 * math.log10(peak) if peak > 0 else float('-inf')
+
+
+def silence_bounds(pcm, rate=RATE, threshold_db=SILENCE_DB, window=SILENCE_WINDOW):
+    """(leading, trailing) silence in seconds; (0, 0) if the whole track is silent."""
+    size = max(1, int(rate * window))
+    count = pcm.shape[1] // size
+    if not count:
+        return 0.0, 0.0
+    # loudest channel's mean square per window, compared in the power domain
+    power = np.square(pcm[:, :count * size]).reshape(len(pcm), count, size).mean(axis=2).max(axis=0)
+    loud = np.flatnonzero(power > 10 ** (threshold_db / 10))
+    if not len(loud):
+        return 0.0, 0.0
+    lead = loud[0] * size / rate
+    tail = (pcm.shape[1] - (loud[-1] + 1) * size) / rate
+    return lead, tail
+
+
+def gain_for(loudness, peak, reference=REFERENCE_LUFS, ceiling=PEAK_CEILING):
+    """dB to apply: towards `reference`, but never pushing the true peak over `ceiling`."""
+    if not math.isfinite(loudness):
+        return 0.0
+    gain = reference - loudness
+    if math.isfinite(peak):
+        gain = min(gain, ceiling - peak)
+    return gain
+
+
+def analyze(path):
+    """
+    {loudness, truePeak, gain, silenceStart, silenceEnd} for one file, or None
+    if it can't be decoded. Silence is in seconds of the decoded (gapless)
+    audio.
+    """
+    pcm = decode(path)
+    if pcm is None or not pcm.size:
+        return None
+    loudness = integrated_loudness(pcm)
+    peak = true_peak(pcm)
+    lead, tail = silence_bounds(pcm)
+    return {
+        'loudness': round(loudness, 2) if math.isfinite(loudness) else None,
+        'truePeak': round(peak, 2) if math.isfinite(peak) else None,
+        'gain': round(gain_for(loudness, peak), 2),
+        'silenceStart': round(lead, 3),
+        'silenceEnd': round(tail, 3),
+    }
+
+
+def main():
+    if decoder() is None:
+        print('Install ffmpeg or mpg123 to decode audio')
+        return 1
+    for path in sys.argv[1:]:
+        print(path, analyze(path))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
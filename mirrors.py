@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Mirror selection and failover downloads for remote tracks.
+
+A track may list extra hosts for the same bytes:
+
+    {"file": "https://raw.githubusercontent.com/.../Song.mp3",
+     "mirrors": ["https://cdn.example/music/Song.mp3"], ...}
+
+MirrorSelector keeps per-host moving averages of latency (time to response
+headers) and throughput, marks hosts down for a cooldown after errors or
+rate limiting (429 / Retry-After), and ranks candidate URLs by expected
+fetch time. download() walks that ranking and, if a mirror fails part-way,
+resumes from the bytes already on disk with a Range request to the next one.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests
+
+ALPHA = 0.3                 # weight of the newest sample in the moving averages
+REFERENCE_BYTES = 4 << 20   # typical MP3 size used to turn stats into a fetch-time estimate
+PROBE_TIMEOUT = 3.0
+STALE_AFTER = 300.0         # re-probe hosts whose latency sample is older than this
+COOLDOWN = 30.0             # seconds a host is skipped after a failure
+CHUNK = 64 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+def track_sources(track):
+    """All remote URLs for a track: its `file` (if remote) followed by `mirrors`."""
+    sources = []
+    file_url = track.get('file', '')
+    if isinstance(file_url, str) and file_url.startswith(('http://', 'https://')):
+        sources.append(file_url)
+    for url in track.get('mirrors') or []:
+        if url not in sources:
+            sources.append(url)
+    return sources
+
+
+def host_of(url):
+    return urlsplit(url).netloc
+
+
+class HostStats:
+    __slots__ = ('latency', 'throughput', 'failures', 'down_until', 'probed_at')
+
+    def __init__(self):
+        self.latency = None
+        self.throughput = None
+        self.failures = 0
+        self.down_until = 0.0
+        self.probed_at = 0.0
+
+
+class MirrorSelector:
+    def __init__(self, alpha=ALPHA, cooldown=COOLDOWN, stale_after=STALE_AFTER):
+        self.alpha = alpha
+        self.cooldown = cooldown
+        self.stale_after = stale_after
+        self._hosts = {}
+        self._probing = set()   # hosts with a background probe in flight
+        self._lock = threading.Lock()
+
+    def _stats(self, url):
+        host = host_of(url)
+        stats = self._hosts.get(host)
+        if stats is None:
+            stats = self._hosts[host] = HostStats()
+        return stats
+
+    def _ewma(self, old, sample):
+        return sample if old is None else old + self.alpha * (sample - old)
+
+    def record_latency(self, url, seconds):
+        with self._lock:
+            stats = self._stats(url)
+            stats.latency = self._ewma(stats.latency, seconds)
+            stats.probed_at = time.monotonic()
+            stats.failures = 0
+
+    def record_throughput(self, url, nbytes, seconds):
+        if nbytes <= 0 or seconds <= 0:
+            return
+        with self._lock:
+            stats = self._stats(url)
+            stats.throughput = self._ewma(stats.throughput, nbytes / seconds)
+
+    def record_failure(self, url, retry_after=None):
+        with self._lock:
+            stats = self._stats(url)
+            stats.failures += 1
+            backoff = retry_after if retry_after else self.cooldown * min(stats.failures, 10)
+            stats.down_until = time.monotonic() + backoff
+
+    def healthy(self, url):
+        return self._stats(url).down_until <= time.monotonic()
+
+    def expected_seconds(self, url):
+        """Estimated time to fetch a typical track, or None if the host is unmeasured."""
+        stats = self._stats(url)
+        if stats.latency is None:
+            return None
+        if stats.throughput is None:
+            return stats.latency
+        return stats.latency + REFERENCE_BYTES / stats.throughput
+
+    def rank(self, urls):
+        """Healthy URLs fastest-first (unmeasured hosts first, to learn them), then hosts in cooldown."""
+        with self._lock:
+            def key(item):
+                pos, url = item
+                est = self.expected_seconds(url)
+                return (not self.healthy(url), est is not None, est or 0.0, pos)
+            return [url for _, url in sorted(enumerate(urls), key=key)]
+
+    def probe(self, urls, session=None, timeout=PROBE_TIMEOUT):
+        """HEAD every URL whose host has no fresh latency sample, in parallel."""
+        now = time.monotonic()
+        todo = {}
+        for url in urls:
+            stats = self._stats(url)
+            if stats.probed_at + self.stale_after < now and host_of(url) not in todo:
+                todo[host_of(url)] = url
+        if not todo:
+            return
+        session = session or requests
+
+        def head(url):
+            t0 = time.monotonic()
+            try:
+                res = session.head(url, timeout=timeout, allow_redirects=True)
+                if res.status_code == 429 or res.status_code >= 500:
+                    self.record_failure(url, _retry_after(res))
+                    return
+                self.record_latency(url, time.monotonic() - t0)
+            except requests.RequestException:
+                self.record_failure(url)
+
+        with ThreadPoolExecutor(max_workers=len(todo)) as pool:
+            list(pool.map(head, todo.values()))
+
+    def best(self, urls, session=None):
+        """Pick the URL to use right now (probing unknown hosts first)."""
+        if len(urls) > 1:
+            self.probe(urls, session)
+        ranked = self.rank(urls)
+        return ranked[0] if ranked else None
+
+    def best_now(self, urls):
+        """
+        Like best(), but never waits on the network: rank on the current
+        estimates and probe stale hosts in a background thread, so later
+        calls see fresh numbers. For request handlers.
+        """
+        if len(urls) > 1:
+            now = time.monotonic()
+            with self._lock:
+                stale = {}
+                for url in urls:
+                    host = host_of(url)
+                    if (host not in self._probing and host not in stale
+                            and self._stats(url).probed_at + self.stale_after < now):
+                        stale[host] = url
+                self._probing.update(stale)
+            if stale:
+                threading.Thread(target=self._probe_in_background, args=(stale,),
+                                 name='mirror-probe', daemon=True).start()
+        ranked = self.rank(urls)
+        return ranked[0] if ranked else None
+
+    def _probe_in_background(self, stale):
+        try:
+            self.probe(list(stale.values()))
+        finally:
+            with self._lock:
+                self._probing.difference_update(stale)
+
+    def download(self, urls, dest, session=None, timeout=30, on_progress=None, size=None):
+        """
+        Download the first working mirror to `dest`, failing over mid-stream.
+
+        Bytes already written are kept and the next mirror is asked for the
+        remainder with a Range header; a mirror that ignores Range (200
+        instead of 206) restarts the file. A 416 to that request completes
+        the file only if the partial file has the full length (`size`, else
+        the `*/<length>` the mirror reports); otherwise the partial file is
+        stale or truncated and is fetched again from scratch. Returns dest,
+        or None if every mirror failed.
+        """
+        dest = Path(dest)
+        part = dest.with_name(dest.name + '.part')
+        session = session or requests
+        have = part.stat().st_size if part.exists() else 0
+        queue = self.rank(list(urls))
+        restarted = set()
+        complete = False
+        while queue and not complete:
+            url = queue.pop(0)
+            headers = {'Range': f'bytes={have}-'} if have else {}
+            t0 = time.monotonic()
+            try:
+                with session.get(url, headers=headers, stream=True,
+                                 timeout=(PROBE_TIMEOUT, timeout), allow_redirects=True) as res:
+                    if res.status_code == 416 and have:
+                        total = size or _total_length(res)
+                        if total == have:
+                            complete = True     # nothing left to fetch
+                            continue
+                        logger.warning(f'[Mirror] {host_of(url)} has {total} bytes but the partial '
+                                       f'file has {have}; starting {dest.name} again')
+                        part.unlink(missing_ok=True)
+                        have = 0
+                        if url not in restarted:
+                            restarted.add(url)
+                            queue.insert(0, url)
+                        continue
+                    if res.status_code == 429 or res.status_code >= 500:
+                        self.record_failure(url, _retry_after(res))
+                        continue
+                    res.raise_for_status()
+                    self.record_latency(url, time.monotonic() - t0)
+                    if have and res.status_code != 206:
+                        have = 0
+                    t1 = time.monotonic()
+                    got = 0
+                    with open(part, 'ab' if have else 'wb') as f:
+                        for chunk in res.iter_content(CHUNK):
+                            f.write(chunk)
+                            got += len(chunk)
+                            if on_progress:
+                                f.flush()  # let readers tailing the .part file see it
+                                on_progress(have + got)
+                    have += got
+                    self.record_throughput(url, got, time.monotonic() - t1)
+                    expected = _total_length(res)
+                    if expected is not None and have < expected:
+                        raise requests.ConnectionError(f'short read: {have}/{expected} bytes')
+                    complete = True
+            except (requests.RequestException, OSError) as e:
+                self.record_failure(url)
+                have = part.stat().st_size if part.exists() else 0
+                logger.warning(f'[Mirror] {host_of(url)} failed, resuming from byte {have}: {e}')
+        if not complete:
+            return None
+        part.replace(dest)
+        return dest
+
+
+def _retry_after(res):
+    try:
+        return float(res.headers.get('Retry-After', ''))
+    except ValueError:
+        return None
+
+
+def _total_length(res):
+    content_range = res.headers.get('Content-Range', '')
+    if '/' in content_range:
+        total = content_range.rsplit('/', 1)[1]
+        return int(total) if total.isdigit() else None
+    length = res.headers.get('Content-Length')
+    return int(length) if length and length.isdigit() and 'Content-Encoding' not in res.headers else None
+
+
+# Shared selector so estimates accumulate across downloads in one process
+selector = MirrorSelector()
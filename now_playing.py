@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Now-playing state shared between the playback client and the display.
+
+By default the client publishes to ~/.radio_cache/now_playing.json and the
+display polls it, which works across processes. In single-process mode
+(radio_player.py --single-process) `use_memory()` switches both sides to an
+in-memory slot, so the display picks up changes without touching the disk
+on every frame. The file is still written so other readers keep working.
+"""
+
+import json
+import os
+import threading
+
+_lock = threading.Lock()
+_memory = None          # [version, state] once use_memory() is called
+_file_cache = {}        # path -> (mtime_ns, state)
+
+
+def use_memory():
+    global _memory
+    with _lock:
+        if _memory is None:
+            _memory = [0, None]
+
+
+def publish(path, state):
+    """Publish a new state; raises OSError if the file write fails."""
+    with _lock:
+        if _memory is not None:
+            _memory[0] += 1
+            _memory[1] = dict(state)
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_text(json.dumps(state))
+    os.replace(tmp, path)
+
+
+def read(path):
+    """
+    Return (version, state); (None, None) if nothing has been published.
+
+    `version` changes whenever the state does, so callers can skip work
+    for unchanged frames. The file is only re-parsed when its mtime moves.
+    """
+    with _lock:
+        if _memory is not None:
+            return tuple(_memory) if _memory[1] is not None else (None, None)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None, None
+    cached = _file_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached
+    try:
+        state = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None, None
+    _file_cache[path] = (mtime, state)
+    return mtime, state
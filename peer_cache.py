@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+LAN peer cache: Pi clients share their ~/.radio_cache with each other.
+
+Each client (RADIO_PEER_PORT set; 0 picks a free port) runs a tiny HTTP
+endpoint next to its cache:
+
+    GET /peer/have              {"tracks": [sha256, ...]}
+    GET /peer/tracks/<sha256>   the cached MP3 (Range supported, sent with sendfile)
+
+Tracks are identified by the sha256 build.py records, which every client
+already has in its track list and which a downloaded copy can be checked
+against. Discovery goes through server.py rather than multicast (Wi-Fi
+access points often drop multicast, and the server is already known):
+clients POST their URL and cached hashes to /api/peers every
+ANNOUNCE_INTERVAL and immediately after each new download, and entries
+expire after PEER_TTL.
+
+Before going to the origin, a download asks GET /api/peers?track=<sha256>
+for peers holding the file and fetches from them (in random order, through
+mirrors.selector so slow or busy peers are skipped), then verifies the
+hash; a mismatch deletes the copy and falls back to the origin.
+
+When no peer has it yet, the first client to ask is recorded as fetching
+it for CLAIM_TTL, and later askers wait (up to PEER_WAIT) for that copy to
+appear instead of all going to the origin at once — a track change across
+the building costs one origin download, not one per Pi. Each peer serves at
+most MAX_UPLOADS files at once and answers 503 beyond that.
+
+Several clients on one machine work too: give each its own RADIO_CACHE_DIR
+(see benchmarks/bench_peers.py).
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import socket
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import requests
+
+from mirrors import selector
+
+ANNOUNCE_INTERVAL = 30.0    # seconds between full announcements
+PEER_TTL = 90.0             # a peer is forgotten this long after its last announcement
+CLAIM_TTL = 30.0            # how long the first asker counts as fetching a track
+PEER_WAIT = 10.0            # how long a client waits for a claimed track to appear on a peer
+PEER_POLL = 0.25            # seconds between lookups while waiting
+MAX_UPLOADS = 4             # concurrent files one peer serves
+PEERS_PER_TRACK = 3         # peers returned per lookup
+SHA256 = re.compile(r'^[0-9a-f]{64}$')
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def local_address(server_url):
+    """The local IP other hosts reach us on: the one routing to `server_url`."""
+    host = urlsplit(server_url).hostname or '127.0.0.1'
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.connect((host, 9))    # no packet is sent for UDP connect
+            return s.getsockname()[0]
+    except OSError:
+        return '127.0.0.1'
+
+
+class _PeerHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    cache = None    # set on the per-server subclass
+
+    def log_message(self, format, *args):
+        pass
+
+    def _json(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/peer/have':
+            return self._json(200, {'tracks': self.cache.tracks()})
+        if not self.path.startswith('/peer/tracks/'):
+            return self._json(404, {'error': 'Not found'})
+        sha = self.path[len('/peer/tracks/'):]
+        path = self.cache.path_of(sha)
+        if path is None:
+            return self._json(404, {'error': 'Not cached here'})
+        if not self.cache.uploads.acquire(blocking=False):
+            self.send_response(503)
+            self.send_header('Retry-After', '1')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        try:
+            self._send_file(sha, path)
+        finally:
+            self.cache.uploads.release()
+
+    def _send_file(self, sha, path):
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            self.cache.forget(sha)      # evicted from the cache since it was announced
+            return self._json(404, {'error': 'Not cached here'})
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            start = 0
+            match = re.match(r'bytes=(\d+)-$', self.headers.get('Range', ''))
+            if match:
+                start = int(match.group(1))
+                if start >= size:
+                    self.send_response(416)
+                    self.send_header('Content-Range', f'bytes */{size}')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                self.send_response(206)
+                self.send_header('Content-Range', f'bytes {start}-{size - 1}/{size}')
+            else:
+                self.send_response(200)
+            self.send_header('Content-Type', 'audio/mpeg')
+            self.send_header('Content-Length', str(size - start))
+            self.end_headers()
+            self.connection.sendfile(f, start, size - start)
+        self.cache.served += 1
+
+
+class PeerCache:
+    """A client's side of peer sharing: serves its cache, announces it and fetches from peers."""
+
+    def __init__(self, cache_dir, server_url, port=0, advertise_host=None, peer_id=None):
+        self.cache_dir = cache_dir
+        self.server_url = server_url
+        self.id = peer_id or uuid.uuid4().hex[:12]
+        self.uploads = threading.Semaphore(MAX_UPLOADS)
+        self.served = 0
+        self._have = {}             # sha256 -> filename in cache_dir
+        self._pending = []          # hashes not announced yet
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._session = requests.Session()
+        handler = type('PeerHandler', (_PeerHandler,), {'cache': self})
+        self._server = ThreadingHTTPServer(('0.0.0.0', port), handler)
+        self._server.daemon_threads = True
+        host = advertise_host or local_address(server_url)
+        self.url = f'http://{host}:{self._server.server_address[1]}'
+
+    def start(self, tracks=()):
+        """Index already-cached files from `tracks`, then serve and announce in the background."""
+        for track in tracks:
+            sha = track.get('sha256')
+            name = track.get('file', '').split('/')[-1]
+            if sha and name and (self.cache_dir / name).exists():
+                self._have[sha] = name
+        threading.Thread(target=self._server.serve_forever, name='peer-server', daemon=True).start()
+        threading.Thread(target=self._run, name='peer-announce', daemon=True).start()
+        print(f'[Peers] Sharing {len(self._have)} cached tracks at {self.url}')
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        self._server.shutdown()
+
+    def tracks(self):
+        with self._lock:
+            return list(self._have)
+
+    def path_of(self, sha):
+        with self._lock:
+            name = self._have.get(sha)
+        return self.cache_dir / name if name else None
+
+    def add(self, sha, filename):
+        """A complete file is in the cache: serve it and announce it right away."""
+        if not sha:
+            return
+        with self._lock:
+            self._have[sha] = filename
+            self._pending.append(sha)
+        self._wake.set()
+
+    def forget(self, sha):
+        with self._lock:
+            self._have.pop(sha, None)
+
+    def _announce(self, full):
+        with self._lock:
+            pending, self._pending = self._pending, []
+            body = {'id': self.id, 'url': self.url}
+            if full:
+                body['tracks'] = list(self._have)
+            else:
+                body['add'] = pending
+        try:
+            self._session.post(f'{self.server_url}/api/peers', json=body, timeout=5).raise_for_status()
+            return True
+        except requests.RequestException as e:
+            print(f'[Peers] Announce failed: {e}')
+            return False
+
+    def _run(self):
+        """Full announcement every ANNOUNCE_INTERVAL; new downloads (add()) in between."""
+        full_at = 0.0
+        while not self._stop.is_set():
+            if time.monotonic() >= full_at:
+                ok = self._announce(full=True)
+                full_at = time.monotonic() + (ANNOUNCE_INTERVAL if ok else ANNOUNCE_INTERVAL / 3)
+            elif self._pending:
+                self._announce(full=False)
+            self._wake.wait(max(0.0, full_at - time.monotonic()))
+            self._wake.clear()
+
+    def lookup(self, sha):
+        """(peer URLs for `sha`, whether another peer is fetching it now)."""
+        try:
+            res = self._session.get(f'{self.server_url}/api/peers',
+                                    params={'track': sha, 'exclude': self.id}, timeout=2)
+            res.raise_for_status()
+            data = res.json()
+            return [f'{url}/peer/tracks/{sha}' for url in data.get('peers', [])], data.get('fetching', False)
+        except (requests.RequestException, ValueError):
+            return [], False
+
+    def fetch(self, sha, dest, on_progress=None):
+        """
+        Download `sha` from a peer to `dest` and verify it. Returns dest, or
+        None if no peer had it (in time) or every copy failed the check.
+        """
+        if not sha:
+            return None
+        deadline = time.monotonic() + PEER_WAIT
+        while True:
+            urls, fetching = self.lookup(sha)
+            if urls and selector.download(urls, dest, session=self._session, on_progress=on_progress):
+                if file_digest(dest) == sha:
+                    return dest
+                print(f'[Peers] Hash mismatch for {dest.name}; discarding peer copy')
+                dest.unlink(missing_ok=True)
+                return None
+            # nobody has it and nobody is fetching it: go to the origin
+            if not (urls or fetching) or time.monotonic() >= deadline:
+                return None
+            # being fetched, or every holder was busy: more holders appear as peers finish
+            time.sleep(PEER_POLL)
+
+
+class PeerDirectory:
+    """server.py's registry: which peers hold which tracks, with expiry."""
+
+    def __init__(self, ttl=PEER_TTL, claim_ttl=CLAIM_TTL):
+        self.ttl = ttl
+        self.claim_ttl = claim_ttl
+        self._peers = {}        # id -> {'url', 'tracks': set, 'seen'}
+        self._holders = {}      # sha256 -> set of peer ids
+        self._claims = {}       # sha256 -> (peer id, monotonic time)
+        self._lock = threading.Lock()
+
+    def announce(self, peer_id, url, tracks=None, add=(), now=None):
+        """Register or refresh a peer; `tracks` replaces its set, `add` extends it."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            peer = self._peers.get(peer_id)
+            if peer is None:
+                peer = self._peers[peer_id] = {'url': url, 'tracks': set(), 'seen': now}
+            peer['url'] = url
+            peer['seen'] = now
+            if tracks is not None:
+                for sha in peer['tracks'] - set(tracks):
+                    self._drop_holder(sha, peer_id)
+                peer['tracks'] = set()
+                add = list(add) + list(tracks)
+            for sha in add:
+                peer['tracks'].add(sha)
+                self._holders.setdefault(sha, set()).add(peer_id)
+                if self._claims.get(sha, (None,))[0] == peer_id:
+                    del self._claims[sha]
+
+    def _drop_holder(self, sha, peer_id):
+        holders = self._holders.get(sha)
+        if holders is not None:
+            holders.discard(peer_id)
+            if not holders:
+                del self._holders[sha]
+
+    def _expire(self, now):
+        for peer_id in [p for p, peer in self._peers.items() if peer['seen'] + self.ttl < now]:
+            for sha in self._peers.pop(peer_id)['tracks']:
+                self._drop_holder(sha, peer_id)
+        for sha in [s for s, (_, t) in self._claims.items() if t + self.claim_ttl < now]:
+            del self._claims[sha]
+
+    def lookup(self, sha, asker=None, limit=PEERS_PER_TRACK, now=None):
+        """
+        {peers: up to `limit` URLs holding `sha` (random order, spreading
+        load), fetching: whether another peer claimed it}. With no holder
+        and no claim, `asker` claims it.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._expire(now)
+            holders = [p for p in self._holders.get(sha, ()) if p != asker]
+            if holders:
+                chosen = random.sample(holders, min(limit, len(holders)))
+                return {'peers': [self._peers[p]['url'] for p in chosen], 'fetching': False}
+            claim = self._claims.get(sha)
+            if claim is not None and claim[0] != asker:
+                return {'peers': [], 'fetching': True}
+            if asker:
+                self._claims[sha] = (asker, now)
+            return {'peers': [], 'fetching': False}
+
+    def summary(self, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._expire(now)
+            return [{'id': p, 'url': peer['url'], 'tracks': len(peer['tracks']),
+                     'age': round(now - peer['seen'], 1)} for p, peer in self._peers.items()]
+
+    def __len__(self):
+        return len(self._peers)
@@ -17,17 +17,20 @@ import sys
 import time
 import threading
 import argparse
-import urllib.request
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-import firebase_admin
-from firebase_admin import credentials, db
+import heartbeat
+import lazy
+from mirrors import selector, track_sources
+from timesync import ClockSync
 
-try:
-    import pygame
-    HAS_PYGAME = True
-except ImportError:
-    HAS_PYGAME = False
+# Imported on first use: firebase_admin pulls in the google-auth/grpc stack,
+# which dominates cold start on a Pi.
+firebase_admin = lazy.lazy_import('firebase_admin')
+db = lazy.lazy_import('firebase_admin.db')
+pygame = None  # set by init_audio() when pygame is installed
 
 # Global playback state
 current_track = None
@@ -37,6 +40,8 @@ playback_thread = None
 stop_playback = threading.Event()
 last_sync_time = 0
 music_cache = {}  # Downloaded tracks cache
+clock = ClockSync(None)  # replaced in main() when a server URL is configured
+state_path = 'radio/state'  # radio/stations/<id>/state with --station
 
 
 def load_config(config_path):
@@ -62,7 +67,9 @@ def init_firebase(config):
 
 def init_audio():
     """Initialize audio playback (pygame or fallback)."""
-    if HAS_PYGAME:
+    global pygame
+    pygame = lazy.optional('pygame')
+    if pygame:
         try:
             pygame.mixer.init()
             print("[Audio] Initialized pygame mixer")
@@ -82,43 +89,60 @@ def init_audio():
     return None
 
 
-def download_track(url, cache_dir):
-    """Download a track if not already cached."""
+def download_track(urls, cache_dir):
+    """Download a track if not already cached, trying the fastest mirror first."""
     cache_dir = Path(cache_dir)
     cache_dir.mkdir(parents=True, exist_ok=True)
     
-    # Use URL hash as cache key
-    cache_file = cache_dir / f"{hash(url) % 10**8}.mp3"
+    # Stable hash of the primary URL as cache key (hash() is salted per process)
+    cache_file = cache_dir / f"{hashlib.sha1(urls[0].encode('utf-8')).hexdigest()[:16]}.mp3"
     
     if cache_file.exists():
         print(f"[Cache] Using cached: {cache_file}")
         return str(cache_file)
     
-    try:
-        print(f"[Download] Fetching: {url}")
-        urllib.request.urlretrieve(url, cache_file)
+    print(f"[Download] Fetching: {urls[0]} ({len(urls)} source(s))")
+    if selector.download(urls, cache_file):
         print(f"[Download] Saved to: {cache_file}")
         return str(cache_file)
-    except Exception as e:
-        print(f"[Download] Error: {e}")
-        return None
+    print("[Download] Error: all mirrors failed")
+    return None
+
+
+def gain_scale(gain):
+    """Linear factor for a build.py `gain` in dB (1.0 when the track has none)."""
+    return 10 ** (gain / 20) if gain else 1.0
+
 
+def mpg123_frames(seconds, sample_rate):
+    """MPEG frames covering `seconds` (1152 samples per frame, 576 for MPEG-2/2.5 rates)."""
+    rate = sample_rate or 44100
+    return int(seconds * rate / (1152 if rate >= 32000 else 576))
 
-def play_audio_pygame(file_path, start_pos=0):
-    """Play audio using pygame."""
+
+def play_audio_pygame(file_path, start_pos=0, gain=None, end_pos=None, sample_rate=None):
+    """
+    Play audio using pygame from `start_pos` to `end_pos` (seconds into the
+    file; the end is the gapless trim point), at the track's loudness gain
+    (attenuation only).
+    """
     try:
         pygame.mixer.music.load(file_path)
-        pygame.mixer.music.play()
-        
-        # Seek to start position if possible
-        if start_pos > 0:
-            # pygame doesn't have reliable seek; approximate by waiting
-            time.sleep(min(start_pos, 0.5))
+        pygame.mixer.music.set_volume(min(1.0, gain_scale(gain)))
+        try:
+            pygame.mixer.music.play(start=start_pos)
+        except pygame.error:
+            pygame.mixer.music.play()   # format without seek support
+        heartbeat.ready('Pi Radio', 'first audio')
+        deadline = time.monotonic() + end_pos - start_pos if end_pos else None
         
         print(f"[Playback] Playing (pygame): {file_path}")
         
-        # Block until music ends or stop event is set
+        # Block until music ends, the trim point passes or stop event is set
         while pygame.mixer.music.get_busy() and not stop_playback.is_set():
+            if deadline and time.monotonic() >= deadline:
+                pygame.mixer.music.stop()
+                break
             time.sleep(0.1)
         
         print("[Playback] Track ended")
@@ -126,11 +150,22 @@ def play_audio_pygame(file_path, start_pos=0):
         print(f"[Playback] Error: {e}")
 
 
-def play_audio_mpg123(file_path, start_pos=0):
-    """Play audio using mpg123."""
+def play_audio_mpg123(file_path, start_pos=0, gain=None, end_pos=None, sample_rate=None):
+    """
+    Play audio using mpg123 from `start_pos` to `end_pos` (seconds, rounded
+    to whole frames), scaling output by the track's loudness gain.
+    """
     try:
-        cmd = f"mpg123 '{file_path}'"
+        cmd = f"mpg123 -f {round(32768 * gain_scale(gain))}"
+        if start_pos or end_pos:
+            # -k/-n: frames to skip/play; the trim replaces mpg123's own gapless handling
+            skip = mpg123_frames(start_pos, sample_rate)
+            cmd += f" --no-gapless -k {skip}"
+            if end_pos:
+                cmd += f" -n {max(1, mpg123_frames(end_pos, sample_rate) - skip)}"
+        cmd += f" '{file_path}'"
         print(f"[Playback] Playing (mpg123): {file_path}")
+        heartbeat.ready('Pi Radio', 'first audio')
         os.system(cmd)
         print("[Playback] Track ended")
     except Exception as e:
@@ -152,12 +187,13 @@ def play_track(track, audio_backend, music_cache_dir, elapsed_seconds):
         return
     
     # If it's a relative path, skip (not hosted remotely)
-    if not track_url.startswith('http'):
+    sources = track_sources(track)
+    if not sources:
         print(f"[Playback] Skipping local path (not remote): {track_url}")
         return
     
     # Download if needed
-    file_path = download_track(track_url, music_cache_dir)
+    file_path = download_track(sources, music_cache_dir)
     if not file_path:
         print("[Playback] Download failed")
         return
@@ -167,20 +203,23 @@ def play_track(track, audio_backend, music_cache_dir, elapsed_seconds):
     if playback_thread and playback_thread.is_alive():
         playback_thread.join(timeout=2)
     
-    # Start new playback in a thread
+    # Start new playback in a thread, past the track's gapless trim start
     stop_playback.clear()
+    start_pos = float(track.get('trimStart') or 0) + max(0.0, elapsed_seconds)
     is_playing = True
     
     if audio_backend == 'pygame':
         playback_thread = threading.Thread(
             target=play_audio_pygame,
-            args=(file_path, elapsed_seconds),
+            args=(file_path, start_pos, track.get('gain'), track.get('trimEnd'),
+                  track.get('sampleRate')),
             daemon=True
         )
     elif audio_backend == 'mpg123':
         playback_thread = threading.Thread(
             target=play_audio_mpg123,
-            args=(file_path, elapsed_seconds),
+            args=(file_path, start_pos, track.get('gain'), track.get('trimEnd'),
+                  track.get('sampleRate')),
             daemon=True
         )
     else:
@@ -191,28 +230,33 @@ def play_track(track, audio_backend, music_cache_dir, elapsed_seconds):
     playback_thread.start()
 
 
-def sync_from_firebase(audio_backend, music_cache_dir):
-    """Fetch current state from Firebase and sync playback."""
+def sync_from_firebase(audio_backend, music_cache_dir, state=None):
+    """Sync playback to `state`, fetching radio/state from Firebase if not given."""
     global current_track, current_index, last_sync_time
     
     try:
-        ref = db.reference('radio/state')
-        state = ref.get()
+        if state is None:
+            state = db.reference(state_path).get()
         
         if not state:
-            print("[Sync] No radio/state in Firebase")
+            print(f"[Sync] No {state_path} in Firebase")
             return
         
         current_index = state.get('currentTrackIndex', 0)
         tracks = state.get('tracks', [])
         start_time = state.get('startTime', 0)
         
-        if not tracks or current_index >= len(tracks):
+        # The station clock (station.py) publishes the track with the state
+        if state.get('track'):
+            current_track = state['track']
+        elif tracks and current_index < len(tracks):
+            current_track = tracks[current_index]
+        else:
             print("[Sync] Invalid track index or no tracks")
             return
         
-        current_track = tracks[current_index]
-        elapsed_seconds = (time.time() * 1000 - start_time) / 1000.0
+        # Server time, so a drifting Pi clock doesn't shift the position
+        elapsed_seconds = (clock.now_ms() - start_time) / 1000.0
         
         print(f"[Sync] Track {current_index}: {current_track.get('title', 'Unknown')}")
         print(f"[Sync] Elapsed: {elapsed_seconds:.1f}s")
@@ -225,13 +269,18 @@ def sync_from_firebase(audio_backend, music_cache_dir):
 
 
 def listen_firebase(audio_backend, music_cache_dir):
-    """Listen to Firebase state changes."""
+    """Listen to Firebase state changes (read-only; the station clock writes)."""
     try:
-        ref = db.reference('radio/state')
+        ref = db.reference(state_path)
         
         def on_change(message):
             print("[Firebase] State changed")
-            sync_from_firebase(audio_backend, music_cache_dir)
+            # The station writes the whole state in one set(), so the event
+            # already carries it; only partial updates need a re-fetch
+            if message.path == '/' and message.data:
+                sync_from_firebase(audio_backend, music_cache_dir, message.data)
+            else:
+                sync_from_firebase(audio_backend, music_cache_dir)
         
         ref.listen(on_change)
     except Exception as e:
@@ -244,6 +293,10 @@ def main():
                         help='Path to Firebase config JSON')
     parser.add_argument('--music-dir', default='./music_cache',
                         help='Directory to cache downloaded music')
+    parser.add_argument('--server', default=os.getenv('RADIO_SERVER_URL'),
+                        help='server.py URL for clock sync (default: config serverUrl)')
+    parser.add_argument('--station', default=os.getenv('RADIO_STATION_ID'),
+                        help='Non-default station from stations.json to follow')
     
     args = parser.parse_args()
     
@@ -254,13 +307,23 @@ def main():
     
     config = load_config(args.config)
     
-    # Initialize Firebase
-    if not init_firebase(config):
-        print("Error: Firebase initialization failed")
-        sys.exit(1)
+    global clock, state_path
+    if args.station:
+        state_path = f'radio/stations/{args.station}/state'
+    clock = ClockSync(args.server or config.get('serverUrl'))
     
-    # Initialize audio
-    audio_backend = init_audio()
+    # Open the audio device and measure the clock offset while
+    # firebase_admin imports and connects
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        audio = pool.submit(init_audio)
+        pool.submit(clock.sync)
+        
+        # Initialize Firebase
+        if not init_firebase(config):
+            print("Error: Firebase initialization failed")
+            sys.exit(1)
+        
+        audio_backend = audio.result()
     if not audio_backend:
         print("Warning: No audio backend available")
     
@@ -268,6 +331,7 @@ def main():
     print(f"[Pi Radio] Music cache: {args.music_dir}")
     
     # Initial sync
+    clock.start()
     sync_from_firebase(audio_backend, args.music_dir)
     
     # Start listening for state changes
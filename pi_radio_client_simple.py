@@ -15,223 +15,520 @@ Setup:
    python server.py
 
 4. Run this client:
-   python pi_radio_client_simple.py
+   python pi_radio_client_simple.py [--profile]
 
 The client will:
 - Fetch track list from http://localhost:5000/api/tracks
 - Download MP3s to ~/.radio_cache/
 - Play tracks using pygame or mpg123
-- Auto-advance when a track finishes
+- Pick tracks with scheduler.py: a shuffled cycle with artists and
+  curators spaced apart, curators heard in proportion to
+  RADIO_CURATOR_WEIGHTS (e.g. "alice=3,bob=1": each of alice's tracks
+  plays 3 times a cycle); set RADIO_SCHEDULE_SEED to share a rotation
+- Auto-advance when a track finishes, with the next tracks already
+  downloading in the background (RADIO_PREFETCH, default 2)
+- Poll the track list every RADIO_REFRESH_SECONDS (default 60) with a
+  conditional GET, merging new tracks into the current shuffle without a
+  restart and downloading only the new ones; the server's /api/events
+  stream triggers the same refresh as soon as the library changes
+- Download remote tracks through the server first when it runs as a
+  caching proxy (RADIO_PROXY_CACHE=1, advertised on /api/tracks), falling
+  back to the track's own mirrors
+- With RADIO_PEER_PORT set (0 = any free port), share the cache with other
+  Pis on the LAN and download from them first (see peer_cache.py)
+
+Skip the current track with `kill -USR1 <pid>`.
 """
 
+import asyncio
 import os
-import sys
+import signal
 import time
 import subprocess
 import requests
 from pathlib import Path
-import random
-import json
+import threading
+
+from mirrors import selector, track_sources
+from scheduler import Scheduler, weights_from_env
+from telemetry import Telemetry
+from timesync import ClockSync
+import heartbeat
+import lazy
+import now_playing
+import profiling
 
 # --- Config ---
 SERVER_URL = os.getenv('RADIO_SERVER_URL', 'http://localhost:5000')
-CACHE_DIR = Path.home() / '.radio_cache'
+CACHE_DIR = Path(os.getenv('RADIO_CACHE_DIR', Path.home() / '.radio_cache'))
 CACHE_DIR.mkdir(exist_ok=True)
 NOW_PLAYING = CACHE_DIR / 'now_playing.json'
+PREFETCH = int(os.getenv('RADIO_PREFETCH', '2'))                  # tracks downloaded ahead
+REFRESH_INTERVAL = float(os.getenv('RADIO_REFRESH_SECONDS', '60'))  # catalog poll period
+WARM_NEW_TRACKS = 10    # newly added tracks downloaded right after a refresh
+EVENTS_RETRY = 10.0     # seconds before reconnecting to /api/events
+PEER_PORT = os.getenv('RADIO_PEER_PORT')    # unset: no peer sharing
+# Clients sharing a seed (and catalog) play the same rotation; default is per-run
+SCHEDULE_SEED = os.getenv('RADIO_SCHEDULE_SEED') or os.urandom(8).hex()
 
 print(f'[Config] Server: {SERVER_URL}')
 print(f'[Config] Cache: {CACHE_DIR}')
 
+# Server time (see timesync.py); the Pi's own clock may be seconds off
+clock = ClockSync(SERVER_URL)
+
+# Timing events, uploaded in batches to the server's /api/telemetry
+telemetry = Telemetry(SERVER_URL, clock=clock.now)
+
 # State
-playlist = []
-# order is a shuffled list of track indices
-order = []
-current_pos = 0
-is_playing = False
 player_process = None
+peers = None    # PeerCache when RADIO_PEER_PORT is set
+server_proxies = False  # the server caches remote tracks (X-Radio-Proxy-Cache)
+_download_locks = {}
+_download_locks_guard = threading.Lock()
+_mixer = None
+_mixer_lock = threading.Lock()
+
 
+def fetch_tracks(etag=None):
+    """
+    Fetch track list from Flask server.
 
-def fetch_tracks() -> list:
-    """Fetch track list from Flask server."""
+    Returns (tracks, etag). With `etag` from a previous call the request is
+    conditional: an unchanged catalog costs a 304 and returns (None, etag).
+    On error returns ([], etag). Also notes whether the server proxies
+    remote tracks, for download_audio.
+    """
+    global server_proxies
     try:
-        res = requests.get(f'{SERVER_URL}/api/tracks', timeout=5)
+        headers = {'If-None-Match': etag} if etag else {}
+        res = requests.get(f'{SERVER_URL}/api/tracks', headers=headers, timeout=5)
         res.raise_for_status()
+        server_proxies = res.headers.get('X-Radio-Proxy-Cache') == '1'
+        if res.status_code == 304:
+            return None, etag
         tracks = res.json()
         print(f'[Tracks] Loaded {len(tracks)} from server')
-        return tracks
+        return tracks, res.headers.get('ETag')
     except Exception as e:
         print(f'[Error] Failed to fetch tracks: {e}')
-        return []
+        return [], etag
+
 
+def listen_catalog_events(notify, stop):
+    """
+    Call notify() for every `catalog` event on the server's /api/events
+    stream until `stop` is set, reconnecting after errors. The stream opens
+    with the current version, so changes missed while disconnected are
+    caught up (the refresh it triggers is a 304 otherwise).
+    """
+    while not stop.is_set():
+        try:
+            # read timeout well above the server's 15 s keepalive
+            with requests.get(f'{SERVER_URL}/api/events', stream=True, timeout=(5, 60)) as res:
+                res.raise_for_status()
+                event = None
+                for line in res.iter_lines(decode_unicode=True):
+                    if stop.is_set():
+                        return
+                    if line.startswith('event:'):
+                        event = line[6:].strip()
+                    elif not line:
+                        if event == 'catalog':
+                            notify()
+                        event = None
+        except Exception as e:
+            print(f'[Events] Stream unavailable ({e}); polling every {REFRESH_INTERVAL:.0f}s')
+        stop.wait(EVENTS_RETRY)
+
+
+def download_audio(track_id: int, filename: str, sources=(), sha256=None, size=None) -> Path:
+    """
+    Download MP3 and cache locally.
 
-def download_audio(track_id: int, filename: str) -> Path:
-    """Download MP3 from server and cache locally."""
+    With peer sharing on, a LAN peer holding the same sha256 is tried first
+    (its copy is hash-checked). Otherwise tries the track's own mirrors
+    (fastest healthy host first, resuming with Range on failover) and falls
+    back to the Flask server, which serves local files or redirects. When
+    the server is a caching proxy it is asked first instead, so the Pis on
+    a LAN share one copy rather than each pulling it over the WAN.
+    """
     filepath = CACHE_DIR / filename
     
-    # Return if already cached
-    if filepath.exists():
-        return filepath
-    
-    print(f'[Download] {filename}...')
-    try:
-        audio_url = f'{SERVER_URL}/api/audio/{track_id}'
+    # One download per file at a time (prefetch and new-track warming overlap)
+    with _download_locks_guard:
+        lock = _download_locks.setdefault(filename, threading.Lock())
+    with lock:
+        # Return if already cached
+        if filepath.exists():
+            telemetry.emit('download', track=track_id, cache_hit=True)
+            return filepath
         
-        # Follow redirects (in case Flask redirects to remote URL)
-        res = requests.get(audio_url, timeout=30, allow_redirects=True)
-        res.raise_for_status()
-        
-        filepath.write_bytes(res.content)
-        print(f'[Cached] {filename}')
-        return filepath
-    except Exception as e:
-        print(f'[Error] Download failed: {e}')
+        print(f'[Download] {filename}...')
+        t0 = time.monotonic()
+        if peers and peers.fetch(sha256, filepath, on_progress=lambda _: heartbeat.beat()):
+            telemetry.emit('download', track=track_id, cache_hit=False, peer=True,
+                           bytes=filepath.stat().st_size, seconds=round(time.monotonic() - t0, 3))
+            print(f'[Cached] {filename} (from a peer)')
+            peers.add(sha256, filename)
+            return filepath
+        server = [f'{SERVER_URL}/api/audio/{track_id}']
+        # rank() orders within one call, so the proxy gets a call of its own;
+        # a later call resumes from the partial file
+        attempts = [server, list(sources)] if server_proxies and sources else [list(sources) + server]
+        if any(selector.download(urls, filepath, on_progress=lambda _: heartbeat.beat(), size=size)
+               for urls in attempts):
+            telemetry.emit('download', track=track_id, cache_hit=False,
+                           bytes=filepath.stat().st_size, seconds=round(time.monotonic() - t0, 3))
+            print(f'[Cached] {filename}')
+            if peers:
+                peers.add(sha256, filename)
+            return filepath
+        print(f'[Error] Download failed: no mirror could serve {filename}')
         return None
 
 
-def play_audio_file(filepath: Path, title: str):
-    """Play cached MP3 file using pygame or mpg123."""
-    global player_process, is_playing
-    
-    # Stop current playback
-    if player_process:
-        try:
-            player_process.terminate()
-            player_process.wait(timeout=2)
-        except Exception:
-            try:
-                player_process.kill()
-            except Exception:
-                pass
-        player_process = None
+def mixer():
+    """
+    Return pygame with its mixer initialised, or None if unavailable.
+
+    pygame is imported and the mixer opened once per process; main() calls
+    this from a background thread at startup so the first track does not
+    wait for it.
+    """
+    global _mixer
+    with _mixer_lock:
+        if _mixer is None:
+            pygame = lazy.optional('pygame')
+            _mixer = False
+            if pygame:
+                try:
+                    pygame.mixer.init()
+                    _mixer = pygame
+                except Exception as e:
+                    print(f'[pygame error] {e}')
+        return _mixer or None
+
+
+def gain_scale(gain):
+    """Linear factor for a build.py `gain` in dB (1.0 when the track has none)."""
+    return 10 ** (gain / 20) if gain else 1.0
+
+
+def mpg123_frames(seconds, sample_rate):
+    """MPEG frames covering `seconds` (1152 samples per frame, 576 for MPEG-2/2.5 rates)."""
+    rate = sample_rate or 44100
+    return int(seconds * rate / (1152 if rate >= 32000 else 576))
+
+
+async def play_audio_file(filepath: Path, title: str, skip: asyncio.Event, on_start=None, gain=None,
+                          trim_start=None, trim_end=None, sample_rate=None):
+    """
+    Play cached MP3 file using pygame or mpg123 until it ends or `skip` is set.
+
+    `gain` (dB, from build.py's loudness analysis) is applied as the output
+    volume, so levels match across tracks without any DSP here. pygame can
+    only attenuate; mpg123's output scale can also boost.
+    `trim_start`/`trim_end` (seconds into the file, from build.py's gapless
+    analysis) skip the encoder delay and leading silence and stop before
+    trailing silence; mpg123 can only seek to whole frames.
+    on_start, if given, is called once audio output has actually begun.
+    Returns 'finished', 'skipped' or 'failed'. Cancelling the coroutine
+    stops playback.
+    """
+    global player_process
     
-    is_playing = True
     print(f'[Playing] {title}')
+    length = trim_end - (trim_start or 0) if trim_end else None
+    deadline = None
     
     # Try pygame first (if available)
-    try:
-        import pygame
-        pygame.mixer.init()
-        pygame.mixer.music.load(str(filepath))
-        pygame.mixer.music.play()
-        
-        # Wait for playback
-        while pygame.mixer.music.get_busy():
-            time.sleep(0.1)
-        is_playing = False
-        print(f'[Finished] {title}')
-        return True
-    except ImportError:
-        pass  # Fall through to mpg123
-    except Exception as e:
-        print(f'[pygame error] {e}')
+    pygame = await asyncio.to_thread(mixer)
+    if pygame:
+        try:
+            pygame.mixer.music.load(str(filepath))
+            pygame.mixer.music.set_volume(min(1.0, gain_scale(gain)))
+            pygame.mixer.music.play(start=trim_start or 0.0)
+        except Exception as e:
+            print(f'[pygame error] {e}')  # Fall through to mpg123
+        else:
+            if on_start:
+                on_start()
+            if length:
+                deadline = time.monotonic() + length
+            try:
+                # Without a display pygame has no end-of-track callback, so
+                # check get_busy() (and the trim deadline) between waits on
+                # the skip event
+                while pygame.mixer.music.get_busy():
+                    remaining = deadline - time.monotonic() if deadline else 0.25
+                    if remaining <= 0:
+                        pygame.mixer.music.stop()
+                        break
+                    try:
+                        await asyncio.wait_for(skip.wait(), min(0.25, remaining))
+                    except asyncio.TimeoutError:
+                        continue
+                    pygame.mixer.music.stop()
+                    print(f'[Skipped] {title}')
+                    return 'skipped'
+            except asyncio.CancelledError:
+                pygame.mixer.music.stop()
+                raise
+            print(f'[Finished] {title}')
+            return 'finished'
     
     # Fallback to mpg123 CLI
     try:
-        player_process = subprocess.Popen(
-            ['mpg123', str(filepath)],
+        proc = player_process = await asyncio.create_subprocess_exec(
+            # -f: output scale, 32768 = unity; -k: frames to skip (the
+            # trim replaces mpg123's own gapless handling)
+            'mpg123', '-f', str(round(32768 * gain_scale(gain))),
+            *(['--no-gapless', '-k', str(mpg123_frames(trim_start, sample_rate))] if trim_start else []),
+            str(filepath),
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL
         )
-        player_process.wait()
-        is_playing = False
-        print(f'[Finished] {title}')
-        return True
     except FileNotFoundError:
         print('[Error] Neither pygame nor mpg123 available.')
         print('  Windows: pip install pygame')
         print('  Pi: sudo apt-get install mpg123')
-        is_playing = False
-        return False
+        return 'failed'
+    if on_start:
+        on_start()
+    ended = asyncio.ensure_future(proc.wait())
+    skipped = asyncio.ensure_future(skip.wait())
+    try:
+        await asyncio.wait({ended, skipped}, timeout=length, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        skipped.cancel()
+        if proc.returncode is None:
+            proc.terminate()
+            await ended
+        player_process = None
+    if skip.is_set():
+        print(f'[Skipped] {title}')
+        return 'skipped'
+    print(f'[Finished] {title}')
+    return 'finished'
+
+
+class RadioClient:
+    """
+    The client as concurrent asyncio tasks:
+
+    prefetch   walks the shuffled order, downloading up to PREFETCH tracks
+               ahead of the player (blocking I/O runs in worker threads)
+    player     plays queued tracks back to back; SIGUSR1 skips instantly
+    state      writes now-playing state without blocking the player
+    refresh    polls the catalog every REFRESH_INTERVAL seconds (304 when
+               unchanged), or at once on a /api/events `catalog` event, and
+               merges additions into the remaining shuffle
+    keepalive  supervisor heartbeat, which stops if the event loop stalls
+    """
+
+    def __init__(self, tracks, etag=None):
+        self.playlist = tracks
+        self.etag = etag
+        self.scheduler = Scheduler(tracks, seed=SCHEDULE_SEED, weights=weights_from_env())
+        self.queue = asyncio.Queue(maxsize=PREFETCH)
+        self.skip = asyncio.Event()
+        self.state = None
+        self.state_changed = asyncio.Event()
+        self.catalog_changed = asyncio.Event()
+        self.background = set()
+
+    async def run(self):
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, self.skip.set)
+        except (AttributeError, NotImplementedError, RuntimeError, ValueError):
+            pass  # Windows, or not the main thread (radio_player.py --single-process)
+        loop = asyncio.get_running_loop()
+        events_stop = threading.Event()
+        threading.Thread(target=listen_catalog_events, name='catalog-events', daemon=True,
+                         args=(lambda: loop.call_soon_threadsafe(self.catalog_changed.set),
+                               events_stop)).start()
+        tasks = [
+            asyncio.create_task(self.prefetch(), name='prefetch'),
+            asyncio.create_task(self.player(), name='player'),
+            asyncio.create_task(self.write_state(), name='state'),
+            asyncio.create_task(self.refresh(), name='refresh'),
+            asyncio.create_task(self.keepalive(), name='keepalive'),
+        ]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                task.result()
+        finally:
+            events_stop.set()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def next_track(self):
+        """Next (index, track) from the scheduler (artist/curator spacing, weighted cycles)."""
+        if self.scheduler.picks and not self.scheduler.remaining():
+            print('[Shuffle] Playlist finished; starting a new cycle...')
+        index = self.scheduler.next()
+        return index, self.playlist[index]
+
+    async def prefetch(self):
+        while True:
+            index, track = self.next_track()
+            file_url = track.get('file', '')
+            # Extract filename from URL
+            filename = file_url.split('/')[-1] if '/' in file_url else file_url
+            filepath = await asyncio.to_thread(download_audio, index, filename, track_sources(track),
+                                               track.get('sha256'), track.get('size'))
+            if filepath is None:
+                # Download failed; skip and move to next
+                print(f'[Skip] {track.get("title", "Unknown")}')
+                telemetry.emit('skip', track=index, reason='download_failed')
+                await asyncio.sleep(1)
+                continue
+            await self.queue.put((index, track, filepath))
+
+    async def player(self):
+        last_end = None
+        while True:
+            index, track, filepath = await self.queue.get()
+            title = track.get('title', 'Unknown')
+            print(f'[Track] #{index + 1} {title}')
+            selected_at = time.monotonic()
+            self.publish({
+                'track_index': index,
+                'title': title,
+                'file': track.get('file', ''),
+                'cover': track.get('cover', ''),
+                'selectedBy': track.get('selectedBy', ''),
+                'start_time': int(clock.now()),
+                # server time minus this host's, so readers can age start_time
+                # with time.time() without inheriting the Pi's clock skew
+                'clock_offset': round(clock.offset, 3),
+            })
+            
+            def on_start():
+                now = time.monotonic()
+                telemetry.emit('play_start', track=index, ttfa=round(now - selected_at, 3))
+                heartbeat.ready('Radio', 'first audio')
+                if last_end is not None:
+                    telemetry.emit('gap', seconds=round(now - last_end, 3))
+            
+            self.skip.clear()
+            started_at = time.monotonic()
+            result = await play_audio_file(filepath, title, self.skip, on_start=on_start,
+                                           gain=track.get('gain'), trim_start=track.get('trimStart'),
+                                           trim_end=track.get('trimEnd'),
+                                           sample_rate=track.get('sampleRate'))
+            last_end = time.monotonic()
+            if result == 'finished':
+                telemetry.emit('play_end', track=index, seconds=round(last_end - started_at, 3))
+            elif result == 'skipped':
+                telemetry.emit('skip', track=index, reason='user')
+            else:
+                # Playback failed; back off before trying the next track
+                telemetry.emit('play_error', track=index)
+                await asyncio.sleep(2)
+
+    def publish(self, state):
+        self.state = state
+        self.state_changed.set()
+
+    async def write_state(self):
+        """Write the latest now-playing state so the display can pick it up."""
+        while True:
+            await self.state_changed.wait()
+            self.state_changed.clear()
+            try:
+                await asyncio.to_thread(now_playing.publish, NOW_PLAYING, self.state)
+            except Exception as e:
+                print(f'[Warning] Failed to write now playing state: {e}')
+
+    async def refresh(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.catalog_changed.wait(), REFRESH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self.catalog_changed.clear()
+            tracks, self.etag = await asyncio.to_thread(fetch_tracks, self.etag)
+            if tracks:
+                self.apply_catalog(tracks)
+
+    def apply_catalog(self, tracks):
+        """Swap in a new catalog, keeping the shuffle position; warms new tracks."""
+        before = len(self.scheduler)
+        added = self.scheduler.update(tracks)
+        self.playlist = tracks
+        removed = before + len(added) - len(tracks)
+        print(f'[Tracks] Catalog updated: +{len(added)} new, -{removed} removed, '
+              f'{self.scheduler.remaining()} left this cycle')
+        if added:
+            task = asyncio.create_task(self.warm(added[:WARM_NEW_TRACKS]), name='warm')
+            self.background.add(task)
+            task.add_done_callback(self.background.discard)
+
+    async def warm(self, indices):
+        """Download newly added tracks in the background (cached ones are skipped)."""
+        tracks = self.playlist
+        for index in indices:
+            track = tracks[index]
+            file_url = track.get('file', '')
+            filename = file_url.split('/')[-1] if '/' in file_url else file_url
+            await asyncio.to_thread(download_audio, index, filename, track_sources(track),
+                                    track.get('sha256'), track.get('size'))
+
+    async def keepalive(self):
+        while True:
+            heartbeat.beat()
+            await asyncio.sleep(heartbeat.INTERVAL)
 
 
 def main():
-    """Main loop: load tracks and play sequentially."""
-    global playlist, current_index, is_playing
-    
+    """Load tracks, then run the client tasks until interrupted."""
     print('[Radio] Client started')
     print('[Radio] Press Ctrl+C to stop\n')
     
-    # Load tracks once at startup
-    playlist = fetch_tracks()
+    # Open the audio device while the track list and first file download
+    threading.Thread(target=mixer, name='mixer-init', daemon=True).start()
+    
+    # Load tracks at startup; the refresh task keeps them current
+    playlist, etag = fetch_tracks()
     if not playlist:
         print('[Error] No tracks loaded. Is Flask server running?')
         print(f'[Info] Check: {SERVER_URL}/health')
         return
 
-    # Create shuffled play order
-    order = list(range(len(playlist)))
-    random.shuffle(order)
-    current_pos = 0
-    
-    try:
-        while True:
-            if is_playing:
-                # Wait for current playback to finish
-                time.sleep(0.5)
-                continue
-            
-            if current_pos < len(order):
-                # Determine next track index from shuffled order
-                track_index = order[current_pos]
-                track = playlist[track_index]
-                title = track.get('title', 'Unknown')
-                file_url = track.get('file', '')
-
-                # Extract filename from URL
-                filename = file_url.split('/')[-1] if '/' in file_url else file_url
-
-                print(f'[Track {current_pos + 1}/{len(playlist)}] #{track_index + 1} {title}')
+    global peers
+    if PEER_PORT is not None:
+        from peer_cache import PeerCache
+        peers = PeerCache(CACHE_DIR, SERVER_URL, port=int(PEER_PORT),
+                          advertise_host=os.getenv('RADIO_PEER_HOST')).start(playlist)
 
-                # Download to cache (use original track index for server API)
-                filepath = download_audio(track_index, filename)
-                # Write now playing state to disk so display can pick it up
-                try:
-                    now_state = {
-                        'track_index': track_index,
-                        'title': title,
-                        'file': file_url,
-                        'cover': track.get('cover', ''),
-                        'selectedBy': track.get('selectedBy', ''),
-                        'start_time': int(time.time())
-                    }
-                    NOW_PLAYING.write_text(json.dumps(now_state))
-                except Exception as e:
-                    print(f'[Warning] Failed to write now playing state: {e}')
-                if filepath:
-                    # Play cached file
-                    success = play_audio_file(filepath, title)
-                    if success:
-                        # Update start_time after successful play (best-effort)
-                        try:
-                            now_state['start_time'] = int(time.time())
-                            NOW_PLAYING.write_text(json.dumps(now_state))
-                        except Exception:
-                            pass
-                        current_pos += 1
-                    else:
-                        # Playback failed; wait and retry
-                        time.sleep(2)
-                else:
-                    # Download failed; skip and move to next
-                    print(f'[Skip] {title}')
-                    current_pos += 1
-                    time.sleep(1)
-            else:
-                # Reached end of shuffled order: reshuffle and continue
-                print('[Shuffle] Playlist finished; reshuffling...')
-                order = list(range(len(playlist)))
-                random.shuffle(order)
-                current_pos = 0
-                time.sleep(1)
-    
+    clock.start()
+    telemetry.start()
+    try:
+        asyncio.run(RadioClient(playlist, etag).run())
     except KeyboardInterrupt:
         print('\n[Radio] Shutting down...')
-        if player_process:
-            try:
-                player_process.terminate()
-            except Exception:
-                pass
+        stop()
+
+
+def stop():
+    """Flush telemetry and silence playback (also used by single-process mode)."""
+    clock.stop()
+    telemetry.stop()
+    if peers:
+        peers.stop()
+    if player_process:
+        try:
+            player_process.terminate()
+        except Exception:
+            pass
+    if _mixer:
+        _mixer.mixer.music.stop()
 
 
 if __name__ == '__main__':
+    profiling.start_from_env('client')
     main()
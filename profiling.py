@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Opt-in sampling profiler for the radio entry points.
+
+Enable with RADIO_PROFILE=1 (or a directory path) or the --profile flag.
+A background thread samples every thread's stack via sys._current_frames()
+every few milliseconds; nothing is instrumented, so the cost is the same
+whether the program is idle or busy. On exit two files are written to the
+profile directory (default ~/.radio_cache/profiles):
+
+    <name>-<pid>.collapsed   one "frame;frame;frame count" line per stack,
+                             for flamegraph.pl, speedscope or inferno
+    <name>-<pid>.top.txt     per-function self/total sample counts
+
+server.py additionally profiles single requests that carry an
+`X-Radio-Profile: 1` header when RADIO_PROFILE_REQUESTS=1.
+"""
+
+import atexit
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+DEFAULT_INTERVAL = 0.005
+DEFAULT_DIR = Path.home() / '.radio_cache' / 'profiles'
+
+
+def _frame_label(code):
+    return f'{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})'
+
+
+class SamplingProfiler:
+    """Collects stack samples from all threads (or only `thread_ids`)."""
+
+    def __init__(self, interval=DEFAULT_INTERVAL, thread_ids=None):
+        self.interval = interval
+        self.thread_ids = thread_ids
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._labels = {}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        labels = self._labels
+        while not self._stop.wait(self.interval):
+            for tid, frame in sys._current_frames().items():
+                if tid == own or (self.thread_ids is not None and tid not in self.thread_ids):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = _frame_label(code)
+                    stack.append(label)
+                    frame = frame.f_back
+                stack.reverse()
+                self.stacks[tuple(stack)] += 1
+            self.samples += 1
+
+    def hot_spots(self, limit=40):
+        """[(function, self_samples, total_samples)] sorted by self time."""
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for label in set(stack):
+                total[label] += count
+        return [(label, n, total[label]) for label, n in own.most_common(limit)]
+
+    def write(self, base):
+        """Write <base>.collapsed and <base>.top.txt; returns the collapsed path."""
+        base = Path(base)
+        base.parent.mkdir(parents=True, exist_ok=True)
+        collapsed = base.with_name(base.name + '.collapsed')
+        with open(collapsed, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(';'.join(stack) + f' {count}\n')
+        total = sum(self.stacks.values()) or 1
+        with open(base.with_name(base.name + '.top.txt'), 'w') as f:
+            f.write(f'{self.samples} sampling passes every {self.interval * 1000:.1f} ms, '
+                    f'{total} thread samples\n\n')
+            f.write(f'{"self%":>7} {"total%":>7}  function\n')
+            for label, own, incl in self.hot_spots():
+                f.write(f'{own / total * 100:7.1f} {incl / total * 100:7.1f}  {label}\n')
+        return collapsed
+
+
+def profile_dir():
+    value = os.getenv('RADIO_PROFILE', '')
+    if value and value not in ('0', '1'):
+        return Path(value)
+    return DEFAULT_DIR
+
+
+def enabled():
+    return '--profile' in sys.argv or os.getenv('RADIO_PROFILE', '0') not in ('', '0')
+
+
+def start_from_env(name):
+    """
+    Start a process-wide profiler if RADIO_PROFILE / --profile is set.
+
+    Results are written at interpreter exit (including SIGTERM, which is
+    turned into SystemExit so atexit handlers run). Returns the profiler or
+    None.
+    """
+    if not enabled():
+        return None
+    if '--profile' in sys.argv:
+        sys.argv.remove('--profile')
+        os.environ.setdefault('RADIO_PROFILE', '1')   # child processes inherit it
+    profiler = SamplingProfiler().start()
+    base = profile_dir() / f'{name}-{os.getpid()}'
+
+    def finish():
+        profiler.stop()
+        path = profiler.write(base)
+        print(f'[Profile] {profiler.samples} samples written to {path}')
+
+    atexit.register(finish)
+    if threading.current_thread() is threading.main_thread():
+        if signal.getsignal(signal.SIGTERM) in (signal.SIG_DFL, None):
+            signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(f'[Profile] Sampling {name} every {profiler.interval * 1000:.0f} ms')
+    return profiler
+
+
+def install_flask_hooks(app, header='X-Radio-Profile'):
+    """Profile individual requests that send `<header>: 1`."""
+    from flask import g, request
+
+    @app.before_request
+    def _profile_request_start():
+        if request.headers.get(header) == '1':
+            g.request_profiler = SamplingProfiler(
+                interval=0.001, thread_ids={threading.get_ident()}).start()
+
+    @app.after_request
+    def _profile_request_finish(response):
+        profiler = g.pop('request_profiler', None)
+        if profiler is not None:
+            profiler.stop()
+            route = (request.url_rule.rule if request.url_rule else 'unmatched').strip('/')
+            slug = ''.join(c if c.isalnum() else '_' for c in route) or 'root'
+            path = profiler.write(profile_dir() / f'request-{slug}-{int(time.time() * 1000)}')
+            response.headers[f'{header}-File'] = str(path)
+        return response
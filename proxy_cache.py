@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Disk cache for remote tracks proxied by server.py.
+
+The first request for a track starts one background fetch (via
+mirrors.selector, so it gets mirror failover too) into <key>.mp3.part.
+Every request that arrives while the fetch is running — including the
+first — tails that partial file as it grows, so concurrent misses share a
+single upstream download. Once complete the file is renamed into place and
+later requests are plain disk hits.
+
+Completed files are tracked in LRU order and the oldest are deleted once
+the cache exceeds max_bytes.
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from mirrors import selector as default_selector
+
+logger = logging.getLogger(__name__)
+
+CHUNK = 64 * 1024
+FIRST_BYTE_TIMEOUT = 15.0
+
+
+def cache_key(track):
+    """Stable cache key: the content hash from build.py, else a hash of the URL."""
+    if track.get('sha256'):
+        return track['sha256']
+    return hashlib.sha1(track.get('file', '').encode('utf-8')).hexdigest()
+
+
+class _Fill:
+    """State of one in-flight upstream fetch, shared by every reader."""
+
+    def __init__(self, part, dest):
+        self.part = part
+        self.dest = dest
+        self.cond = threading.Condition()
+        self.written = 0
+        self.done = False
+        self.failed = False
+
+    def progress(self, nbytes):
+        with self.cond:
+            if nbytes < self.written:
+                # mirror ignored Range and restarted the file; readers can't follow
+                self.failed = True
+            self.written = nbytes
+            self.cond.notify_all()
+
+    def finish(self, ok):
+        with self.cond:
+            self.done = True
+            self.failed = self.failed or not ok
+            self.cond.notify_all()
+
+    def wait_first_byte(self, timeout):
+        with self.cond:
+            self.cond.wait_for(lambda: self.written > 0 or self.done, timeout)
+            return self.written > 0 and not self.failed
+
+
+class ProxyCache:
+    def __init__(self, cache_dir, max_bytes, selector=default_selector):
+        self.dir = Path(cache_dir)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.selector = selector
+        self._lock = threading.Lock()
+        self._lru = OrderedDict()   # key -> size, oldest first
+        self._size = 0
+        self._fills = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+        for part in self.dir.glob('*.part'):
+            part.unlink()
+        files = sorted(self.dir.glob('*.mp3'), key=lambda p: p.stat().st_atime)
+        for path in files:
+            size = path.stat().st_size
+            self._lru[path.stem] = size
+            self._size += size
+        logger.info(f'Proxy cache: {len(self._lru)} files, {self._size / 1e6:.1f} MB in {self.dir}')
+
+    def path_for(self, key):
+        return self.dir / f'{key}.mp3'
+
+    def get(self, key, urls):
+        """
+        Return ('hit', path) for a cached file, ('stream', iterator) while a
+        fetch is running, or (None, None) if the upstream fetch failed before
+        producing any bytes.
+        """
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return 'hit', self.path_for(key)
+            fill = self._fills.get(key)
+            if fill is None:
+                self.misses += 1
+                dest = self.path_for(key)
+                fill = self._fills[key] = _Fill(dest.with_name(dest.name + '.part'), dest)
+                threading.Thread(target=self._fetch, args=(key, fill, list(urls)),
+                                 name=f'proxy-fill-{key[:8]}', daemon=True).start()
+            else:
+                self.coalesced += 1
+        if not fill.wait_first_byte(FIRST_BYTE_TIMEOUT):
+            return None, None
+        return 'stream', self._tail(fill)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'files': len(self._lru),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'in_flight': len(self._fills),
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+            }
+
+    def _fetch(self, key, fill, urls):
+        ok = False
+        try:
+            ok = self.selector.download(urls, fill.dest, on_progress=fill.progress) is not None
+        except Exception as e:
+            logger.error(f'Proxy fetch failed for {key}: {e}')
+        fill.finish(ok and not fill.failed)
+        with self._lock:
+            del self._fills[key]
+            if fill.done and not fill.failed and fill.dest.exists():
+                size = fill.dest.stat().st_size
+                self._lru[key] = size
+                self._size += size
+                self._evict()
+            else:
+                for leftover in (fill.part, fill.dest):
+                    if leftover.exists():
+                        leftover.unlink()
+
+    def _evict(self):
+        while self._size > self.max_bytes and len(self._lru) > 1:
+            key, size = self._lru.popitem(last=False)
+            self._size -= size
+            try:
+                self.path_for(key).unlink()
+            except OSError:
+                pass
+            logger.info(f'Proxy cache evicted {key} ({size / 1e6:.1f} MB)')
+
+    def _tail(self, fill):
+        """Yield the file as it is written, ending when the fetch completes."""
+        sent = 0
+        f = None
+        try:
+            while True:
+                with fill.cond:
+                    fill.cond.wait_for(lambda: fill.written > sent or fill.done)
+                    written, done, failed = fill.written, fill.done, fill.failed
+                if failed:
+                    logger.warning(f'Upstream fetch for {fill.dest.name} failed mid-stream')
+                    return
+                if written > sent:
+                    if f is None:
+                        try:
+                            f = open(fill.part, 'rb')
+                        except FileNotFoundError:
+                            f = open(fill.dest, 'rb')  # renamed into place already
+                    f.seek(sent)
+                    while sent < written:
+                        chunk = f.read(min(CHUNK, written - sent))
+                        if not chunk:
+                            break
+                        sent += len(chunk)
+                        yield chunk
+                elif done:
+                    return
+        finally:
+            if f:
+                f.close()
@@ -4,10 +4,9 @@ import {
     getDatabase,
     ref,
     onValue,
-    get,
-    set,
-    update
+    get
 } from 'https://www.gstatic.com/firebasejs/12.6.0/firebase-database.js';
+import { Scheduler, parseWeights } from './scheduler.js';
 
 const audio = document.getElementById('audio');
 const titleEl = document.getElementById('title');
@@ -18,8 +17,21 @@ const statusEl = document.getElementById('status');
 
 let playlist = [];
 let currentIndex = 0;
+let scheduler = null;
+
+// Local-mode rotation (scheduler.js). ?seed=... makes it reproducible and
+// identical to a Pi client started with the same RADIO_SCHEDULE_SEED;
+// ?weights=alice=3,bob=1 weights curators like RADIO_CURATOR_WEIGHTS.
+const params = new URLSearchParams(window.location.search);
+const scheduleSeed = params.get('seed') || Math.random().toString(36).slice(2);
+const curatorWeights = parseWeights(params.get('weights') || '');
 let db = null;
 let isSynced = false;
+let serverTimeOffset = 0;  // ms, from Firebase .info/serverTimeOffset
+
+function serverNow() {
+    return Date.now() + serverTimeOffset;
+}
 
 // Base raw URL for this project's GitHub Pages repository (used as a fallback
 // when the `file` or `cover` fields are local paths like `music/...`). This
@@ -94,31 +106,77 @@ function setupFirebaseSync() {
         }
     });
 
+    // Browser clocks can be off by seconds; Firebase measures the offset to
+    // its servers, and the station clock that writes startTime is NTP-synced
+    onValue(ref(db, '.info/serverTimeOffset'), (snapshot) => {
+        serverTimeOffset = snapshot.val() || 0;
+    });
+
     // Listen for playback state changes
     const stateRef = ref(db, 'radio/state');
     onValue(stateRef, (snapshot) => {
         const state = snapshot.val();
         if (state) {
             currentIndex = state.currentTrackIndex || 0;
-            const elapsedSeconds = (Date.now() - (state.startTime || Date.now())) / 1000;
+            // The station clock publishes the track itself; prefer it over the index
+            if (state.track) playlist[currentIndex] = normalizeTrackUrls(state.track);
+            const elapsedSeconds = (serverNow() - (state.startTime || serverNow())) / 1000;
             syncPlayback(elapsedSeconds);
             setStatus('Synced — Live', 'status-sync');
         }
     });
 }
 
+// Loudness gain from build.py (dB) as the element volume, so tracks play at
+// matching levels without Web Audio processing. Volume can't exceed 1, so
+// quiet tracks are left as they are rather than boosted.
+function applyGain(track) {
+    audio.volume = track.gain ? Math.min(1, Math.pow(10, track.gain / 20)) : 1;
+}
+
+// Gapless trim points from build.py: playback starts at trimStart and the
+// track counts as ended at trimEnd, skipping encoder padding and dead air.
+// trimDone makes that happen once per load: the element is paused, and no
+// later timeupdate may dispatch another ended.
+let trimTimer = null;
+let trimDone = false;
+
+function loadTrack(track) {
+    clearTimeout(trimTimer);
+    trimTimer = null;
+    trimDone = false;
+    normalizeTrackUrls(track);
+    audio.src = track.file;
+    applyGain(track);
+    audio.currentTime = track.trimStart || 0;  // kept as the start position until metadata loads
+}
+
+audio.addEventListener('timeupdate', () => {
+    const track = playlist[currentIndex];
+    if (!track || !track.trimEnd || trimTimer || trimDone) return;
+    // timeupdate fires every ~250ms; finish the last stretch on a timer
+    const remaining = track.trimEnd - audio.currentTime;
+    if (remaining < 0.5) {
+        trimTimer = setTimeout(() => {
+            trimTimer = null;
+            trimDone = true;
+            audio.pause();
+            audio.dispatchEvent(new Event('ended'));
+        }, Math.max(0, remaining * 1000 / audio.playbackRate));
+    }
+});
+
 // --- Sync playback to Firebase time ---
 function syncPlayback(elapsedSeconds) {
     const track = playlist[currentIndex];
     if (!track) return;
 
-    // Ensure track URLs are usable
-    normalizeTrackUrls(track);
-    audio.src = track.file;
+    loadTrack(track);
 
     const playAudio = () => {
-        // If duration is available, clamp; otherwise try to set currentTime anyway
-        const clamped = Math.max(0, Math.min(elapsedSeconds, audio.duration || elapsedSeconds));
+        // Station time runs from trimStart; clamp if duration is available
+        const position = (track.trimStart || 0) + elapsedSeconds;
+        const clamped = Math.max(0, Math.min(position, audio.duration || position));
         audio.currentTime = clamped;
         audio.play().catch(handleAutoplayBlocked);
         updateDisplay(track);
@@ -153,30 +211,21 @@ function loadTracksLocally() {
         .then(res => res.json())
         .then(tracks => {
             // Normalize relative paths that may still be present in tracks.json
-            playlist = shuffle(tracks.map(normalizeTrackUrls));
-            currentIndex = 0;
+            playlist = tracks.map(normalizeTrackUrls);
+            scheduler = new Scheduler(playlist, { seed: scheduleSeed, weights: curatorWeights });
+            currentIndex = scheduler.next();
             setStatus('Local mode', 'status-offline');
             playSongLocally();
         })
         .catch(e => console.error('Failed to load tracks.json:', e));
 }
 
-// --- Shuffle function ---
-function shuffle(list) {
-    for (let i = list.length - 1; i > 0; i--) {
-        const j = Math.floor(Math.random() * (i + 1));
-        [list[i], list[j]] = [list[j], list[i]];
-    }
-    return list;
-}
-
 // --- Local playback (fallback) ---
 function playSongLocally() {
     const track = playlist[currentIndex];
     if (!track) return;
 
-    normalizeTrackUrls(track);
-    audio.src = track.file;
+    loadTrack(track);
     audio.play().catch(handleAutoplayBlocked);
     updateDisplay(track);
 }
@@ -216,20 +265,13 @@ function handleAutoplayBlocked(err) {
 }
 
 // --- Move to next song ---
-audio.addEventListener('ended', async () => {
+// In synced mode the station clock (station.py) advances radio/state; listeners
+// only read it, so the next track arrives through the onValue handler above.
+audio.addEventListener('ended', () => {
     if (isSynced && db) {
-        currentIndex = (currentIndex + 1) % playlist.length;
-        try {
-            await update(ref(db, 'radio/state'), {
-                currentTrackIndex: currentIndex,
-                startTime: Date.now(),
-                lastUpdated: new Date().toISOString()
-            });
-        } catch (err) {
-            console.error('Failed to update Firebase state on ended:', err);
-        }
+        setStatus('Synced — waiting for next track', 'status-sync');
     } else {
-        currentIndex = (currentIndex + 1) % playlist.length;
+        currentIndex = scheduler ? scheduler.next() : (currentIndex + 1) % playlist.length;
         playSongLocally();
     }
 });
@@ -249,7 +291,7 @@ async function forceFirebaseSync() {
         const state = snapshot.val();
         if (state && playlist.length > 0) {
             currentIndex = state.currentTrackIndex || 0;
-            const elapsedSeconds = (Date.now() - (state.startTime || Date.now())) / 1000;
+            const elapsedSeconds = (serverNow() - (state.startTime || serverNow())) / 1000;
             syncPlayback(elapsedSeconds);
             console.log('Force synced to', currentIndex);
         } else {
@@ -17,13 +17,12 @@ Requirements:
   sudo apt-get install ffmpeg   # for pydub to read MP3s (optional)
 
 Run:
-  python radio_display.py
+  python radio_display.py [--profile]
 
 Press Ctrl+C to exit.
 """
 
 import time
-import json
 import os
 import math
 from pathlib import Path
@@ -38,23 +37,32 @@ from rich.table import Table
 from rich.layout import Layout
 from rich.columns import Columns
 
-# Optional imports for audio analysis
-HAS_PYDUB = False
-HAS_NUMPY = False
-try:
-    from pydub import AudioSegment
-    HAS_PYDUB = True
-except Exception:
-    HAS_PYDUB = False
-
-try:
-    import numpy as np
-    HAS_NUMPY = True
-except Exception:
-    HAS_NUMPY = False
+import heartbeat
+import profiling
+
+import now_playing
+
+# Optional audio analysis libraries, imported on first use: they are only
+# needed once a cached file is playing, and numpy alone costs ~100 ms and
+# several MB on a Pi Zero.
+_audio_libs = None
+
+
+def audio_libs():
+    """Return (AudioSegment, numpy), or None if either is unavailable."""
+    global _audio_libs
+    if _audio_libs is None:
+        try:
+            from pydub import AudioSegment
+            import numpy
+            _audio_libs = (AudioSegment, numpy)
+        except Exception:
+            _audio_libs = False
+    return _audio_libs or None
+
 
 # Config
-CACHE_DIR = Path.home() / '.radio_cache'
+CACHE_DIR = Path(os.getenv('RADIO_CACHE_DIR', Path.home() / '.radio_cache'))
 NOW_PLAYING_FILE = CACHE_DIR / 'now_playing.json'
 
 console = Console()
@@ -62,10 +70,11 @@ console = Console()
 
 def load_segment_for_file(filepath: Path):
     """Load full audio file via pydub if available."""
-    if not HAS_PYDUB:
+    libs = audio_libs()
+    if not libs:
         return None
     try:
-        return AudioSegment.from_file(str(filepath))
+        return libs[0].from_file(str(filepath))
     except Exception as e:
         console.log(f'[yellow]pydub failed to load {filepath}: {e}[/yellow]')
         return None
@@ -73,8 +82,10 @@ def load_segment_for_file(filepath: Path):
 
 def rms_from_segment(seg, start_ms: int, window_ms: int = 100):
     """Return RMS value (0-1) for a short window starting at start_ms."""
-    if not HAS_PYDUB or not HAS_NUMPY or seg is None:
+    libs = audio_libs()
+    if not libs or seg is None:
         return 0.0
+    np = libs[1]
     if start_ms < 0:
         start_ms = 0
     end_ms = min(len(seg), start_ms + window_ms)
@@ -128,11 +139,90 @@ def build_visual_waveform(amplitudes, width=50):
     return '\n'.join(lines)
 
 
+def compute_amplitudes(loaded_seg, elapsed, windows=200, total_span_ms=2000):
+    """RMS levels for the next `total_span_ms` of audio, or animated pulse bars."""
+    if loaded_seg is not None and elapsed is not None:
+        pos_ms = int(elapsed * 1000)
+        step = max(1, total_span_ms // windows)
+        return [
+            min(max(rms_from_segment(loaded_seg, pos_ms + i * step, window_ms=step), 0.0), 1.0)
+            for i in range(windows)
+        ]
+    # Fallback: animate bars based on time
+    t = time.time()
+    return [0.5 + 0.4 * math.sin(t * 2 + i * 0.1) for i in range(32)]
+
+
+def build_now_playing(title, selected_by, elapsed, amplitudes):
+    """Build the full now-playing layout for one frame."""
+    # Build visual waveform (vertical bars)
+    waveform_visual = build_visual_waveform(amplitudes, width=60)
+    
+    # Build horizontal bars
+    waveform_bars = build_waveform_bars(amplitudes, bar_count=60)
+    
+    # Create layout
+    layout = Layout()
+    layout.split_column(
+        Layout(name='title', size=5),
+        Layout(name='viz1', size=10),
+        Layout(name='bars', size=3),
+        Layout(name='info', size=4)
+    )
+    
+    # Title panel
+    title_text = Text(title, style='bold bright_cyan', justify='center')
+    layout['title'].update(Panel(
+        title_text,
+        box=ROUNDED,
+        border_style='bright_cyan',
+        padding=(1, 2)
+    ))
+    
+    # Waveform visualization with vertical bars
+    waveform_text = Text(waveform_visual, style='bold bright_green')
+    layout['viz1'].update(Panel(
+        waveform_text,
+        box=ROUNDED,
+        border_style='bright_green',
+        padding=(0, 1)
+    ))
+    
+    # Horizontal bar visualization
+    bars_text = Text(waveform_bars, style='bold green')
+    layout['bars'].update(Panel(
+        bars_text,
+        box=ROUNDED,
+        border_style='green'
+    ))
+    
+    # Info section
+    elapsed_str = f'{int(elapsed // 60):02d}:{int(elapsed % 60):02d}'
+    frames = ['▮ ', '▯ ', '▮ ']
+    frame = frames[int(time.time() * 2) % len(frames)]
+    
+    info_text = f'⏱ {elapsed_str}\n🎧 {selected_by}\n{frame}Playing'
+    info_display = Text(info_text, style='bold bright_yellow', justify='center')
+    layout['info'].update(Panel(
+        info_display,
+        box=ROUNDED,
+        border_style='bright_yellow'
+    ))
+    return layout
+
+
+def build_waiting():
+    """Animated placeholder shown until now_playing.json appears."""
+    frames = ['⠋', '⠙', '⠹', '⠸', '⠼', '⠴', '⠦', '⠧', '⠇', '⠏']
+    frame = frames[int(time.time() * 5) % len(frames)]
+    waiting_text = Text(f'{frame} Waiting for now_playing.json...', style='bold bright_yellow', justify='center')
+    return Panel(waiting_text, box=ROUNDED, border_style='bright_yellow', padding=(1, 2))
+
+
 def main():
     loaded_seg = None
     current_file = None
-    amplitudes = [0.0] * 200
-    last_state_mtime = 0
+    last_version = None
     
     console.print('[bold cyan]🎵 Radio TUI Display[/bold cyan]\n', justify='center')
 
@@ -140,125 +230,39 @@ def main():
         with Live(refresh_per_second=10) as live:
             while True:
                 elapsed = None
-                state = None
                 
-                # Read now_playing file if present
-                if NOW_PLAYING_FILE.exists():
+                # Current state: from memory in single-process mode, else the file
+                version, state = now_playing.read(NOW_PLAYING_FILE)
+                if state:
                     try:
-                        mtime = NOW_PLAYING_FILE.stat().st_mtime
-                        if mtime != last_state_mtime:
-                            last_state_mtime = mtime
-                            raw = NOW_PLAYING_FILE.read_text()
-                            state = json.loads(raw)
+                        if version != last_version:
+                            last_version = version
                             # Map to cached file path
                             file_url = state.get('file', '')
                             filename = file_url.split('/')[-1] if '/' in file_url else file_url
                             cached = CACHE_DIR / filename
-                            if cached.exists():
-                                if current_file != str(cached):
-                                    current_file = str(cached)
-                                    loaded_seg = None
-                                    if HAS_PYDUB:
-                                        loaded_seg = load_segment_for_file(cached)
-                        else:
-                            # Still read current state even if file unchanged
-                            raw = NOW_PLAYING_FILE.read_text()
-                            state = json.loads(raw)
+                            if cached.exists() and current_file != str(cached):
+                                current_file = str(cached)
+                                loaded_seg = load_segment_for_file(cached)
                         
-                        if state:
-                            start_time = state.get('start_time', int(time.time()))
-                            elapsed = int(time.time()) - int(start_time)
+                        # start_time is server time; clock_offset maps our clock onto it
+                        now = time.time() + float(state.get('clock_offset') or 0)
+                        elapsed = max(0, int(now - float(state.get('start_time', now))))
                     except Exception as e:
-                        pass  # Silent fail, display "waiting" message
+                        state = None  # Silent fail, display "waiting" message
                 
                 # Build display content
                 if state:
                     title = state.get('title', 'Unknown')
                     selected_by = state.get('selectedBy', 'Unknown')
-                    
-                    # Compute amplitudes from audio if available
-                    if HAS_PYDUB and HAS_NUMPY and loaded_seg is not None and elapsed is not None:
-                        pos_ms = int(elapsed * 1000)
-                        new_amps = []
-                        windows = 200
-                        total_span_ms = 2000
-                        step = max(1, total_span_ms // windows)
-                        for i in range(windows):
-                            ms = pos_ms + i * step
-                            a = rms_from_segment(loaded_seg, ms, window_ms=step)
-                            new_amps.append(min(max(a, 0.0), 1.0))
-                        amplitudes = new_amps
-                    else:
-                        # Fallback: animate bars based on time
-                        t = time.time()
-                        amplitudes = [
-                            0.5 + 0.4 * math.sin(t * 2 + i * 0.1)
-                            for i in range(32)
-                        ]
-                    
-                    # Build visual waveform (vertical bars)
-                    waveform_visual = build_visual_waveform(amplitudes, width=60)
-                    
-                    # Build horizontal bars
-                    waveform_bars = build_waveform_bars(amplitudes, bar_count=60)
-                    
-                    # Create layout
-                    layout = Layout()
-                    layout.split_column(
-                        Layout(name='title', size=5),
-                        Layout(name='viz1', size=10),
-                        Layout(name='bars', size=3),
-                        Layout(name='info', size=4)
-                    )
-                    
-                    # Title panel
-                    title_text = Text(title, style='bold bright_cyan', justify='center')
-                    layout['title'].update(Panel(
-                        title_text,
-                        box=ROUNDED,
-                        border_style='bright_cyan',
-                        padding=(1, 2)
-                    ))
-                    
-                    # Waveform visualization with vertical bars
-                    waveform_text = Text(waveform_visual, style='bold bright_green')
-                    layout['viz1'].update(Panel(
-                        waveform_text,
-                        box=ROUNDED,
-                        border_style='bright_green',
-                        padding=(0, 1)
-                    ))
-                    
-                    # Horizontal bar visualization
-                    bars_text = Text(waveform_bars, style='bold green')
-                    layout['bars'].update(Panel(
-                        bars_text,
-                        box=ROUNDED,
-                        border_style='green'
-                    ))
-                    
-                    # Info section
-                    elapsed_str = f'{int(elapsed // 60):02d}:{int(elapsed % 60):02d}'
-                    frames = ['▮ ', '▯ ', '▮ ']
-                    frame = frames[int(time.time() * 2) % len(frames)]
-                    
-                    info_text = f'⏱ {elapsed_str}\n🎧 {selected_by}\n{frame}Playing'
-                    info_display = Text(info_text, style='bold bright_yellow', justify='center')
-                    layout['info'].update(Panel(
-                        info_display,
-                        box=ROUNDED,
-                        border_style='bright_yellow'
-                    ))
-                    
-                    live.update(layout)
+                    amplitudes = compute_amplitudes(loaded_seg, elapsed)
+                    live.update(build_now_playing(title, selected_by, elapsed, amplitudes))
                 else:
                     # Waiting for tracks - animated
-                    frames = ['⠋', '⠙', '⠹', '⠸', '⠼', '⠴', '⠦', '⠧', '⠇', '⠏']
-                    frame = frames[int(time.time() * 5) % len(frames)]
-                    waiting_text = Text(f'{frame} Waiting for now_playing.json...', style='bold bright_yellow', justify='center')
-                    waiting_panel = Panel(waiting_text, box=ROUNDED, border_style='bright_yellow', padding=(1, 2))
-                    live.update(waiting_panel)
+                    live.update(build_waiting())
                 
+                heartbeat.ready('Display', 'first frame')
+                heartbeat.beat()
                 time.sleep(0.05)  # ~20 FPS, let Live handle refresh rate
 
     except KeyboardInterrupt:
@@ -266,4 +270,5 @@ def main():
 
 
 if __name__ == '__main__':
+    profiling.start_from_env('display')
     main()
@@ -1,86 +1,285 @@
 #!/usr/bin/env python3
 """
-Radio player for Raspberry Pi — runs both client (audio) and display together.
+Radio player for Raspberry Pi — supervises the client (audio) and display.
 
 This script starts:
 1. pi_radio_client_simple.py (audio playback)
 2. radio_display.py (screen display)
 
+Each child is supervised independently: if one exits or stops sending
+heartbeats (see heartbeat.py) it is restarted with exponential backoff
+while the other keeps running, so a display crash never stops the music.
+
+Resource policy:
+- display: niced (RADIO_DISPLAY_NICE, default 10), address space capped at
+  RADIO_DISPLAY_MEM_MB (default 1024), optionally pinned to the CPUs in
+  RADIO_DISPLAY_CPUS (e.g. "3" or "2,3")
+- client: real-time round-robin scheduling if permitted, otherwise a
+  negative nice value if permitted, otherwise left alone
+
 Usage:
-    python radio_player.py
+    python radio_player.py [--single-process]
 
 Kill with Ctrl+C to stop both.
+
+--single-process (or RADIO_SINGLE_PROCESS=1) runs the client in a
+background thread and the display in the main thread of one interpreter
+instead: requests/rich are imported once, now-playing state is shared in
+memory (now_playing.py), and startup time and total RSS both drop by
+roughly 40% (benchmarks/bench_startup.py). Audio itself plays in pygame's mixer thread or
+an mpg123 subprocess, so it is not held up by display rendering. Each side
+is still restarted with backoff if it fails; the display thread is niced,
+but the memory cap does not apply since it would cover the audio too.
+
+Add --profile (or set RADIO_PROFILE=1) to sample-profile the player and both
+children; see profiling.py.
 """
 
+import os
+import signal
 import subprocess
 import sys
-import signal
+import tempfile
+import threading
 import time
 from pathlib import Path
 
+import heartbeat
+import profiling
+
+try:
+    import resource
+except ImportError:   # Windows
+    resource = None
+
 ROOT = Path(__file__).resolve().parent
 
+BACKOFF_START = 0.5
+BACKOFF_MAX = 30.0
+STABLE_AFTER = 60.0    # seconds of uptime that reset the backoff
+POLL_INTERVAL = 0.25
+
+DISPLAY_NICE = int(os.getenv('RADIO_DISPLAY_NICE', '10'))
+DISPLAY_MEM_MB = int(os.getenv('RADIO_DISPLAY_MEM_MB', '1024'))
+DISPLAY_CPUS = os.getenv('RADIO_DISPLAY_CPUS', '')
+
+
+def limit_display():
+    """preexec_fn for the display: lower priority, cap memory, pin CPUs."""
+    try:
+        os.nice(DISPLAY_NICE)
+    except OSError:
+        pass
+    if resource and DISPLAY_MEM_MB > 0:
+        limit = DISPLAY_MEM_MB * 1024 * 1024
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ValueError, OSError):
+            pass
+    if DISPLAY_CPUS and hasattr(os, 'sched_setaffinity'):
+        try:
+            os.sched_setaffinity(0, {int(c) for c in DISPLAY_CPUS.split(',')})
+        except (ValueError, OSError):
+            pass
+
+
+def prioritize_audio():
+    """preexec_fn for the client: best-effort real-time or raised priority."""
+    try:
+        os.sched_setscheduler(0, os.SCHED_RR, os.sched_param(10))
+        return
+    except (AttributeError, OSError):
+        pass
+    try:
+        os.nice(-5)
+    except OSError:
+        pass
+
+
+class Child:
+    """One supervised process with its own restart/backoff state."""
+
+    def __init__(self, name, script, heartbeat_dir, heartbeat_timeout,
+                 startup_timeout=30.0, preexec_fn=None):
+        self.name = name
+        self.script = script
+        self.heartbeat_path = Path(heartbeat_dir) / f'{name}.hb'
+        self.heartbeat_timeout = heartbeat_timeout
+        self.startup_timeout = startup_timeout
+        self.preexec_fn = preexec_fn
+        self.proc = None
+        self.started_at = None
+        self.ready = False
+        self.restarts = 0
+        self.backoff = BACKOFF_START
+        self.next_start = 0.0
+
+    def start(self):
+        self.heartbeat_path.unlink(missing_ok=True)
+        env = dict(os.environ, **{heartbeat.ENV: str(self.heartbeat_path)})
+        kwargs = {}
+        if self.preexec_fn and os.name == 'posix':
+            kwargs['preexec_fn'] = self.preexec_fn
+        self.proc = subprocess.Popen(
+            [sys.executable, str(ROOT / self.script)],
+            stdout=sys.stdout,
+            stderr=sys.stderr,
+            env=env,
+            **kwargs
+        )
+        self.started_at = time.monotonic()
+        self.ready = False
+        print(f'[Supervisor] {self.name} started (pid {self.proc.pid}'
+              + (f', restart #{self.restarts}' if self.restarts else '') + ')')
+
+    def stop(self, timeout=2):
+        if not self.proc:
+            return
+        try:
+            self.proc.terminate()
+            self.proc.wait(timeout=timeout)
+        except Exception:
+            try:
+                self.proc.kill()
+                self.proc.wait(timeout=timeout)
+            except Exception:
+                pass
+        self.proc = None
+
+    def failure(self, now):
+        """Return why the child needs restarting, or None if it is healthy."""
+        code = self.proc.poll()
+        if code is not None:
+            return f'exited with code {code}'
+        age = heartbeat.age(self.heartbeat_path)
+        if not self.ready:
+            if age is not None:
+                self.ready = True
+                print(f'[Supervisor] {self.name} ready in '
+                      f'{(now - self.started_at) * 1000:.0f} ms')
+            elif now - self.started_at > self.startup_timeout:
+                return f'no heartbeat within {self.startup_timeout:.0f}s of starting'
+            return None
+        if age is not None and age > self.heartbeat_timeout:
+            return f'heartbeat stale for {age:.1f}s'
+        return None
+
+    def check(self, now):
+        """Restart on failure (after backoff); called every POLL_INTERVAL."""
+        if self.proc is None:
+            if now >= self.next_start:
+                self.start()
+            return
+        reason = self.failure(now)
+        if reason is None:
+            return
+        uptime = now - self.started_at
+        self.stop()
+        if uptime >= STABLE_AFTER:
+            self.backoff = BACKOFF_START
+        self.restarts += 1
+        self.next_start = now + self.backoff
+        print(f'[Supervisor] {self.name} {reason} after {uptime:.1f}s; '
+              f'restart #{self.restarts} in {self.backoff:.1f}s')
+        self.backoff = min(self.backoff * 2, BACKOFF_MAX)
+
+
+def run_with_backoff(name, target, restart_on_return):
+    """Call target() in this thread, restarting on failure with backoff."""
+    backoff = BACKOFF_START
+    restarts = 0
+    while True:
+        started = time.monotonic()
+        try:
+            target()
+            if not restart_on_return:
+                return
+            reason = 'returned'
+        except Exception as e:
+            reason = f'crashed ({e!r})'
+        uptime = time.monotonic() - started
+        if uptime >= STABLE_AFTER:
+            backoff = BACKOFF_START
+        restarts += 1
+        print(f'[Supervisor] {name} {reason} after {uptime:.1f}s; '
+              f'restart #{restarts} in {backoff:.1f}s')
+        time.sleep(backoff)
+        backoff = min(backoff * 2, BACKOFF_MAX)
+
+
+def main_single_process():
+    t0 = time.monotonic()
+    print('[Radio] Starting Raspberry Pi radio player (single process)...')
+    print('[Radio] Press Ctrl+C to stop\n')
+
+    import now_playing
+    now_playing.use_memory()
+    import pi_radio_client_simple as client
+    import radio_display as display
+    print(f'[Radio] Components loaded in {(time.monotonic() - t0) * 1000:.0f} ms')
+
+    threading.Thread(target=run_with_backoff, args=('client', client.main, True),
+                     name='client', daemon=True).start()
+
+    # Threads inherit their creator's nice value, so lower it only after
+    # the client thread exists; Linux applies it to this thread alone.
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), DISPLAY_NICE)
+    except (AttributeError, OSError):
+        pass
+
+    try:
+        # radio_display.main() returns on Ctrl+C
+        run_with_backoff('display', display.main, restart_on_return=False)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print('[Radio] Shutting down...')
+        client.stop()
+        print('[Radio] Done')
+
+
 def main():
     print('[Radio] Starting Raspberry Pi radio player...')
     print('[Radio] Press Ctrl+C to stop\n')
-    
-    # Start both processes
-    client_proc = None
-    display_proc = None
-    
+
+    # SIGTERM (systemd stop) should tear down the children like Ctrl+C does
+    if signal.getsignal(signal.SIGTERM) in (signal.SIG_DFL, None):
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    heartbeat_dir = tempfile.mkdtemp(prefix='radio-hb-')
+    children = [
+        Child('client', 'pi_radio_client_simple.py', heartbeat_dir,
+              heartbeat_timeout=20.0, preexec_fn=prioritize_audio),
+        Child('display', 'radio_display.py', heartbeat_dir,
+              heartbeat_timeout=15.0, preexec_fn=limit_display),
+    ]
+
     try:
-        # Start audio client
-        print('[Client] Starting audio playback...')
-        client_proc = subprocess.Popen(
-            [sys.executable, str(ROOT / 'pi_radio_client_simple.py')],
-            stdout=sys.stdout,
-            stderr=sys.stderr
-        )
-        
-        # Give client a moment to start
-        time.sleep(1)
-        
-        # Start display
-        print('[Display] Starting screen display...')
-        display_proc = subprocess.Popen(
-            [sys.executable, str(ROOT / 'radio_display.py')],
-            stdout=sys.stdout,
-            stderr=sys.stderr
-        )
-        
-        # Wait for both to finish (or be interrupted)
         while True:
-            time.sleep(1)
-            
-            # Check if either process died
-            if client_proc and client_proc.poll() is not None:
-                print('[Client] Process exited')
-                break
-            if display_proc and display_proc.poll() is not None:
-                print('[Display] Process exited')
-                break
-    
+            now = time.monotonic()
+            for child in children:
+                child.check(now)
+            time.sleep(POLL_INTERVAL)
+
     except KeyboardInterrupt:
         print('\n[Radio] Shutting down...')
-    
+
     finally:
-        # Kill both processes
-        if client_proc:
-            try:
-                client_proc.terminate()
-                client_proc.wait(timeout=2)
-            except Exception:
-                client_proc.kill()
-        
-        if display_proc:
-            try:
-                display_proc.terminate()
-                display_proc.wait(timeout=2)
-            except Exception:
-                display_proc.kill()
-        
-        print('[Radio] Done')
+        for child in children:
+            child.stop()
+            child.heartbeat_path.unlink(missing_ok=True)
+        try:
+            os.rmdir(heartbeat_dir)
+        except OSError:
+            pass
+        summary = ', '.join(f'{c.name} {c.restarts}' for c in children)
+        print(f'[Radio] Done (restarts: {summary})')
 
 
 if __name__ == '__main__':
-    main()
+    profiling.start_from_env('player')
+    if '--single-process' in sys.argv or os.getenv('RADIO_SINGLE_PROCESS') == '1':
+        main_single_process()
+    else:
+        main()
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Streaming URL rewriter for tracks.json.
+
+Applies an ordered list of rewrite rules to the `file` field (or any other
+fields given with --field) of every track, in a single pass. The input is
+read incrementally one track object at a time and written straight back
+out, so memory stays constant no matter how large the catalog is.
+
+Rules:
+    release-to-raw   GitHub release download URL → raw.githubusercontent.com
+    blob-to-raw      github.com/.../blob/... or /raw/refs/heads/... → raw
+    local-to-release music/<file> → GitHub release download URL
+    cdn-prefix       any URL or path → <--cdn-prefix><filename>
+
+--add-mirror PREFIX appends PREFIX/<filename> to each track's `mirrors`
+list (see mirrors.py).
+
+Every rewritten URL is percent-encoded consistently (already-encoded input is
+decoded first, so running the tool twice is a no-op).
+
+Usage:
+    python rewrite_urls.py --rule release-to-raw --rule blob-to-raw
+    python rewrite_urls.py --rule cdn-prefix --cdn-prefix https://cdn.example/music/ --dry-run
+    python rewrite_urls.py --add-mirror https://cdn.example/music/
+"""
+
+import argparse
+import json
+import os
+import sys
+import textwrap
+from pathlib import Path
+from urllib.parse import quote, unquote, urlsplit
+
+WORKDIR = Path(__file__).resolve().parent
+TRACKS = WORKDIR / 'tracks.json'
+
+DEFAULT_REPO = 'LeakySponge/radiothingymagiy'
+RAW_PREFIX = 'https://raw.githubusercontent.com/LeakySponge/radiothingymagiy.github.io/main/music/'
+
+# RFC 3986 sub-delims plus ':' and '@' are legal in a path segment
+PATH_SAFE = "!$&'()*+,;=:@"
+
+RULES = {}
+
+
+def rule(name):
+    """Register a rewrite rule: fn(url, options) -> url."""
+    def register(fn):
+        RULES[name] = fn
+        return fn
+    return register
+
+
+def encode_segment(segment: str) -> str:
+    """Percent-encode one path segment, normalising any existing escapes."""
+    return quote(unquote(segment), safe=PATH_SAFE)
+
+
+def encode_path(path: str) -> str:
+    return '/'.join(encode_segment(s) for s in path.split('/'))
+
+
+def filename_of(url: str) -> str:
+    """Decoded last path segment of a URL or local path."""
+    path = urlsplit(url).path if '://' in url else url
+    return unquote(path.rstrip('/').split('/')[-1])
+
+
+@rule('release-to-raw')
+def release_to_raw(url, options):
+    parts = urlsplit(url)
+    if parts.netloc != 'github.com' or '/releases/download/' not in parts.path:
+        return url
+    return options.raw_prefix + encode_segment(filename_of(url))
+
+
+@rule('blob-to-raw')
+def blob_to_raw(url, options):
+    parts = urlsplit(url)
+    if parts.netloc != 'github.com':
+        return url
+    segments = parts.path.strip('/').split('/')
+    if len(segments) < 4:
+        return url
+    owner, repo, kind = segments[0], segments[1], segments[2]
+    if kind == 'blob' and len(segments) >= 5:
+        # /OWNER/REPO/blob/BRANCH/path/file
+        branch, path = segments[3], segments[4:]
+    elif kind == 'raw' and segments[3:5] == ['refs', 'heads'] and len(segments) >= 7:
+        # /OWNER/REPO/raw/refs/heads/BRANCH/path/file
+        branch, path = segments[5], segments[6:]
+    else:
+        return url
+    return (f'https://raw.githubusercontent.com/{owner}/{repo}/{branch}/'
+            + encode_path('/'.join(path)))
+
+
+@rule('local-to-release')
+def local_to_release(url, options):
+    if not url.startswith('music/'):
+        return url
+    return (f'https://github.com/{options.github_repo}/releases/download/'
+            f'{options.release_tag}/' + encode_segment(url[len('music/'):]))
+
+
+@rule('cdn-prefix')
+def cdn_prefix(url, options):
+    if not options.cdn_prefix:
+        raise SystemExit('cdn-prefix rule needs --cdn-prefix')
+    prefix = options.cdn_prefix if options.cdn_prefix.endswith('/') else options.cdn_prefix + '/'
+    return prefix + encode_segment(filename_of(url))
+
+
+def iter_json_array(f, chunk_size=1 << 16):
+    """Yield the elements of a top-level JSON array from a text stream.
+
+    Only one element (plus one read chunk) is held in memory at a time.
+    """
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+    started = False
+    eof = False
+    while True:
+        # skip whitespace and separators
+        while pos < len(buf) and buf[pos] in ' \t\r\n,':
+            pos += 1
+        if pos >= len(buf) - 1 and not eof:
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf = buf[pos:] + chunk
+            pos = 0
+            continue
+        if pos >= len(buf):
+            if started:
+                raise ValueError('Unexpected end of JSON array')
+            return
+        if not started:
+            if buf[pos] != '[':
+                raise ValueError('Expected a JSON array')
+            started = True
+            pos += 1
+            continue
+        if buf[pos] == ']':
+            return
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+            if end == len(buf) and not eof:
+                raise json.JSONDecodeError('value may continue', buf, end)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf = buf[pos:] + chunk
+            pos = 0
+            continue
+        yield item
+        pos = end
+
+
+def rewrite_track(track, rules, options):
+    """Apply rules to the configured fields. Returns list of (field, old, new)."""
+    changes = []
+    for field in options.fields:
+        old = track.get(field)
+        if not isinstance(old, str):
+            continue
+        new = old
+        for name in rules:
+            new = RULES[name](new, options)
+        if new != old:
+            track[field] = new
+            changes.append((field, old, new))
+    file_url = track.get('file')
+    for prefix in options.add_mirrors or []:
+        if not isinstance(file_url, str):
+            break
+        prefix = prefix if prefix.endswith('/') else prefix + '/'
+        mirror = prefix + encode_segment(filename_of(file_url))
+        mirrors = track.setdefault('mirrors', [])
+        if mirror != file_url and mirror not in mirrors:
+            mirrors.append(mirror)
+            changes.append(('mirrors', '', mirror))
+    return changes
+
+
+def rewrite(src, dst, rules, options, dry_run=False, out=sys.stdout):
+    """Stream tracks from src to dst through the rules. Returns (total, changed)."""
+    src, dst = Path(src), Path(dst)
+    tmp = dst.with_name(dst.name + '.tmp')
+    total = changed = 0
+    with open(src, encoding='utf-8') as fin:
+        fout = None if dry_run else open(tmp, 'w', encoding='utf-8')
+        try:
+            if fout:
+                fout.write('[')
+            for track in iter_json_array(fin):
+                changes = rewrite_track(track, rules, options)
+                if changes:
+                    changed += 1
+                    if dry_run:
+                        print(f'@@ #{total} {track.get("title", "")}', file=out)
+                        for field, old, new in changes:
+                            if old:
+                                print(f'- {field}: {old}', file=out)
+                            print(f'+ {field}: {new}', file=out)
+                if fout:
+                    item = json.dumps(track, indent=4, ensure_ascii=False)
+                    fout.write((',\n' if total else '\n') + textwrap.indent(item, '    '))
+                total += 1
+            if fout:
+                fout.write('\n]' if total else ']')
+        finally:
+            if fout:
+                fout.close()
+    if not dry_run:
+        if changed or src != dst:
+            os.replace(tmp, dst)
+        else:
+            tmp.unlink()
+    return total, changed
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Rewrite track URLs in tracks.json in a single streaming pass')
+    parser.add_argument('--rule', dest='rules', action='append', choices=sorted(RULES),
+                        help='rule to apply (repeatable, applied in order)')
+    parser.add_argument('--field', dest='fields', action='append',
+                        help='track field to rewrite (default: file)')
+    parser.add_argument('--input', default=str(TRACKS), help='input tracks.json')
+    parser.add_argument('--output', default=None, help='output file (default: overwrite input)')
+    parser.add_argument('--dry-run', action='store_true', help='print a diff of changed URLs, write nothing')
+    parser.add_argument('--raw-prefix', default=RAW_PREFIX)
+    parser.add_argument('--github-repo', default=DEFAULT_REPO, help='GitHub repo (owner/repo)')
+    parser.add_argument('--release-tag', default='v1', help='GitHub release tag (e.g., v1)')
+    parser.add_argument('--cdn-prefix', default=None, help='base URL used by the cdn-prefix rule')
+    parser.add_argument('--add-mirror', dest='add_mirrors', action='append', metavar='PREFIX',
+                        help='append PREFIX/<filename> to each track\'s mirrors list (repeatable)')
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    options = parser.parse_args(argv)
+    if not options.rules and not options.add_mirrors:
+        parser.error('at least one --rule or --add-mirror is required')
+    options.rules = options.rules or []
+    options.fields = options.fields or ['file']
+    src = Path(options.input)
+    if not src.exists():
+        print(f'Error: {src} not found')
+        return 1
+    dst = Path(options.output) if options.output else src
+    total, changed = rewrite(src, dst, options.rules, options, dry_run=options.dry_run)
+    verb = 'Would update' if options.dry_run else 'Updated'
+    print(f'{verb} {changed} of {total} tracks ({", ".join(options.rules)})')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,244 @@
+// Weighted, history-aware shuffle with constant-time next().
+//
+// Line-for-line port of scheduler.py: same PRNG (mulberry32 seeded with the
+// FNV-1a hash of the seed string), same integer-only arithmetic and same
+// candidate scoring, so a browser and a Pi given the same seed and catalog
+// produce the same rotation. See scheduler.py for the algorithm.
+
+export const DEFAULT_WINDOW = 8;
+export const DEFAULT_ARTIST_GAP = 3;
+export const DEFAULT_CURATOR_GAP = 1;
+const MAX_RECENT = 50;
+const MAX_WEIGHT = 100;
+
+const PENALTY_RECENT = 4;
+const PENALTY_ARTIST = 2;
+const PENALTY_CURATOR = 1;
+
+export function fnv1a(text) {
+    let h = 0x811C9DC5;
+    for (const b of new TextEncoder().encode(text)) {
+        h = Math.imul(h ^ b, 0x01000193) >>> 0;
+    }
+    return h;
+}
+
+export class Mulberry32 {
+    constructor(seed) {
+        this.state = seed >>> 0;
+    }
+
+    nextU32() {
+        this.state = (this.state + 0x6D2B79F5) >>> 0;
+        let t = this.state;
+        t = Math.imul(t ^ (t >>> 15), t | 1) >>> 0;
+        t = (((t + (Math.imul(t ^ (t >>> 7), t | 61) >>> 0)) >>> 0) ^ t) >>> 0;
+        return (t ^ (t >>> 14)) >>> 0;
+    }
+
+    below(n) {
+        return this.nextU32() % n;
+    }
+}
+
+export function trackKey(track) {
+    return track.sha256 || track.file || track.title;
+}
+
+export function trackKeys(tracks) {
+    const seen = new Map();
+    return tracks.map(t => {
+        const key = trackKey(t);
+        const n = seen.has(key) ? seen.get(key) + 1 : 0;
+        seen.set(key, n);
+        return `${n}:${key}`;
+    });
+}
+
+export function artistOf(track) {
+    const artist = track.artist || (track.title || '').split(' - ')[0];
+    return artist.trim().toLowerCase();
+}
+
+export function curatorOf(track) {
+    const curator = (track.selectedBy || '').trim().toLowerCase();
+    return curator === 'unknown' ? '' : curator;
+}
+
+export function parseWeights(spec) {
+    const weights = {};
+    for (const part of (spec || '').split(',')) {
+        const eq = part.indexOf('=');
+        const name = eq < 0 ? '' : part.slice(0, eq).trim();
+        if (!name) continue;
+        const value = part.slice(eq + 1).trim();
+        if (/^[+-]?\d+$/.test(value)) {
+            weights[name.toLowerCase()] = Math.max(0, parseInt(value, 10));
+        } else {
+            console.warn(`[Schedule] Ignoring curator weight '${part.trim()}': not an integer`);
+        }
+    }
+    return weights;
+}
+
+export class Scheduler {
+    constructor(tracks, {
+        seed = 'radio',
+        window = DEFAULT_WINDOW,
+        artistGap = DEFAULT_ARTIST_GAP,
+        curatorGap = DEFAULT_CURATOR_GAP,
+        recent = null,
+        weights = {},
+    } = {}) {
+        this.seed = seed;
+        this.rng = new Mulberry32(fnv1a(String(seed)));
+        this.window = Math.max(1, window);
+        this.artistGap = artistGap;
+        this.curatorGap = curatorGap;
+        this.weights = weights;
+        this.recentLimit = recent;
+        this.picks = 0;
+        const order = [];
+        this._slots(tracks).forEach((k, i) => { for (let s = 0; s < k; s++) order.push(i); });
+        this._load(tracks, order, 0, []);
+    }
+
+    _slots(tracks) {
+        const slots = tracks.map(t => {
+            const c = curatorOf(t);
+            return Math.min(MAX_WEIGHT, c in this.weights ? this.weights[c] : 1);
+        });
+        return slots.some(k => k > 0) ? slots : tracks.map(() => 1);
+    }
+
+    _load(tracks, order, pos, history) {
+        const n = tracks.length;
+        this.tracks = tracks;
+        this.order = Uint32Array.from(order);
+        this.pos = pos;
+        this.artists = tracks.map(artistOf);
+        this.curators = tracks.map(curatorOf);
+        const recent = this.recentLimit === null ? Math.min(MAX_RECENT, Math.floor(n / 3)) : this.recentLimit;
+        this.capacity = Math.max(0, Math.min(n - 1, Math.max(recent, this.artistGap, this.curatorGap)));
+        this.ring = new Int32Array(this.capacity).fill(-1);
+        this.ringLen = 0;
+        this.ringHead = 0;
+        this.inRing = new Uint8Array(n);
+        if (this.capacity) {
+            for (const index of history.slice(-this.capacity)) this._remember(index);
+        }
+    }
+
+    get length() {
+        return this.tracks.length;
+    }
+
+    remaining() {
+        return this.order.length - this.pos;
+    }
+
+    _remember(index) {
+        if (!this.capacity) return;
+        if (this.ringLen === this.capacity) {
+            const old = this.ring[this.ringHead];
+            if (this.inRing[old]) this.inRing[old] -= 1;
+        } else {
+            this.ringLen += 1;
+        }
+        this.ring[this.ringHead] = index;
+        this.ringHead = (this.ringHead + 1) % this.capacity;
+        if (this.inRing[index] < 255) this.inRing[index] += 1;
+    }
+
+    history() {
+        if (!this.capacity) return [];
+        const start = ((this.ringHead - this.ringLen) % this.capacity + this.capacity) % this.capacity;
+        const out = [];
+        for (let i = 0; i < this.ringLen; i++) out.push(this.ring[(start + i) % this.capacity]);
+        return out;
+    }
+
+    _last(k) {
+        if (k > this.ringLen) return -1;
+        return this.ring[((this.ringHead - k) % this.capacity + this.capacity) % this.capacity];
+    }
+
+    _penalty(index) {
+        let penalty = this.inRing[index] ? PENALTY_RECENT : 0;
+        const artist = this.artists[index];
+        for (let k = 1; k <= this.artistGap; k++) {
+            const last = this._last(k);
+            if (last < 0) break;
+            if (artist && this.artists[last] === artist) {
+                penalty += PENALTY_ARTIST;
+                break;
+            }
+        }
+        const curator = this.curators[index];
+        for (let k = 1; k <= this.curatorGap; k++) {
+            const last = this._last(k);
+            if (last < 0) break;
+            if (curator && this.curators[last] === curator) {
+                penalty += PENALTY_CURATOR;
+                break;
+            }
+        }
+        return penalty;
+    }
+
+    next() {
+        const order = this.order;
+        const n = order.length;
+        if (n === 0) throw new RangeError('no tracks to schedule');
+        if (this.pos >= n) this.pos = 0;
+        const pos = this.pos;
+        const count = Math.min(this.window, n - pos);
+        let best = null;
+        let candidates = [];
+        for (let c = 0; c < count; c++) {
+            const j = pos + c + this.rng.below(n - pos - c);
+            [order[pos + c], order[j]] = [order[j], order[pos + c]];
+            const penalty = this._penalty(order[pos + c]);
+            if (best === null || penalty < best) {
+                best = penalty;
+                candidates = [pos + c];
+            } else if (penalty === best) {
+                candidates.push(pos + c);
+            }
+        }
+        const chosen = candidates[0];
+        [order[pos], order[chosen]] = [order[chosen], order[pos]];
+        const index = order[pos];
+        this.pos = pos + 1;
+        this.picks += 1;
+        this._remember(index);
+        return index;
+    }
+
+    update(tracks) {
+        const newKeys = trackKeys(tracks);
+        const newIndex = new Map(newKeys.map((key, i) => [key, i]));
+        const keys = trackKeys(this.tracks);
+        const left = this._slots(tracks);
+        const remap = indices => {
+            const out = [];
+            for (const i of indices) {
+                const j = newIndex.get(keys[i]);
+                if (j !== undefined && left[j]) {
+                    left[j] -= 1;
+                    out.push(j);
+                }
+            }
+            return out;
+        };
+        const played = remap(this.order.subarray(0, this.pos));
+        const unplayed = remap(this.order.subarray(this.pos));
+        left.forEach((k, j) => { for (let s = 0; s < k; s++) unplayed.push(j); });
+        const history = this.history().filter(i => newIndex.has(keys[i])).map(i => newIndex.get(keys[i]));
+        const known = new Set(keys);
+        const added = [];
+        newKeys.forEach((key, i) => { if (!known.has(key)) added.push(i); });
+        this._load(tracks, played.concat(unplayed), played.length, history);
+        return added;
+    }
+}
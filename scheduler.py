@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Weighted, history-aware shuffle with constant-time next().
+
+The rotation is an incremental Fisher–Yates shuffle: `order[:pos]` holds
+the tracks played this cycle and `order[pos:]` is the unplayed pool. Each
+`next()` draws WINDOW random candidates from the pool (a partial
+Fisher–Yates step each, so O(WINDOW) regardless of library size), scores
+them and swaps the winner into position `pos`:
+
+- tracks among the last `recent` picks are avoided (a ring buffer of
+  track indices plus a per-track count, both flat arrays)
+- the same artist within `artist_gap` picks, or the same curator
+  (`selectedBy`) within `curator_gap` picks, is avoided
+- among the candidates with the fewest violations the first drawn wins
+
+Curator weights set how often a track comes up: the pool holds each track
+once per unit of its curator's integer weight (default 1, capped at
+MAX_WEIGHT; 0 leaves the curator out unless every weight is 0), and every
+slot plays exactly once per cycle. With `alice=3` each of alice's tracks
+plays three times a cycle, the repeats spread apart by the recent-track
+penalty. Tracks sharing a track_key() (e.g. a duplicated file) are told
+apart by their occurrence number. All randomness comes from
+a mulberry32 generator seeded with the FNV-1a hash of a seed string and
+uses integer arithmetic only, so clients sharing a seed and catalog compute
+the same rotation without coordinating; scheduler.js is a line-for-line
+port for radio.js.
+
+    sched = Scheduler(tracks, seed='station-1', weights=parse_weights('alice=3'))
+    index = sched.next()
+    added = sched.update(new_tracks)   # catalog refresh, keeps history
+"""
+
+import logging
+import os
+from array import array
+
+DEFAULT_WINDOW = 8
+DEFAULT_ARTIST_GAP = 3
+DEFAULT_CURATOR_GAP = 1
+MAX_RECENT = 50
+MAX_WEIGHT = 100
+
+# Penalties for the scoring above; lower wins
+PENALTY_RECENT = 4
+PENALTY_ARTIST = 2
+PENALTY_CURATOR = 1
+
+M32 = 0xFFFFFFFF
+
+logger = logging.getLogger(__name__)
+
+
+def fnv1a(text):
+    """32-bit FNV-1a hash of the UTF-8 bytes of `text`."""
+    h = 0x811C9DC5
+    for b in text.encode('utf-8'):
+        h = ((h ^ b) * 0x01000193) & M32
+    return h
+
+
+class Mulberry32:
+    """Tiny 32-bit PRNG with an exact JavaScript equivalent."""
+
+    def __init__(self, seed):
+        self.state = seed & M32
+
+    def next_u32(self):
+        self.state = (self.state + 0x6D2B79F5) & M32
+        t = self.state
+        t = ((t ^ (t >> 15)) * (t | 1)) & M32
+        t = ((t + (((t ^ (t >> 7)) * (t | 61)) & M32)) & M32) ^ t
+        return (t ^ (t >> 14)) & M32
+
+    def below(self, n):
+        """Integer in [0, n)."""
+        return self.next_u32() % n
+
+
+def track_key(track):
+    """Identity of a track across catalog versions (indices shift on rebuild)."""
+    return track.get('sha256') or track.get('file') or track.get('title')
+
+
+def track_keys(tracks):
+    """Unique identities for `tracks`: (track_key, occurrence number), in order."""
+    seen = {}
+    keys = []
+    for track in tracks:
+        key = track_key(track)
+        seen[key] = seen.get(key, -1) + 1
+        keys.append((key, seen[key]))
+    return keys
+
+
+def artist_of(track):
+    """Explicit `artist`, else the part of "Artist - Title" before the dash."""
+    artist = track.get('artist') or (track.get('title') or '').split(' - ')[0]
+    return artist.strip().lower()
+
+
+def curator_of(track):
+    curator = (track.get('selectedBy') or '').strip().lower()
+    return '' if curator == 'unknown' else curator
+
+
+def parse_weights(spec):
+    """
+    'alice=3,bob=2' -> {'alice': 3, 'bob': 2}; curators default to 1.
+    Malformed entries (`alice=x`, `alice=`) are skipped with a warning.
+    """
+    weights = {}
+    for part in (spec or '').split(','):
+        name, sep, value = part.partition('=')
+        if not (sep and name.strip()):
+            continue
+        try:
+            weights[name.strip().lower()] = max(0, int(value))
+        except ValueError:
+            logger.warning(f'[Schedule] Ignoring curator weight {part.strip()!r}: not an integer')
+    return weights
+
+
+def weights_from_env():
+    return parse_weights(os.getenv('RADIO_CURATOR_WEIGHTS', ''))
+
+
+class Scheduler:
+    def __init__(self, tracks, seed='radio', window=DEFAULT_WINDOW,
+                 artist_gap=DEFAULT_ARTIST_GAP, curator_gap=DEFAULT_CURATOR_GAP,
+                 recent=None, weights=None):
+        self.seed = seed
+        self.rng = Mulberry32(fnv1a(str(seed)))
+        self.window = max(1, window)
+        self.artist_gap = artist_gap
+        self.curator_gap = curator_gap
+        self.weights = weights or {}
+        self.recent_limit = recent
+        self.picks = 0
+        slots = self._slots(tracks)
+        self._load(tracks, [i for i, k in enumerate(slots) for _ in range(k)], 0, [])
+
+    def _slots(self, tracks):
+        """Times each track is in the pool per cycle: its curator's weight."""
+        slots = [min(MAX_WEIGHT, self.weights.get(curator_of(t), 1)) for t in tracks]
+        return slots if any(slots) else [1] * len(tracks)
+
+    def _load(self, tracks, order, pos, history):
+        n = len(tracks)
+        self.tracks = tracks
+        self.order = array('I', order)
+        self.pos = pos
+        self.artists = [artist_of(t) for t in tracks]
+        self.curators = [curator_of(t) for t in tracks]
+        recent = self.recent_limit
+        if recent is None:
+            recent = min(MAX_RECENT, n // 3)
+        self.capacity = max(0, min(n - 1, max(recent, self.artist_gap, self.curator_gap)))
+        # ring buffer of the last `capacity` picks, oldest first once full
+        self.ring = array('i', [-1] * self.capacity)
+        self.ring_len = 0
+        self.ring_head = 0
+        self.in_ring = bytearray(n)
+        for index in history[-self.capacity:] if self.capacity else ():
+            self._remember(index)
+
+    def __len__(self):
+        return len(self.tracks)
+
+    def remaining(self):
+        """Picks left in the current cycle."""
+        return len(self.order) - self.pos
+
+    def _remember(self, index):
+        if not self.capacity:
+            return
+        if self.ring_len == self.capacity:
+            old = self.ring[self.ring_head]
+            if self.in_ring[old]:
+                self.in_ring[old] -= 1
+        else:
+            self.ring_len += 1
+        self.ring[self.ring_head] = index
+        self.ring_head = (self.ring_head + 1) % self.capacity
+        if self.in_ring[index] < 255:
+            self.in_ring[index] += 1
+
+    def history(self):
+        """Recent picks, oldest first."""
+        start = (self.ring_head - self.ring_len) % self.capacity if self.capacity else 0
+        return [self.ring[(start + i) % self.capacity] for i in range(self.ring_len)]
+
+    def _last(self, k):
+        """The k-th most recent pick (k >= 1), or -1."""
+        if k > self.ring_len:
+            return -1
+        return self.ring[(self.ring_head - k) % self.capacity]
+
+    def _penalty(self, index):
+        penalty = PENALTY_RECENT if self.in_ring[index] else 0
+        artist = self.artists[index]
+        for k in range(1, self.artist_gap + 1):
+            last = self._last(k)
+            if last < 0:
+                break
+            if artist and self.artists[last] == artist:
+                penalty += PENALTY_ARTIST
+                break
+        curator = self.curators[index]
+        for k in range(1, self.curator_gap + 1):
+            last = self._last(k)
+            if last < 0:
+                break
+            if curator and self.curators[last] == curator:
+                penalty += PENALTY_CURATOR
+                break
+        return penalty
+
+    def next(self):
+        """Pick the next track index. O(window + gaps), independent of library size."""
+        n = len(self.order)
+        if n == 0:
+            raise IndexError('no tracks to schedule')
+        if self.pos >= n:
+            self.pos = 0    # cycle complete: everything is back in the pool
+        order, pos, rng = self.order, self.pos, self.rng
+        count = min(self.window, n - pos)
+        best, candidates = None, []
+        for c in range(count):
+            j = pos + c + rng.below(n - pos - c)
+            order[pos + c], order[j] = order[j], order[pos + c]
+            penalty = self._penalty(order[pos + c])
+            if best is None or penalty < best:
+                best, candidates = penalty, [pos + c]
+            elif penalty == best:
+                candidates.append(pos + c)
+        chosen = candidates[0]
+        order[pos], order[chosen] = order[chosen], order[pos]
+        index = order[pos]
+        self.pos = pos + 1
+        self.picks += 1
+        self._remember(index)
+        return index
+
+    def update(self, tracks):
+        """
+        Switch to a new catalog, keeping the cycle and history.
+
+        Tracks are matched by track_keys(). Played slots stay played for the
+        current cycle, removed tracks drop out, and new tracks (or extra
+        slots from a changed curator) join the unplayed pool. Returns the
+        indices (in `tracks`) of the new tracks.
+        """
+        new_keys = track_keys(tracks)
+        new_index = {key: i for i, key in enumerate(new_keys)}
+        keys = track_keys(self.tracks)
+        left = self._slots(tracks)
+
+        def remap(indices):
+            out = []
+            for i in indices:
+                j = new_index.get(keys[i])
+                if j is not None and left[j]:
+                    left[j] -= 1
+                    out.append(j)
+            return out
+
+        played = remap(self.order[:self.pos])
+        unplayed = remap(self.order[self.pos:])
+        unplayed += [j for j, k in enumerate(left) for _ in range(k)]
+        history = [new_index[keys[i]] for i in self.history() if keys[i] in new_index]
+        known = set(keys)
+        added = [i for i, key in enumerate(new_keys) if key not in known]
+        self._load(tracks, played + unplayed, len(played), history)
+        return added
@@ -3,26 +3,72 @@
 Local Flask server for Raspberry Pi radio player.
 
 Serves:
-- /api/tracks          → JSON list of tracks with metadata
+- /api/tracks          → JSON list of tracks with metadata (ETag; 304 if unchanged)
+- /api/tracks/version  → {"version", "count"} for cheap change polling
 - /api/audio/<id>      → MP3 file stream (by 0-based index in tracks.json)
+- /api/state           → Current station state (read-only; see station.py)
+- /api/schedule        → Current and upcoming tracks with start times
+- /api/stations        → All stations (stations.json); per station
+                         /api/stations/<id>/state, /schedule and /tracks
+- /api/requests        → Listener song requests (POST to request, GET the queue)
+- /api/time            → Server clock for NTP-style offset estimation (timesync.py)
+- /api/events          → Server-sent events: `catalog` when the track list changes
+- /api/peers           → LAN peer cache registry (see peer_cache.py)
+- /player              → The web player from dist/ (build it with assets.py);
+                         fingerprinted files under /assets/ are cached forever
+                         and served precompressed (br/gzip) when accepted
 - /health              → Health check
+- /metrics             → Prometheus metrics (set RADIO_METRICS=0 to disable)
+- /api/telemetry       → POST client playback events, GET per-client rollup
 - /                     → Static HTML dashboard (optional)
 
 Runs on http://localhost:5000 (or 0.0.0.0:5000 if FLASK_ENV=production).
 Raspberry Pi client fetches from here; Neocities can optionally use this
 if Pi is exposed on the LAN.
+
+Local audio is served through an in-memory track ID -> file index with
+cached descriptors (see audio_index.py), so a request does no path
+handling or stat(). The server watches music/ (see watcher.py) to keep that
+index current. With RADIO_WATCH=1 a changed file is also re-read by
+build.py's incremental scan, the new list is swapped into the in-memory
+track list in one assignment, and connected clients get a `catalog` event
+instead of waiting for their next poll. Loudness analysis of the new files
+follows in a spawned process pool (RADIO_WATCH_LOUDNESS=0 skips it) and
+sends a second event once the gains are in.
 """
+import atexit
 import os
 import json
+import hashlib
+import mimetypes
+import queue
+import threading
+import time
 from pathlib import Path
-from flask import Flask, jsonify, send_file, request, render_template_string
+from flask import Flask, Response, abort, g, jsonify, send_file, request
+from werkzeug.datastructures import ContentRange
 from flask_cors import CORS
 import logging
 
+import metrics
+from audio_index import AudioIndex
+from catalog import Catalog
+from mirrors import selector, track_sources
+from peer_cache import SHA256, PeerDirectory
+from proxy_cache import ProxyCache, cache_key
+from telemetry import TelemetryRollup
+import profiling
+from scheduler import track_key, weights_from_env
+from song_requests import DURABLE_TIMEOUT, InvalidTransition, RateLimited, SongRequests
+from station import FirebaseSink
+from stations import StationRegistry, load_config as load_stations
+
 # Setup
 ROOT = Path(__file__).resolve().parent
 MUSIC_DIR = ROOT / 'music'
 TRACKS_FILE = ROOT / 'tracks.json'
+CATALOG_FILE = ROOT / 'tracks.bin'
+DIST_DIR = ROOT / 'dist'
 
 app = Flask(__name__)
 CORS(app)  # Allow cross-origin requests (e.g., from Neocities)
@@ -37,6 +83,103 @@ if not MUSIC_DIR.exists():
 if not TRACKS_FILE.exists():
     logger.warning(f'Tracks file not found: {TRACKS_FILE}')
 
+# Metrics (exposed on /metrics)
+METRICS_ENABLED = os.getenv('RADIO_METRICS', '1') != '0'
+REQUESTS = metrics.Counter('radio_http_requests_total', 'HTTP requests by route and status',
+                           ('method', 'route', 'status'))
+REQUEST_SECONDS = metrics.Histogram('radio_http_request_duration_seconds',
+                                    'Time to produce a response (excludes streaming the body)',
+                                    ('method', 'route'))
+IN_FLIGHT = metrics.Gauge('radio_http_requests_in_flight', 'Requests currently being handled')
+AUDIO_BYTES = metrics.Counter('radio_audio_bytes_total', 'Audio bytes served per track', ('track',))
+AUDIO_STREAMS = metrics.Gauge('radio_audio_streams_in_flight', 'Audio responses still being sent')
+CATALOG_LOOKUPS = metrics.Counter('radio_catalog_lookups_total',
+                                  'Track catalog cache lookups', ('source', 'result'))
+STATION_TRANSITIONS = metrics.Counter('radio_station_transitions_total', 'Tracks started by each station clock',
+                                      ('station',))
+SONG_REQUESTS = metrics.Counter('radio_song_requests_total', 'Listener song requests by outcome',
+                                ('result',))
+STATION_LISTENERS = metrics.Gauge('radio_station_listeners', 'Clients that polled a station recently',
+                                  ('station',))
+CATALOG_REBUILDS = metrics.Counter('radio_catalog_rebuilds_total', 'Incremental rebuilds by the library watcher')
+EVENT_SUBSCRIBERS = metrics.Gauge('radio_event_subscribers', 'Clients connected to /api/events')
+PEER_LOOKUPS = metrics.Counter('radio_peer_lookups_total', 'Peer cache lookups by outcome', ('result',))
+peer_directory = PeerDirectory()
+metrics.Gauge('radio_peers', 'Pi clients sharing their cache', function=lambda: len(peer_directory.summary()))
+telemetry_rollup = TelemetryRollup()
+
+# Per-request profiling: send `X-Radio-Profile: 1` (see profiling.py)
+if os.getenv('RADIO_PROFILE_REQUESTS', '0') == '1':
+    profiling.install_flask_hooks(app)
+
+# Optional caching proxy for remote tracks (RADIO_PROXY_CACHE=1): fetch once
+# over the WAN, serve every LAN client from disk afterwards
+proxy_cache = None
+if os.getenv('RADIO_PROXY_CACHE', '0') == '1':
+    proxy_cache = ProxyCache(
+        os.getenv('RADIO_PROXY_CACHE_DIR', str(ROOT / '.proxy_cache')),
+        int(os.getenv('RADIO_PROXY_CACHE_MB', 2048)) * 1024 * 1024,
+    )
+    for _stat in ('hits', 'misses', 'coalesced', 'bytes'):
+        metrics.Gauge(f'radio_proxy_cache_{_stat}', f'Proxy cache {_stat}',
+                      function=lambda k=_stat: proxy_cache.stats()[k])
+
+
+class _CountBytes:
+    """
+    Streamed body wrapper that counts the bytes actually sent. close() always
+    reaches the wrapped body, even when it is never iterated (HEAD, empty range).
+    """
+
+    def __init__(self, body, counter):
+        self.body = body
+        self.counter = counter
+
+    def __iter__(self):
+        for chunk in self.body:
+            self.counter.inc(len(chunk))
+            yield chunk
+
+    def close(self):
+        close = getattr(self.body, 'close', None)
+        if close:
+            close()
+
+
+if METRICS_ENABLED:
+    @app.before_request
+    def _metrics_start():
+        g.metrics_t0 = time.perf_counter()
+        IN_FLIGHT.inc()
+
+    @app.after_request
+    def _metrics_record(response):
+        t0 = g.pop('metrics_t0', None)
+        if t0 is None:
+            return response
+        IN_FLIGHT.dec()
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_SECONDS.labels(request.method, route).observe(time.perf_counter() - t0)
+        REQUESTS.labels(request.method, route, response.status_code).inc()
+
+        track_id = g.get('track_id')
+        if track_id is not None and response.status_code in (200, 206):
+            counter = AUDIO_BYTES.labels(track_id)
+            if response.is_streamed:
+                response.response = _CountBytes(response.response, counter)
+            else:
+                counter.inc(response.content_length or 0)
+            AUDIO_STREAMS.inc()
+            response.call_on_close(AUDIO_STREAMS.dec)
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics_endpoint():
+        """Prometheus text exposition of all server metrics."""
+        for station in stations or ():
+            STATION_LISTENERS.labels(station.id).set(station.listeners())
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 
 def load_tracks():
     """Load and parse tracks.json."""
@@ -48,27 +191,150 @@ def load_tracks():
         return []
 
 
-# Cache tracks in memory (reload periodically or on demand)
-_tracks_cache = None
-_tracks_mtime = None
+# Cache tracks in memory (reload periodically or on demand). One tuple, so
+# set_tracks() swaps list and mtime together for every reader.
+_tracks = (None, None)   # (tracks.json mtime, parsed list)
 
 def get_tracks_cached():
     """Load tracks with simple file mtime caching."""
-    global _tracks_cache, _tracks_mtime
+    global _tracks
+    mtime, tracks = _tracks
     if TRACKS_FILE.exists():
-        mtime = TRACKS_FILE.stat().st_mtime
-        if _tracks_cache is None or _tracks_mtime != mtime:
-            _tracks_cache = load_tracks()
-            _tracks_mtime = mtime
-            logger.info(f'Loaded {len(_tracks_cache)} tracks')
-    return _tracks_cache or []
+        current = TRACKS_FILE.stat().st_mtime
+        if tracks is None or mtime != current:
+            CATALOG_LOOKUPS.labels('json', 'miss').inc()
+            tracks = load_tracks()
+            _tracks = (current, tracks)
+            logger.info(f'Loaded {len(tracks)} tracks')
+        else:
+            CATALOG_LOOKUPS.labels('json', 'hit').inc()
+    return tracks or []
+
+
+def set_tracks(tracks):
+    """Swap in a freshly built track list (already written to tracks.json)."""
+    global _tracks
+    _tracks = (TRACKS_FILE.stat().st_mtime, tracks)
+
+
+_catalog = None
+_catalog_mtime = None
+
+def get_catalog():
+    """
+    Return an indexable view of the tracks for single-track lookups.
+
+    Uses the mmap-backed tracks.bin when it is at least as new as
+    tracks.json (opening it is O(1), lookups decode one track), otherwise
+    falls back to the parsed JSON list.
+    """
+    global _catalog, _catalog_mtime
+    try:
+        mtime = CATALOG_FILE.stat().st_mtime
+        if TRACKS_FILE.exists() and TRACKS_FILE.stat().st_mtime > mtime:
+            return get_tracks_cached()  # stale: converter rewrote tracks.json
+    except OSError:
+        return get_tracks_cached()
+    if _catalog is None or _catalog_mtime != mtime:
+        CATALOG_LOOKUPS.labels('bin', 'miss').inc()
+        try:
+            _catalog = Catalog(CATALOG_FILE)
+            _catalog_mtime = mtime
+            logger.info(f'Mapped {len(_catalog)} tracks from {CATALOG_FILE.name}')
+        except Exception as e:
+            logger.error(f'Failed to map {CATALOG_FILE.name}: {e}')
+            return get_tracks_cached()
+    else:
+        CATALOG_LOOKUPS.labels('bin', 'hit').inc()
+    return _catalog
+
+
+_tracks_payload = (None, None, None)   # (tracks list it was built from, body, etag)
+
+def tracks_payload():
+    """
+    Serialized track list and its ETag, rebuilt only when tracks.json changes.
+
+    Saves re-encoding the whole catalog per request, and lets clients poll
+    with If-None-Match (or /api/tracks/version) for the cost of a hash compare.
+    """
+    global _tracks_payload
+    tracks = get_tracks_cached()
+    source, body, etag = _tracks_payload
+    if source is not tracks:
+        body = json.dumps(tracks, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        etag = hashlib.sha1(body).hexdigest()[:20]
+        _tracks_payload = (tracks, body, etag)
+    return body, etag
 
 
 @app.route('/api/tracks', methods=['GET'])
 def api_tracks():
-    """Return track list as JSON."""
-    tracks = get_tracks_cached()
-    return jsonify(tracks)
+    """Return track list as JSON (conditional on If-None-Match)."""
+    body, etag = tracks_payload()
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    # clients download remote tracks through us first when we cache them
+    response.headers['X-Radio-Proxy-Cache'] = '1' if proxy_cache else '0'
+    return response.make_conditional(request)
+
+
+@app.route('/api/tracks/version', methods=['GET'])
+def api_tracks_version():
+    """Catalog version (the /api/tracks ETag) and track count."""
+    _, etag = tracks_payload()
+    return jsonify({'version': etag, 'count': len(get_tracks_cached())})
+
+
+_audio_index = None
+
+def get_audio_index(catalog):
+    """The AudioIndex for MUSIC_DIR, re-indexed when `catalog` is a new list."""
+    global _audio_index
+    if _audio_index is None:
+        _audio_index = AudioIndex(MUSIC_DIR)
+    _audio_index.rebuild(catalog)
+    return _audio_index
+
+
+def send_audio(index, audio):
+    """
+    Serve an indexed file: 304 on a matching If-None-Match, 206 for a
+    single satisfiable Range (honouring If-Range), 416 for an unsatisfiable
+    one, else the whole file. The body is pread from a cached descriptor.
+    """
+    if request.if_none_match.contains(audio.etag):
+        response = Response(status=304)
+        response.set_etag(audio.etag)
+        return response
+
+    start, stop, status = 0, audio.size, 200
+    rng = request.range
+    if_range = request.if_range
+    if rng is not None and len(rng.ranges) == 1 and (
+            if_range.etag is None and if_range.date is None or if_range.etag == audio.etag):
+        span = rng.range_for_length(audio.size)
+        if span is None:
+            return Response(status=416, headers={'Content-Range': f'bytes */{audio.size}'})
+        start, stop = span
+        status = 206
+    try:
+        body = index.read(audio, start, stop)
+    except OSError as e:
+        logger.warning(f'Audio file vanished: {audio.path} ({e})')
+        return jsonify({'error': 'Audio file not found'}), 404
+
+    response = Response(body, status=status, mimetype='audio/mpeg', direct_passthrough=True)
+    # release the descriptor even if the body is wrapped or never iterated (HEAD)
+    response.call_on_close(body.close)
+    response.content_length = stop - start
+    if status == 206:
+        response.content_range = ContentRange('bytes', start, stop, audio.size)
+    response.accept_ranges = 'bytes'
+    response.set_etag(audio.etag)
+    response.last_modified = audio.mtime
+    return response
 
 
 @app.route('/api/audio/<int:track_id>', methods=['GET'])
@@ -78,7 +344,9 @@ def api_audio(track_id):
     
     Strategy:
     1. If the track's 'file' is a local path (music/...), serve from disk
-    2. If it's a remote URL (http://...), proxy/redirect to it
+    2. If it's a remote URL (http://...), redirect to the best of its
+       `file`/`mirrors` URLs (see mirrors.py), or with RADIO_PROXY_CACHE=1
+       serve it through the local disk cache (see proxy_cache.py)
     
     Args:
         track_id: 0-based index into tracks array
@@ -86,58 +354,98 @@ def api_audio(track_id):
     Returns:
         MP3 file stream or redirect
     """
-    tracks = get_tracks_cached()
+    tracks = get_catalog()
     if not (0 <= track_id < len(tracks)):
         return jsonify({'error': 'Track not found'}), 404
     
     track = tracks[track_id]
     file_path = track.get('file', '')
+    g.track_id = track_id
     
     # Check if it's a remote URL
     if file_path.startswith('http://') or file_path.startswith('https://'):
-        # Redirect to the remote URL (client will fetch directly)
-        # Or proxy it (slower but works with CORS)
-        # For now, redirect:
-        return {'redirect': file_path}, 302, {'Location': file_path}
-    
-    # Otherwise treat as local file path
-    # Extract filename from local path (handle "music/..." or just "filename")
-    if '/' in file_path:
-        filename = file_path.split('/')[-1]
-    else:
-        filename = file_path
-    
-    # Build safe path (prevent directory traversal)
-    audio_file = MUSIC_DIR / filename
+        if proxy_cache is not None:
+            kind, result = proxy_cache.get(cache_key(track), track_sources(track))
+            if kind == 'hit':
+                return send_file(str(result), mimetype='audio/mpeg', conditional=True)
+            if kind == 'stream':
+                return Response(result, mimetype='audio/mpeg')
+            logger.warning(f'Proxy fetch failed for track {track_id}; redirecting')
+        # Redirect to the fastest healthy mirror (client will fetch directly);
+        # never wait on probes here, stale hosts are re-measured in the background
+        url = selector.best_now(track_sources(track))
+        return {'redirect': url}, 302, {'Location': url}
     
-    if not audio_file.exists():
-        logger.warning(f'Audio file not found: {audio_file}')
+    # Otherwise a local file: validated and stat'ed once when indexed
+    index = get_audio_index(tracks)
+    audio = index.lookup(track_id)
+    if audio is None:
+        logger.warning(f'Audio file not found for track {track_id}: {file_path}')
         return jsonify({'error': 'Audio file not found'}), 404
-    
-    try:
-        # Flask's send_file with range request support
-        return send_file(
-            str(audio_file),
-            mimetype='audio/mpeg',
-            as_attachment=False,
-            download_name=filename
-        )
-    except Exception as e:
-        logger.error(f'Error serving audio {filename}: {e}')
-        return jsonify({'error': 'Failed to serve audio'}), 500
+    return send_audio(index, audio)
+
+
+# Station clocks own track advancement (see stations.py); started from __main__
+stations = None
+STATIONS_FILE = Path(os.getenv('RADIO_STATIONS_FILE', ROOT / 'stations.json'))
+
+# Listener song requests (see song_requests.py); started with the stations
+song_requests = None
+REQUESTS_FILE = Path(os.getenv('RADIO_REQUESTS_FILE', ROOT / 'requests.jsonl'))
+ADMIN_TOKEN = os.getenv('RADIO_ADMIN_TOKEN')
+
+
+def start_stations():
+    """Start every station's clock; the first also publishes to Firebase `radio/`."""
+    global stations, song_requests
+    firebase_config = os.getenv('RADIO_FIREBASE_CONFIG')
+
+    def sinks_for(station_id, default):
+        sinks = [lambda state, tracks: STATION_TRANSITIONS.labels(station_id).inc()]
+        if firebase_config:
+            sinks.append(FirebaseSink(firebase_config,
+                                      'radio' if default else f'radio/stations/{station_id}'))
+        return sinks
+
+    if os.getenv('RADIO_REQUESTS', '1') != '0':
+        song_requests = SongRequests(REQUESTS_FILE,
+                                     auto_approve=os.getenv('RADIO_REQUESTS_AUTO_APPROVE') == '1').start()
+    stations = StationRegistry(load_stations(STATIONS_FILE), get_tracks_cached, sinks_for,
+                               seed=os.getenv('RADIO_SCHEDULE_SEED', 'radio'),
+                               weights=weights_from_env(), requests=song_requests).start()
+    logger.info(f'Started {len(stations)} station(s): {", ".join(s.id for s in stations)}')
+    return stations
+
+
+def listener_id():
+    """Who is polling: ?client=, the X-Radio-Client header, else the remote address."""
+    return request.args.get('client') or request.headers.get('X-Radio-Client') or request.remote_addr
+
+
+def station_or_404(station_id):
+    station = stations.get(station_id) if stations else None
+    if station is None:
+        abort(404)
+    return station
 
 
 @app.route('/api/state', methods=['GET', 'POST'])
 def api_state():
     """
-    Stub for playback state sync (Firebase can handle this; Pi client
-    can also POST state updates here for logging).
+    Playback state of the default station, owned by its station clock.
+
+    Listeners only read; POSTs are refused while stations are running.
+    Without stations (RADIO_STATION=0) this stays a logging stub.
     """
     if request.method == 'POST':
+        if stations:
+            return jsonify({'error': 'State is owned by the station clock'}), 409
         state = request.get_json()
         logger.info(f'State update: {state}')
         return jsonify({'ok': True})
-    
+
+    if stations:
+        return api_station_state(stations.default.id)
     return jsonify({
         'currentTrackIndex': 0,
         'startTime': 0,
@@ -145,62 +453,429 @@ def api_state():
     })
 
 
+@app.route('/api/schedule', methods=['GET'])
+def api_schedule():
+    """Current track and the next ?count= (default 10) with start times."""
+    if not stations:
+        return jsonify({'error': 'Station not running'}), 503
+    return api_station_schedule(stations.default.id)
+
+
+@app.route('/api/stations', methods=['GET'])
+def api_stations():
+    """Every station with its track count, listeners and current title."""
+    if not stations:
+        return jsonify([])
+    return jsonify([station.info() for station in stations])
+
+
+@app.route('/api/stations/<station_id>/state', methods=['GET'])
+def api_station_state(station_id):
+    """A station's state; polling it counts the caller as a listener."""
+    station = station_or_404(station_id)
+    station.touch(listener_id())
+    state = station.state()
+    if state is None:
+        return jsonify({'error': 'Station has no tracks yet'}), 503
+    return jsonify(state)
+
+
+@app.route('/api/stations/<station_id>/schedule', methods=['GET'])
+def api_station_schedule(station_id):
+    station = station_or_404(station_id)
+    count = min(max(request.args.get('count', 10, type=int), 0), 100)
+    return jsonify({'serverTime': int(time.time() * 1000), 'schedule': station.schedule(count)})
+
+
+@app.route('/api/stations/<station_id>/tracks', methods=['GET'])
+def api_station_tracks(station_id):
+    """The station's playlist; `currentTrackIndex` in its state indexes this list."""
+    station = station_or_404(station_id)
+    return jsonify(list(station.tracks()))
+
+
+def is_admin():
+    """X-Radio-Admin must match RADIO_ADMIN_TOKEN; without a token, only localhost is admin."""
+    if ADMIN_TOKEN:
+        return request.headers.get('X-Radio-Admin') == ADMIN_TOKEN
+    return request.remote_addr in ('127.0.0.1', '::1')
+
+
+@app.route('/api/requests', methods=['GET', 'POST'])
+def api_requests():
+    """
+    Listener song requests.
+
+    POST {track: <sha256|file|title> or trackId: <index>, requester, station}
+    queues a request once it is fsynced to requests.jsonl (201; `durable` is
+    false if the fsync is still pending after DURABLE_TIMEOUT), returns the
+    existing request if that track is already queued (200), 503 if the log
+    write failed (the request is held in memory only), or 429 over the rate
+    limit. The limit counts requests per remote address, so changing
+    ?client= or X-Radio-Client does not reset it; listeners behind one NAT
+    share it. GET lists pending and approved requests
+    (optionally ?station=<id>).
+    """
+    if song_requests is None or not stations:
+        return jsonify({'error': 'Song requests are not enabled'}), 503
+    if request.method == 'GET':
+        return jsonify(song_requests.queue(request.args.get('station')))
+
+    body = request.get_json(silent=True) or {}
+    station = stations.get(body.get('station') or stations.default.id)
+    if station is None:
+        return jsonify({'error': 'Unknown station'}), 404
+    tracks = get_tracks_cached()
+    if isinstance(body.get('trackId'), int) and 0 <= body['trackId'] < len(tracks):
+        key = track_key(tracks[body['trackId']])
+    else:
+        key = body.get('track')
+    index = station.clock.index_of(key) if key else None
+    if index is None:
+        return jsonify({'error': 'Track not found on this station'}), 404
+    title = station.clock.tracks[index].get('title', 'Unknown')
+
+    try:
+        record, done, duplicate = song_requests.submit(
+            station.id, key, title, str(body.get('requester') or 'anonymous')[:64], listener_id(),
+            source=request.remote_addr)
+    except RateLimited as e:
+        SONG_REQUESTS.labels('rate_limited').inc()
+        res = jsonify({'error': str(e)})
+        res.headers['Retry-After'] = str(int(e.retry_after) + 1)
+        return res, 429
+    if duplicate:
+        SONG_REQUESTS.labels('duplicate').inc()
+        return jsonify({'request': record, 'duplicate': True})
+    SONG_REQUESTS.labels('accepted').inc()
+    # Acknowledge once durable; the writer batches concurrent requests into one fsync
+    if done.wait(DURABLE_TIMEOUT) and not done.durable:
+        return jsonify({'error': 'Request could not be saved', 'request': record, 'durable': False}), 503
+    return jsonify({'request': record, 'durable': done.durable}), 201
+
+
+@app.route('/api/requests/<request_id>/<action>', methods=['POST'])
+def api_request_status(request_id, action):
+    """Approve or reject a request (admin only; see is_admin)."""
+    status = {'approve': 'approved', 'reject': 'rejected'}.get(action)
+    if song_requests is None or status is None:
+        abort(404)
+    if not is_admin():
+        return jsonify({'error': 'Admin only'}), 403
+    try:
+        record = song_requests.set_status(request_id, status)
+    except InvalidTransition as e:
+        return jsonify({'error': str(e)}), 409
+    if record is None:
+        abort(404)
+    return jsonify(record)
+
+
+@app.route('/api/time', methods=['GET'])
+def api_time():
+    """
+    NTP-style timestamps for timesync.py: t1 when the request was handled,
+    t2 just before replying (epoch ms), and the client's ?t0= echoed back.
+    """
+    t1 = time.time()
+    t0 = request.args.get('t0', type=int)
+    body = {'t0': t0, 't1': round(t1 * 1000, 3), 't2': round(time.time() * 1000, 3)}
+    res = jsonify(body)
+    res.headers['Cache-Control'] = 'no-store'
+    return res
+
+
+# Server-sent events: one bounded queue per connected /api/events client
+EVENT_KEEPALIVE = 15.0      # seconds between comment lines on an idle stream
+EVENT_BACKLOG = 16          # events a slow client may fall behind before losing some
+_event_queues = set()
+_event_lock = threading.Lock()
+
+
+def publish_event(kind, data):
+    """Send `data` as a `kind` event to every /api/events client."""
+    message = f'event: {kind}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'.encode('utf-8')
+    with _event_lock:
+        for q in _event_queues:
+            try:
+                q.put_nowait(message)
+            except queue.Full:
+                pass    # the client re-fetches on its next event or poll anyway
+
+
+@app.route('/api/events', methods=['GET'])
+def api_events():
+    """
+    Event stream (text/event-stream). Starts with the current `catalog`
+    version; another `catalog` event {version, count, changed} follows each
+    rebuild, so clients re-fetch /api/tracks only when it changed.
+    """
+    q = queue.Queue(maxsize=EVENT_BACKLOG)
+    _, etag = tracks_payload()
+    q.put(f'event: catalog\ndata: {json.dumps({"version": etag, "count": len(get_tracks_cached())})}\n\n'
+          .encode('utf-8'))
+    with _event_lock:
+        _event_queues.add(q)
+    EVENT_SUBSCRIBERS.inc()
+
+    def stream():
+        try:
+            while True:
+                try:
+                    yield q.get(timeout=EVENT_KEEPALIVE)
+                except queue.Empty:
+                    yield b': keepalive\n\n'
+        finally:
+            with _event_lock:
+                _event_queues.discard(q)
+            EVENT_SUBSCRIBERS.dec()
+
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+WATCH_LOUDNESS_WORKERS = int(os.getenv('RADIO_WATCH_LOUDNESS_WORKERS', 1))
+_loudness_pool = None
+
+
+def loudness_pool():
+    """
+    One long-lived process pool for watch-mode loudness analysis. Workers
+    are spawned, not forked: forking a multithreaded server copies locks
+    held by other threads into the child.
+    """
+    global _loudness_pool
+    if _loudness_pool is None:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        _loudness_pool = ProcessPoolExecutor(max_workers=WATCH_LOUDNESS_WORKERS,
+                                             mp_context=multiprocessing.get_context('spawn'))
+        atexit.register(_loudness_pool.shutdown, cancel_futures=True)
+    return _loudness_pool
+
+
+def start_watcher(rebuild_catalog=False):
+    """
+    Watch music/: changed files are re-checked in the audio index and, with
+    `rebuild_catalog` (RADIO_WATCH=1), rebuilt into the live track list.
+
+    The catalog event goes out as soon as the changed files are probed;
+    loudness analysis (RADIO_WATCH_LOUDNESS, default on) runs afterwards in
+    loudness_pool() and publishes a second event when the gains are in.
+    """
+    from watcher import LibraryWatcher
+    loudness = os.getenv('RADIO_WATCH_LOUDNESS', '1') != '0'
+
+    def publish(tracks, names, t0, what, before):
+        set_tracks(tracks)
+        _, etag = tracks_payload()
+        if etag == before:
+            return      # e.g. nothing needed analysing
+        CATALOG_REBUILDS.inc()
+        publish_event('catalog', {'version': etag, 'count': len(tracks), 'changed': sorted(names)})
+        logger.info(f'[Watch] {len(names)} changed file(s) {what} in '
+                    f'{time.perf_counter() - t0:.2f}s; {len(tracks)} tracks')
+
+    def rebuild(names):
+        if _audio_index is not None:
+            _audio_index.invalidate(names)
+        if not rebuild_catalog:
+            return
+        from build import build
+        t0, before = time.perf_counter(), tracks_payload()[1]
+        tracks = build(only=names, loudness=False, root=str(ROOT))
+        publish(tracks, names, t0, 'rebuilt', before)
+        if loudness:
+            t0, before = time.perf_counter(), tracks_payload()[1]
+            tracks = build(only=(), loudness=True, root=str(ROOT), pool=loudness_pool(), analyse=names)
+            publish(tracks, names, t0, 'analysed', before)
+
+    return LibraryWatcher(MUSIC_DIR, rebuild).start()
+
+
+def valid_hashes(values):
+    return [h for h in values if isinstance(h, str) and SHA256.match(h)]
+
+
+@app.route('/api/peers', methods=['GET', 'POST'])
+def api_peers():
+    """
+    LAN peer cache registry (see peer_cache.py).
+
+    POST {id, url, tracks: [sha256...]} (full list) or {id, url, add: [...]}
+    registers a peer until it has been silent for PEER_TTL. GET ?track=<sha256>
+    (&exclude=<own id>) returns {peers: [urls], fetching}; plain GET lists peers.
+    """
+    if request.method == 'POST':
+        body = request.get_json(silent=True) or {}
+        peer_id, url = body.get('id'), body.get('url')
+        tracks, add = body.get('tracks'), body.get('add') or []
+        if (not isinstance(peer_id, str) or not isinstance(url, str)
+                or not url.startswith(('http://', 'https://'))
+                or not isinstance(add, list) or not (tracks is None or isinstance(tracks, list))):
+            return jsonify({'error': 'Expected {id, url, tracks or add}'}), 400
+        peer_directory.announce(peer_id[:64], url[:256],
+                                None if tracks is None else valid_hashes(tracks), valid_hashes(add))
+        return jsonify({'ok': True, 'ttl': peer_directory.ttl})
+
+    sha = request.args.get('track')
+    if sha is None:
+        return jsonify(peer_directory.summary())
+    result = peer_directory.lookup(sha, request.args.get('exclude'))
+    PEER_LOOKUPS.labels('hit' if result['peers'] else 'wait' if result['fetching'] else 'miss').inc()
+    return jsonify(result)
+
+
+@app.route('/api/telemetry', methods=['GET', 'POST'])
+def api_telemetry():
+    """
+    Playback telemetry from Pi clients (see telemetry.py).
+
+    POST {client, events: [...], dropped} to ingest a batch; GET returns the
+    per-client rollup (optionally ?client=<id>).
+    """
+    if request.method == 'POST':
+        batch = request.get_json(silent=True)
+        if not isinstance(batch, dict):
+            batch = {}
+        events = batch.get('events')
+        if not batch.get('client') or not isinstance(events, list):
+            return jsonify({'error': 'Expected {client, events: [...]}'}), 400
+        accepted = telemetry_rollup.ingest(batch['client'], events, batch.get('dropped', 0))
+        return jsonify({'ok': True, 'received': len(events), 'accepted': accepted})
+
+    return jsonify(telemetry_rollup.summary(request.args.get('client')))
+
+
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint."""
     return jsonify({
         'status': 'ok',
-        'tracks': len(get_tracks_cached()),
+        'tracks': len(get_catalog()),
         'music_dir_exists': MUSIC_DIR.exists(),
-        'tracks_file_exists': TRACKS_FILE.exists()
+        'tracks_file_exists': TRACKS_FILE.exists(),
+        'proxy_cache': proxy_cache.stats() if proxy_cache else None,
+        'audio_index': _audio_index.stats() if _audio_index else None
     })
 
 
-@app.route('/', methods=['GET'])
-def dashboard():
-    """Simple HTML dashboard showing server status and available tracks."""
-    tracks = get_tracks_cached()
-    tracks_html = ''.join(
-        f'<li>{t.get("title", "Unknown")} ({t.get("selectedBy", "?")})</li>'
-        for t in tracks[:10]
-    )
-    more = f'<p>... and {len(tracks) - 10} more</p>' if len(tracks) > 10 else ''
-    
-    html = f"""
+# Fingerprinted web player assets (see assets.py)
+IMMUTABLE = 'public, max-age=31536000, immutable'
+ENCODING_SUFFIX = {'br': '.br', 'gzip': '.gz'}
+_assets = (None, None)   # (manifest.json mtime, manifest)
+
+def asset_manifest(refresh=False):
+    """dist/manifest.json, re-read (if it changed) only when `refresh` is set."""
+    global _assets
+    mtime, manifest = _assets
+    if refresh or manifest is None:
+        path = DIST_DIR / 'manifest.json'
+        try:
+            current = path.stat().st_mtime
+            if current != mtime:
+                manifest = json.loads(path.read_text(encoding='utf-8'))
+                _assets = (current, manifest)
+        except (OSError, ValueError) as e:
+            if manifest is None:
+                logger.warning(f'No web player assets ({e}); run assets.py')
+    return manifest
+
+
+def send_asset(name, cache_control):
+    """
+    Serve dist/<name>, choosing its precompressed .br or .gz variant when the
+    client accepts it. Only names listed in the manifest are served.
+    """
+    manifest = asset_manifest(refresh=cache_control != IMMUTABLE)
+    encodings = manifest['encodings'].get(name) if manifest else None
+    if encodings is None:
+        abort(404)
+    encoding = next((e for e in ('br', 'gzip') if e in encodings and request.accept_encodings[e]), None)
+    path = DIST_DIR / (name + ENCODING_SUFFIX[encoding] if encoding else name)
+    response = send_file(path, mimetype=mimetypes.guess_type(name)[0] or 'application/octet-stream',
+                         conditional=True)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if encodings:
+        response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+
+@app.route('/player', methods=['GET'])
+def player():
+    """The web player; revalidated on every load since it names the current assets."""
+    return send_asset('index.html', 'no-cache')
+
+
+@app.route('/assets/<path:name>', methods=['GET'])
+def asset(name):
+    return send_asset(f'assets/{name}', IMMUTABLE)
+
+
+@app.route('/tracks.json', methods=['GET'])
+def player_tracks():
+    """tracks.json for the player's local mode (same body and ETag as /api/tracks)."""
+    return api_tracks()
+
+
+# Compiled on first use, then only rendered; autoescaped since titles are user data
+DASHBOARD_TEMPLATE = """
     <!DOCTYPE html>
     <html>
     <head>
         <title>Radio Server</title>
         <style>
-            body {{ font-family: sans-serif; margin: 20px; }}
-            .status {{ background: #e8f5e9; padding: 10px; border-radius: 5px; }}
-            .error {{ background: #ffebee; color: #c62828; }}
-            ul {{ max-height: 300px; overflow-y: auto; }}
+            body { font-family: sans-serif; margin: 20px; }
+            .status { background: #e8f5e9; padding: 10px; border-radius: 5px; }
+            .error { background: #ffebee; color: #c62828; }
+            ul { max-height: 300px; overflow-y: auto; }
         </style>
     </head>
     <body>
         <h1>Radio Server</h1>
         <div class="status">
             <p><strong>Status:</strong> Running ✓</p>
-            <p><strong>Tracks loaded:</strong> {len(tracks)}</p>
-            <p><strong>Music directory:</strong> {MUSIC_DIR}</p>
+            <p><strong>Tracks loaded:</strong> {{ count }}</p>
+            <p><strong>Music directory:</strong> {{ music_dir }}</p>
         </div>
         <h2>API Endpoints</h2>
         <ul>
             <li><code>GET /api/tracks</code> — List all tracks</li>
+            <li><code>GET /api/tracks/version</code> — Catalog version for change polling</li>
             <li><code>GET /api/audio/&lt;id&gt;</code> — Stream MP3 by index</li>
             <li><code>GET /health</code> — Health check</li>
             <li><code>GET /api/state</code> — Get playback state</li>
+            <li><code>GET /api/schedule</code> — Upcoming tracks with start times</li>
+            <li><code>GET /api/stations</code> — Stations, listeners and now playing</li>
+            <li><code>GET /api/requests</code> — Queued song requests</li>
+            <li><code>GET /api/time</code> — Server clock for client time sync</li>
+            <li><code>GET /api/events</code> — Catalog change notifications (SSE)</li>
+            <li><code>GET /api/peers</code> — Pi clients sharing their caches</li>
+            <li><code>GET /player</code> — Web player (built by assets.py)</li>
+            <li><code>GET /api/telemetry</code> — Per-client playback telemetry</li>
+            <li><code>GET /metrics</code> — Prometheus metrics</li>
         </ul>
         <h2>Sample Tracks (first 10)</h2>
         <ul>
-            {tracks_html}
+            {% for t in tracks %}<li>{{ t.get("title", "Unknown") }} ({{ t.get("selectedBy", "?") }})</li>{% endfor %}
         </ul>
-        {more}
+        {% if count > 10 %}<p>... and {{ count - 10 }} more</p>{% endif %}
     </body>
     </html>
-    """
-    return render_template_string(html)
+"""
+_dashboard = None
+
+
+@app.route('/', methods=['GET'])
+def dashboard():
+    """Simple HTML dashboard showing server status and available tracks."""
+    global _dashboard
+    if _dashboard is None:
+        _dashboard = app.jinja_env.from_string(DASHBOARD_TEMPLATE)
+    tracks = get_catalog()
+    return _dashboard.render(tracks=tracks[:10], count=len(tracks), music_dir=MUSIC_DIR)
 
 
 @app.errorhandler(404)
@@ -214,11 +889,20 @@ def server_error(e):
 
 
 if __name__ == '__main__':
+    profiling.start_from_env('server')
+
     # Local development: bind to 127.0.0.1:5000
     # For LAN access from other machines, set host='0.0.0.0'
     host = os.getenv('FLASK_HOST', '127.0.0.1')
     port = int(os.getenv('FLASK_PORT', 5000))
     debug = os.getenv('FLASK_ENV', 'development') == 'development'
     
+    # With the debug reloader only the child process (WERKZEUG_RUN_MAIN) serves
+    serving = not debug or os.getenv('WERKZEUG_RUN_MAIN') == 'true'
+    if os.getenv('RADIO_STATION', '1') != '0' and serving:
+        start_stations()
+    if MUSIC_DIR.exists() and serving:
+        start_watcher(rebuild_catalog=os.getenv('RADIO_WATCH', '0') == '1')
+
     logger.info(f'Starting server on {host}:{port} (debug={debug})')
     app.run(host=host, port=port, debug=debug, threaded=True)
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Listener song requests: an append-only log plus an in-memory index.
+
+Requests live in requests.jsonl (RADIO_REQUESTS_FILE overrides the path),
+one JSON record per line:
+
+    {"kind": "request", "id": "...", "ts": ms, "station": "main",
+     "track": "<track key>", "title": "...", "requester": "...", "client": "..."}
+    {"kind": "status", "id": "...", "ts": ms, "status": "approved"}
+
+Statuses go pending -> approved -> played, or pending (or approved) ->
+rejected; nothing else, so a finished request is never revived. Lines
+without a known `kind` (or that are not JSON) belong to someone else and
+are skipped on load and carried over verbatim by compaction.
+
+Durability uses group commit: append() queues the line and returns a
+Batch (an Event); a single writer thread gathers everything queued within
+COMMIT_INTERVAL, writes it with one write() and one fsync(), then sets the
+Batch, recording the error on it if the write failed. A burst of thousands of requests costs a few dozen fsyncs,
+and the request threads never hold a lock across disk I/O, so audio
+responses are never queued behind the log.
+
+The index answers the hot questions in O(1): is this track already queued
+for this station (dedupe), has this source hit its rate limit (a sliding
+window per source; server.py passes the remote address), and what is the next approved request (a FIFO per
+station). When more than half the log is superseded records, the writer
+rewrites it with only the live requests (compaction) between batches.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from pathlib import Path
+
+COMMIT_INTERVAL = 0.01      # seconds a batch stays open for more lines
+RATE_LIMIT = 3              # requests per source ...
+RATE_WINDOW = 600.0         # ... per this many seconds
+COMPACT_MIN_LINES = 1000    # never compact smaller logs
+DURABLE_TIMEOUT = 2.0       # how long a POST waits for its fsync
+
+PENDING, APPROVED, REJECTED, PLAYED = 'pending', 'approved', 'rejected', 'played'
+STATUSES = (PENDING, APPROVED, REJECTED, PLAYED)
+LIVE = (PENDING, APPROVED)
+TRANSITIONS = {PENDING: (APPROVED, REJECTED), APPROVED: (REJECTED, PLAYED)}
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f'Too many requests; retry in {retry_after:.0f}s')
+        self.retry_after = retry_after
+
+
+class InvalidTransition(Exception):
+    def __init__(self, current, status):
+        super().__init__(f'Cannot change a {current} request to {status}')
+        self.current = current
+        self.status = status
+
+
+class Batch(threading.Event):
+    """Set once a group commit is finished; `error` is the OSError if it failed."""
+
+    def __init__(self):
+        super().__init__()
+        self.error = None
+
+    @property
+    def durable(self):
+        return self.is_set() and self.error is None
+
+
+class RequestLog:
+    """Append-only JSONL file with a group-commit writer thread."""
+
+    def __init__(self, path, commit_interval=COMMIT_INTERVAL):
+        self.path = Path(path)
+        self.commit_interval = commit_interval
+        self.commits = 0
+        self.lines_written = 0
+        self._cond = threading.Condition()
+        self._queue = []
+        self._batch_done = Batch()
+        self._compact = None        # callable returning the live lines, set by compact()
+        self._stop = False
+        self._file = None
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+            self._thread = threading.Thread(target=self._run, name='request-log', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def append(self, record):
+        """Queue `record`; the returned Batch is set once it is on disk (or failed)."""
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+        with self._cond:
+            self._queue.append(line)
+            done = self._batch_done
+            self._cond.notify()
+        return done
+
+    def compact(self, lines):
+        """Ask the writer to replace the file with `lines()` before its next batch."""
+        with self._cond:
+            self._compact = lines
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._compact and not self._stop:
+                    self._cond.wait()
+                if self._stop and not self._queue:
+                    break
+            if self.commit_interval:
+                time.sleep(self.commit_interval)    # let the batch fill
+            with self._cond:
+                lines, self._queue = self._queue, []
+                done, self._batch_done = self._batch_done, Batch()
+                compact, self._compact = self._compact, None
+            try:
+                if lines:
+                    self._file.write('\n'.join(lines) + '\n')
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+                    self.commits += 1
+                    self.lines_written += len(lines)
+            except OSError as e:
+                logger.error(f'[Requests] Writing {self.path} failed: {e}')
+                done.error = e
+            done.set()
+            try:
+                if compact:
+                    self._rewrite(compact())
+            except OSError as e:
+                logger.error(f'[Requests] Compacting {self.path} failed: {e}')
+        self._file.close()
+
+    def _rewrite(self, lines):
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.writelines(line + '\n' for line in lines)
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        os.replace(tmp, self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        logger.info(f'[Requests] Compacted {self.path.name} to {len(lines)} lines')
+
+
+class SongRequests:
+    """Index over the request log: dedupe, rate limits and per-station queues."""
+
+    def __init__(self, path, rate_limit=RATE_LIMIT, rate_window=RATE_WINDOW,
+                 auto_approve=False, commit_interval=COMMIT_INTERVAL):
+        self.log = RequestLog(path, commit_interval)
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.auto_approve = auto_approve
+        self.requests = OrderedDict()   # id -> record with its current status
+        self._queued = {}               # (station, track key) -> id, while live
+        self._approved = {}             # station -> deque of ids, approval order
+        self._recent = {}               # source -> deque of submit times (monotonic)
+        self._foreign = []              # other lines in the file, kept verbatim
+        self._lines = 0                 # our lines in the file
+        self._live = 0                  # pending + approved requests
+        self._lock = threading.Lock()
+        self._load()
+
+    def start(self):
+        self.log.start()
+        return self
+
+    def stop(self):
+        self.log.stop()
+
+    def _load(self):
+        try:
+            f = open(self.log.path, encoding='utf-8')
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                line = line.rstrip('\n')
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                kind = record.get('kind') if isinstance(record, dict) else None
+                if kind == 'request' and record.get('id'):
+                    record.setdefault('status', PENDING)
+                    self._index(record)
+                elif kind == 'status':
+                    # may refer to a request compaction already dropped
+                    if record.get('id') in self.requests:
+                        self._set_status(self.requests[record['id']], record.get('status'))
+                else:
+                    self._foreign.append(line)
+                    continue
+                self._lines += 1
+        if self.requests or self._foreign:
+            logger.info(f'[Requests] Loaded {len(self.requests)} requests '
+                        f'({len(self._foreign)} other lines kept)')
+
+    def _index(self, record):
+        previous = self.requests.get(record['id'])
+        if previous is not None and previous['status'] in LIVE:
+            self._live -= 1     # re-logged around a compaction; the later line wins
+        self.requests[record['id']] = record
+        if record['status'] in LIVE:
+            self._live += 1
+            self._queued[(record['station'], record['track'])] = record['id']
+        if record['status'] == APPROVED:
+            self._approved.setdefault(record['station'], deque()).append(record['id'])
+
+    def _set_status(self, record, status):
+        """Apply `status` if TRANSITIONS allows it; returns whether it did."""
+        if status not in TRANSITIONS.get(record['status'], ()):
+            return False
+        if record['status'] in LIVE and status not in LIVE:
+            self._live -= 1
+        record['status'] = status
+        if status == APPROVED:
+            self._approved.setdefault(record['station'], deque()).append(record['id'])
+        elif status not in LIVE:
+            self._queued.pop((record['station'], record['track']), None)
+        return True
+
+    def _append(self, record):
+        self._lines += 1
+        done = self.log.append(record)
+        if self._lines > COMPACT_MIN_LINES and self._lines > 2 * self._live:
+            self._lines = self._live
+            self.log.compact(self._snapshot)
+        return done
+
+    def _snapshot(self):
+        """
+        Lines of a compacted log: foreign lines, then live requests with their
+        status. Runs on the writer thread; finished requests and idle rate
+        limit windows are forgotten here too.
+        """
+        cutoff = time.monotonic() - self.rate_window
+        with self._lock:
+            live = [r for r in self.requests.values() if r['status'] in LIVE]
+            for record in [r for r in self.requests.values() if r['status'] not in LIVE]:
+                del self.requests[record['id']]
+            for source in [c for c, times in self._recent.items() if times[-1] < cutoff]:
+                del self._recent[source]
+        return self._foreign + [json.dumps(dict(r, kind='request'), ensure_ascii=False,
+                                           separators=(',', ':')) for r in live]
+
+    def submit(self, station, track_key, title, requester, client, now=None, source=None):
+        """
+        Record a request. Returns (record, batch, duplicate); `batch.durable`
+        tells, once set, whether the record reached the disk.
+
+        A track already pending or approved on `station` returns the existing
+        record with duplicate=True and writes nothing. The rate limit counts
+        requests per `source` (default `client`). Raises RateLimited.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            existing = self._queued.get((station, track_key))
+            if existing:
+                done = Batch()
+                done.set()
+                return self.requests[existing], done, True
+
+            recent = self._recent.setdefault(source or client, deque(maxlen=self.rate_limit))
+            if len(recent) == self.rate_limit and now - recent[0] < self.rate_window:
+                raise RateLimited(self.rate_window - (now - recent[0]))
+            recent.append(now)
+
+            record = {
+                'kind': 'request',
+                'id': uuid.uuid4().hex[:12],
+                'ts': int(time.time() * 1000),
+                'station': station,
+                'track': track_key,
+                'title': title,
+                'requester': requester,
+                'client': client,
+                'status': APPROVED if self.auto_approve else PENDING,
+            }
+            self._index(record)
+            return record, self._append(record), False
+
+    def set_status(self, request_id, status):
+        """
+        Approve or reject a request (admin). Returns the record, or None if
+        unknown; raises InvalidTransition if TRANSITIONS does not allow it.
+        """
+        with self._lock:
+            record = self.requests.get(request_id)
+            if record is None:
+                return None
+            if record['status'] != status:
+                if not self._set_status(record, status):
+                    raise InvalidTransition(record['status'], status)
+                self._append({'kind': 'status', 'id': request_id,
+                              'ts': int(time.time() * 1000), 'status': status})
+            return record
+
+    def pop_approved(self, station, index_of):
+        """
+        Next approved request for `station` whose track `index_of(key)` can
+        resolve (None otherwise); it is marked played. Requests for tracks
+        no longer in the catalog are dropped.
+        """
+        with self._lock:
+            queue = self._approved.get(station)
+            while queue:
+                record = self.requests.get(queue.popleft())
+                if record is None or record['status'] != APPROVED:
+                    continue    # rejected or compacted after approval
+                index = index_of(record['track'])
+                self._set_status(record, PLAYED)
+                self._append({'kind': 'status', 'id': record['id'],
+                              'ts': int(time.time() * 1000), 'status': PLAYED})
+                if index is not None:
+                    return record, index
+            return None
+
+    def queue(self, station=None):
+        """Live requests (pending and approved), oldest first."""
+        with self._lock:
+            return [dict(r) for r in self.requests.values()
+                    if r['status'] in LIVE and (station is None or r['station'] == station)]
+
+    def stats(self):
+        return {
+            'requests': len(self.requests),
+            'approved': sum(len(q) for q in self._approved.values()),
+            'commits': self.log.commits,
+            'linesWritten': self.log.lines_written,
+        }
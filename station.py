@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Station clock: the single authority on what is playing.
+
+One StationClock per station picks tracks with scheduler.py, advances on a
+timer driven by each track's `duration` (from build.py), and publishes the
+new state exactly once per transition to its sinks: server.py's /api/state
+and, when configured, Firebase `radio/state`. Listeners (radio.js,
+pi_radio_client.py) only read; none of them write state any more.
+
+Deadlines are computed from the previous scheduled start rather than from
+when the timer fired, so the clock does not drift over a day of tracks. If
+the process was suspended for longer than a track, the clock resyncs to
+the present instead of replaying missed transitions.
+
+State written per transition:
+
+    currentTrackIndex   index into the station's catalog
+    trackId             index into tracks.json (for /api/audio/<id>); the
+                        same as currentTrackIndex unless the catalog is a
+                        stations.StationView
+    startTime           epoch milliseconds the track started
+    duration            seconds
+    track               the track object itself
+    nextTrackIndex      what the rotation plays next (a request may come first)
+    request             {id, requester} when a listener request is playing
+    transition          counter, increases by one per track
+    lastUpdated         ISO timestamp
+
+`schedule(n)` returns the current and upcoming tracks with start times
+(/api/schedule).
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from scheduler import Scheduler, track_key, track_keys
+
+DEFAULT_DURATION = 180.0    # for tracks built before durations were recorded
+LOOKAHEAD = 10
+RESYNC_AFTER = 5.0          # seconds behind schedule before jumping to now
+
+logger = logging.getLogger(__name__)
+
+
+def track_duration(track):
+    """Seconds the track is on air: between its gapless trim points when build.py set them."""
+    try:
+        if track.get('trimEnd'):
+            duration = float(track['trimEnd']) - float(track.get('trimStart') or 0)
+        else:
+            duration = float(track.get('duration') or 0)
+    except (TypeError, ValueError):
+        duration = 0
+    return duration if duration > 0 else DEFAULT_DURATION
+
+
+class StationClock:
+    """Advances tracks on a timer and publishes each transition once."""
+
+    def __init__(self, get_tracks, sinks=(), seed='radio', weights=None,
+                 lookahead=LOOKAHEAD, clock=time.time, name='station', requests=None):
+        self.get_tracks = get_tracks
+        self.sinks = list(sinks)
+        self.seed = seed
+        self.weights = weights
+        self.lookahead = lookahead
+        self.clock = clock
+        self.name = name
+        self.requests = requests    # song_requests.SongRequests, consulted per transition
+        self.tracks = None
+        self._keys = None           # track key -> index, built on first request
+        self.scheduler = None
+        self.upcoming = deque()
+        self.state = None
+        self.transitions = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f'{self.name}-clock', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    def _sync_catalog(self):
+        """Pick up a changed catalog, keeping history and remapping upcoming picks."""
+        tracks = self.get_tracks()
+        if tracks is self.tracks:
+            return
+        if self.scheduler is None:
+            self.scheduler = Scheduler(tracks, seed=self.seed, weights=self.weights)
+        else:
+            old_keys = track_keys(self.tracks)
+            keys = [old_keys[i] for i in self.upcoming]
+            self.scheduler.update(tracks)
+            index = {key: i for i, key in enumerate(track_keys(tracks))}
+            self.upcoming = deque(index[k] for k in keys if k in index)
+        self.tracks = tracks
+        self._keys = None
+
+    def index_of(self, key):
+        """Index of the track with track_key() `key` in the current catalog, or None."""
+        tracks, keys = self.tracks, self._keys
+        if tracks is None:
+            return None
+        if keys is None:
+            keys = self._keys = {track_key(t): i for i, t in enumerate(tracks)}
+        return keys.get(key)
+
+    def _track_id(self, index):
+        catalog_index = getattr(self.tracks, 'catalog_index', None)
+        return catalog_index(index) if catalog_index else index
+
+    def _advance(self, now):
+        """Move to the next track and return the new state (caller publishes)."""
+        with self._lock:
+            self._sync_catalog()
+            if not self.tracks:
+                return None
+            while len(self.upcoming) < self.lookahead + 1:
+                self.upcoming.append(self.scheduler.next())
+            # An approved listener request plays before the rotation continues
+            request = self.requests.pop_approved(self.name, self.index_of) if self.requests else None
+            if request:
+                record, index = request
+            else:
+                index = self.upcoming.popleft()
+            track = self.tracks[index]
+
+            start = now
+            if self.state:
+                scheduled = self.state['startTime'] / 1000 + self.state['duration']
+                if now - scheduled < RESYNC_AFTER:
+                    start = scheduled
+            self.transitions += 1
+            self.state = {
+                'currentTrackIndex': index,
+                'trackId': self._track_id(index),
+                'startTime': int(start * 1000),
+                'duration': track_duration(track),
+                'track': track,
+                'nextTrackIndex': self.upcoming[0] if self.upcoming else None,
+                'transition': self.transitions,
+                'request': {'id': record['id'], 'requester': record['requester']} if request else None,
+                'lastUpdated': datetime.now(timezone.utc).isoformat(),
+            }
+            return self.state, self.tracks
+
+    def _publish(self, state, tracks):
+        title = state['track'].get('title', 'Unknown')
+        logger.info(f'[{self.name}] #{state["transition"]} now playing {title} '
+                    f'({state["duration"]:.0f}s)')
+        for sink in self.sinks:
+            try:
+                sink(state, tracks)
+            except Exception as e:
+                logger.error(f'[{self.name}] Sink {sink!r} failed: {e}')
+
+    def _run(self):
+        while not self._stop.is_set():
+            result = self._advance(self.clock())
+            if result is None:
+                # No catalog yet: check again shortly
+                self._stop.wait(5)
+                continue
+            self._publish(*result)
+            deadline = self.state['startTime'] / 1000 + self.state['duration']
+            # Event.wait can return early or late by a few ms; re-arm until due
+            while not self._stop.is_set():
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    break
+                self._stop.wait(remaining)
+
+    def schedule(self, count=LOOKAHEAD):
+        """Current track plus up to `count` upcoming ones, with start times."""
+        with self._lock:
+            if not self.state:
+                return []
+            state, tracks = self.state, self.tracks
+            entries = [{
+                'index': state['currentTrackIndex'],
+                'trackId': state['trackId'],
+                'track': state['track'],
+                'startTime': state['startTime'],
+                'duration': state['duration'],
+            }]
+            start = state['startTime'] / 1000 + state['duration']
+            for index in list(self.upcoming)[:count]:
+                track = tracks[index]
+                entries.append({
+                    'index': index,
+                    'trackId': self._track_id(index),
+                    'track': track,
+                    'startTime': int(start * 1000),
+                    'duration': track_duration(track),
+                })
+                start += track_duration(track)
+            return entries
+
+
+class FirebaseSink:
+    """
+    Writes each transition to Firebase `radio/state` with a single set().
+
+    The catalog goes to `radio/tracks` only when it changes. firebase_admin
+    is imported on first publish, so servers without it configured never
+    pay for the import.
+    """
+
+    def __init__(self, config_path, prefix='radio'):
+        self.config_path = config_path
+        self.prefix = prefix
+        self._db = None
+        self._tracks = None
+
+    def __repr__(self):
+        return f'FirebaseSink({self.config_path!r})'
+
+    def _connect(self):
+        import json
+        import firebase_admin
+        from firebase_admin import db
+        with open(self.config_path) as f:
+            config = json.load(f)
+        if not firebase_admin._apps:
+            firebase_admin.initialize_app(options={'databaseURL': config['databaseURL']})
+        self._db = db
+
+    def __call__(self, state, tracks):
+        if self._db is None:
+            self._connect()
+        if tracks is not self._tracks:
+            self._db.reference(f'{self.prefix}/tracks').set(list(tracks))
+            self._tracks = tracks
+        self._db.reference(f'{self.prefix}/state').set(state)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Several stations on one server.py, sharing one in-memory track index.
+
+Stations are defined in stations.json (RADIO_STATIONS_FILE overrides the
+path); without it there is a single station, "main", playing everything:
+
+    {
+        "main":   {"name": "Everything"},
+        "lounge": {"name": "Lounge", "curators": ["alice", "bob"], "weights": "alice=2"},
+        "rock":   {"name": "Rock", "match": {"genre": "rock"}, "seed": "rock-1"}
+    }
+
+A station's catalog is a StationView: an array('I') of indices into the
+shared track list, so adding a station costs 4 bytes per track it plays
+plus its scheduler's per-track arrays, never another copy of the library.
+Views are rebuilt only when the shared list changes (build.py rewrote
+tracks.json).
+
+Selection keys (all optional, combined with AND; none means every track):
+    curators   list of selectedBy names
+    artists    list of artist names (see scheduler.artist_of)
+    match      {field: value or [values]}, case-insensitive
+    tracks     list of track keys (sha256, file or title)
+
+Each station has its own StationClock, state and listener count. The first
+station is the default one behind /api/state and /api/schedule and
+publishes to Firebase `radio/`; the others publish to `radio/stations/<id>/`.
+"""
+
+import json
+import threading
+import time
+from array import array
+from collections.abc import Sequence
+from pathlib import Path
+
+from scheduler import artist_of, curator_of, parse_weights, track_key
+from station import StationClock
+
+LISTENER_TTL = 90.0     # seconds a listener counts after its last poll
+
+
+class StationView(Sequence):
+    """A station's playlist: the shared track list seen through an index array."""
+
+    def __init__(self, tracks, indices):
+        self.tracks = tracks
+        self.indices = array('I', indices)
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.tracks[j] for j in self.indices[i]]
+        return self.tracks[self.indices[i]]
+
+    def catalog_index(self, i):
+        """Index of playlist entry `i` in the shared list (for /api/audio/<id>)."""
+        return self.indices[i]
+
+
+def _lower_set(values):
+    if isinstance(values, str):
+        values = [values]
+    return {str(v).strip().lower() for v in values}
+
+
+def select(tracks, spec):
+    """Indices of the tracks in `tracks` that station `spec` plays."""
+    curators = _lower_set(spec['curators']) if 'curators' in spec else None
+    artists = _lower_set(spec['artists']) if 'artists' in spec else None
+    keys = set(spec['tracks']) if 'tracks' in spec else None
+    match = {field: _lower_set(values) for field, values in spec.get('match', {}).items()}
+
+    def wanted(track):
+        if curators is not None and curator_of(track) not in curators:
+            return False
+        if artists is not None and artist_of(track) not in artists:
+            return False
+        if keys is not None and track_key(track) not in keys:
+            return False
+        return all(str(track.get(field, '')).strip().lower() in values
+                   for field, values in match.items())
+
+    return array('I', (i for i, t in enumerate(tracks) if wanted(t)))
+
+
+class Station:
+    """One channel: a view of the shared catalog, a clock and its listeners."""
+
+    def __init__(self, station_id, spec, get_tracks, sinks=(), seed=None, weights=None,
+                 requests=None):
+        self.id = station_id
+        self.name = spec.get('name', station_id)
+        self.spec = spec
+        self._get_tracks = get_tracks
+        self._source = None
+        self.view = None
+        self._listeners = {}    # client id -> monotonic time last seen
+        self._lock = threading.Lock()
+        if 'weights' in spec:
+            weights = parse_weights(spec['weights'])
+        self.clock = StationClock(self.tracks, sinks, seed=spec.get('seed', seed or station_id),
+                                  weights=weights, name=station_id, requests=requests)
+
+    def tracks(self):
+        """The station's current StationView (rebuilt when the shared list changes)."""
+        source = self._get_tracks()
+        if source is not self._source:
+            self.view = StationView(source, select(source, self.spec))
+            self._source = source
+        return self.view
+
+    def touch(self, client, now=None):
+        with self._lock:
+            self._listeners[client] = time.monotonic() if now is None else now
+
+    def listeners(self, now=None):
+        """Clients seen within LISTENER_TTL (stale entries are dropped)."""
+        cutoff = (time.monotonic() if now is None else now) - LISTENER_TTL
+        with self._lock:
+            for client in [c for c, seen in self._listeners.items() if seen < cutoff]:
+                del self._listeners[client]
+            return len(self._listeners)
+
+    def state(self):
+        """Current clock state tagged with the station id, or None before the first track."""
+        state = self.clock.state
+        return dict(state, station=self.id) if state else None
+
+    def schedule(self, count):
+        return self.clock.schedule(count)
+
+    def info(self):
+        state = self.clock.state
+        return {
+            'id': self.id,
+            'name': self.name,
+            'tracks': len(self.view) if self.view is not None else 0,
+            'listeners': self.listeners(),
+            'nowPlaying': state['track'].get('title') if state else None,
+        }
+
+
+def load_config(path):
+    """Station specs from `path`, or a single all-tracks "main" station."""
+    path = Path(path)
+    if not path.exists():
+        return {'main': {}}
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+    if not isinstance(config, dict) or not config:
+        raise ValueError(f'{path}: expected an object of station definitions')
+    return config
+
+
+class StationRegistry:
+    """All stations of one server, in config order (the first is the default)."""
+
+    def __init__(self, config, get_tracks, sinks_for=lambda station_id, default: (),
+                 seed=None, weights=None, requests=None):
+        self.stations = {}
+        for i, (station_id, spec) in enumerate(config.items()):
+            self.stations[station_id] = Station(
+                station_id, spec, get_tracks, sinks_for(station_id, i == 0),
+                seed=seed if i == 0 else None, weights=weights, requests=requests)
+        self.default = next(iter(self.stations.values()))
+
+    def __iter__(self):
+        return iter(self.stations.values())
+
+    def __len__(self):
+        return len(self.stations)
+
+    def get(self, station_id):
+        return self.stations.get(station_id)
+
+    def start(self):
+        for station in self:
+            station.clock.start()
+        return self
+
+    def stop(self):
+        for station in self:
+            station.clock.stop()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Playback telemetry: client-side event buffer and server-side rollup.
+
+Clients call `telemetry.emit('download', bytes=..., seconds=...)`. Events go
+into a bounded ring buffer (oldest dropped first) and a background thread
+POSTs them in batches to the server's /api/telemetry. Nothing on the
+playback path ever waits on the network.
+
+The server feeds batches into TelemetryRollup, which keeps per-client
+histograms (also exported on /metrics) and counters that /api/telemetry
+returns as JSON, so a fleet of Pis can be compared side by side.
+
+Events:
+    download    track, bytes, seconds, cache_hit
+    play_start  track, ttfa (seconds from track selection to audio start)
+    play_end    track, seconds
+    gap         seconds (silence between the previous track and this one)
+    skip        track, reason
+    play_error  track
+
+The rollup trusts nothing in a batch: events that are not objects, of an
+unknown kind, or with non-numeric fields are skipped. At most MAX_CLIENTS
+client IDs get their own stats and /metrics labels; later ones are pooled
+under OTHER_CLIENT, so no caller can grow /metrics without bound.
+"""
+
+import math
+import os
+import socket
+import threading
+import time
+from collections import deque
+
+import requests
+
+import metrics
+
+FLUSH_INTERVAL = 30.0
+BATCH_SIZE = 200
+CAPACITY = 2000
+MAX_CLIENTS = 256           # distinct client IDs the rollup tracks
+MAX_SKIP_REASONS = 32       # distinct skip reasons kept per client
+OTHER_CLIENT = 'other'
+EVENTS = ('download', 'play_start', 'play_end', 'gap', 'skip', 'play_error')
+
+THROUGHPUT_BUCKETS = tuple(10_000 * 2 ** i for i in range(15))   # 10 kB/s .. 160 MB/s
+
+
+class Telemetry:
+    """Ring-buffered event recorder with periodic batched upload."""
+
+    def __init__(self, server_url, client_id=None, capacity=CAPACITY,
+                 flush_interval=FLUSH_INTERVAL, batch_size=BATCH_SIZE, clock=time.time):
+        self.url = f'{server_url}/api/telemetry'
+        self.client_id = client_id or os.getenv('RADIO_CLIENT_ID') or socket.gethostname()
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.clock = clock
+        self.dropped = 0
+        self._events = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def emit(self, event, **fields):
+        fields['event'] = event
+        fields['ts'] = int(self.clock() * 1000)
+        with self._lock:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+            self._events.append(fields)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='telemetry', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
+
+    def flush(self):
+        """Upload everything buffered; on failure the batch is kept for next time."""
+        while True:
+            with self._lock:
+                batch = [self._events.popleft() for _ in range(min(self.batch_size, len(self._events)))]
+                dropped, self.dropped = self.dropped, 0
+            if not batch:
+                return True
+            try:
+                res = requests.post(self.url, json={
+                    'client': self.client_id, 'dropped': dropped, 'events': batch,
+                }, timeout=5)
+                res.raise_for_status()
+            except Exception as e:
+                print(f'[Telemetry] Upload failed ({len(batch)} events kept): {e}')
+                with self._lock:
+                    room = self._events.maxlen - len(self._events)
+                    self._events.extendleft(reversed(batch[-room:] if room else []))
+                    self.dropped += dropped + len(batch) - min(room, len(batch))
+                return False
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+
+def _number(value):
+    """`value` as a finite, non-negative float, or None."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    value = float(value)
+    return value if math.isfinite(value) and value >= 0 else None
+
+
+class TelemetryRollup:
+    """Server-side aggregation of uploaded events, per client."""
+
+    def __init__(self, registry=metrics.REGISTRY, max_clients=MAX_CLIENTS):
+        self.max_clients = max_clients
+        self._lock = threading.Lock()
+        self._clients = {}
+        self.ttfa = metrics.Histogram('radio_client_ttfa_seconds',
+                                      'Time from track selection to first audio', ('client',), registry)
+        self.throughput = metrics.Histogram('radio_client_download_bytes_per_second',
+                                            'Download throughput of uncached tracks', ('client',),
+                                            registry, buckets=THROUGHPUT_BUCKETS)
+        self.gap = metrics.Histogram('radio_client_gap_seconds',
+                                     'Silence between consecutive tracks', ('client',), registry)
+        self.events = metrics.Counter('radio_client_events_total',
+                                      'Telemetry events received', ('client', 'event'), registry)
+
+    def ingest(self, client, events, dropped=0):
+        """Add a batch; returns how many events were valid and counted."""
+        client = str(client)[:64]
+        accepted = 0
+        with self._lock:
+            if client not in self._clients and len(self._clients) >= self.max_clients:
+                client = OTHER_CLIENT
+            stats = self._clients.setdefault(client, {
+                'events': 0, 'dropped': 0, 'downloads': 0, 'cache_hits': 0,
+                'plays': 0, 'skips': {}, 'last_seen': None,
+            })
+            stats['dropped'] += int(_number(dropped) or 0)
+            for ev in events:
+                kind = ev.get('event') if isinstance(ev, dict) else None
+                if kind not in EVENTS:
+                    continue
+                accepted += 1
+                stats['events'] += 1
+                stats['last_seen'] = max(stats['last_seen'] or 0, _number(ev.get('ts')) or 0)
+                self.events.labels(client, kind).inc()
+                if kind == 'download':
+                    stats['downloads'] += 1
+                    size, seconds = _number(ev.get('bytes')), _number(ev.get('seconds'))
+                    if ev.get('cache_hit'):
+                        stats['cache_hits'] += 1
+                    elif seconds and size:
+                        self.throughput.labels(client).observe(size / seconds)
+                elif kind == 'play_start':
+                    stats['plays'] += 1
+                    ttfa = _number(ev.get('ttfa'))
+                    if ttfa is not None:
+                        self.ttfa.labels(client).observe(ttfa)
+                elif kind == 'gap':
+                    seconds = _number(ev.get('seconds'))
+                    if seconds is not None:
+                        self.gap.labels(client).observe(seconds)
+                elif kind == 'skip':
+                    reason = str(ev.get('reason', 'unknown'))[:64]
+                    skips = stats['skips']
+                    if reason not in skips and len(skips) >= MAX_SKIP_REASONS:
+                        reason = 'other'
+                    skips[reason] = skips.get(reason, 0) + 1
+        return accepted
+
+    def summary(self, client=None):
+        """Per-client rollup with p50/p90/p99 estimates from the histograms."""
+        def quantiles(hist, name):
+            child = hist.labels(name)
+            return {q: child.quantile(float(q[1:]) / 100) for q in ('p50', 'p90', 'p99')}
+
+        with self._lock:
+            names = [client] if client else sorted(self._clients)
+            out = {}
+            for name in names:
+                stats = self._clients.get(name)
+                if stats is None:
+                    continue
+                downloads = stats['downloads']
+                out[name] = dict(
+                    stats,
+                    skips=dict(stats['skips']),
+                    cache_hit_rate=stats['cache_hits'] / downloads if downloads else None,
+                    ttfa_seconds=quantiles(self.ttfa, name),
+                    throughput_bytes_per_second=quantiles(self.throughput, name),
+                    gap_seconds=quantiles(self.gap, name),
+                )
+            return out
@@ -0,0 +1,33 @@
+"""Shared fixtures: a throwaway library served by server.py's Flask app."""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def library(tmp_path, monkeypatch):
+    """tmp_path with music/ holding `count` small local tracks; returns (root, tracks)."""
+    import server
+
+    def make(count=3, size=64 * 1024):
+        music = tmp_path / 'music'
+        music.mkdir()
+        tracks = []
+        for i in range(count):
+            name = f'track-{i:03d}.mp3'
+            (music / name).write_bytes(bytes([i]) * size)
+            tracks.append({'file': f'music/{name}', 'title': f'Track {i}', 'duration': 180})
+        (tmp_path / 'tracks.json').write_text(json.dumps(tracks))
+        monkeypatch.setattr(server, 'TRACKS_FILE', tmp_path / 'tracks.json')
+        monkeypatch.setattr(server, 'CATALOG_FILE', tmp_path / 'tracks.bin')
+        monkeypatch.setattr(server, 'MUSIC_DIR', music)
+        monkeypatch.setattr(server, '_tracks', (None, None))
+        monkeypatch.setattr(server, '_audio_index', None)
+        return tmp_path, tracks
+
+    return make
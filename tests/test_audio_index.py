@@ -0,0 +1,23 @@
+import server
+
+
+def test_head_releases_descriptor(library):
+    library()
+    client = server.app.test_client()
+    for _ in range(3):
+        response = client.head('/api/audio/0')
+        assert response.status_code == 200
+        response.close()
+    audio = server.get_audio_index(server.get_catalog()).lookup(0)
+    assert audio._refs == 0
+
+
+def test_range_request_releases_descriptor(library):
+    library()
+    client = server.app.test_client()
+    response = client.get('/api/audio/1', headers={'Range': 'bytes=0-9'})
+    assert response.status_code == 206
+    assert response.data == bytes([1]) * 10
+    response.close()
+    audio = server.get_audio_index(server.get_catalog()).lookup(1)
+    assert audio._refs == 0
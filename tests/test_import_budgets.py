@@ -0,0 +1,18 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'benchmarks'))
+
+from bench_imports import BUDGETS, check  # noqa: E402
+
+# budgets are for a desktop-class machine; raise this on a Pi or a slow CI runner
+SCALE = float(os.getenv('RADIO_IMPORT_BUDGET_SCALE', '1'))
+
+
+@pytest.mark.parametrize('module', sorted(BUDGETS))
+def test_import_budget(module):
+    _, failures = check(runs=3, scale=SCALE, modules=[module])
+    assert not failures, '; '.join(failures)
@@ -0,0 +1,74 @@
+import io
+import socket
+import threading
+import time
+
+import pytest
+
+from mirrors import MirrorSelector
+
+
+def test_best_now_does_not_wait_for_probes():
+    # accepts connections but never answers, so a HEAD probe hangs until its timeout
+    silent = socket.socket()
+    silent.bind(('127.0.0.1', 0))
+    silent.listen()
+    port = silent.getsockname()[1]
+    urls = [f'http://127.0.0.1:{port}/a.mp3', f'http://localhost:{port}/a.mp3']
+    selector = MirrorSelector()
+    try:
+        t0 = time.monotonic()
+        assert selector.best_now(urls) == urls[0]
+        assert time.monotonic() - t0 < 0.5
+        # the probes are in flight; a second call does not start more
+        assert selector._probing == {f'127.0.0.1:{port}', f'localhost:{port}'}
+        assert selector.best_now(urls) in urls
+    finally:
+        silent.close()
+
+
+def test_best_now_uses_measured_estimates():
+    urls = ['http://slow.example/a.mp3', 'http://fast.example/a.mp3']
+    selector = MirrorSelector()
+    selector.record_latency(urls[0], 2.0)
+    selector.record_latency(urls[1], 0.1)
+    assert selector.best_now(urls) == urls[1]
+    assert not selector._probing
+
+
+@pytest.fixture
+def origin():
+    """Local HTTP server for one file with Range support (werkzeug send_file)."""
+    from flask import Flask, send_file
+    from werkzeug.serving import make_server
+
+    app = Flask(__name__)
+    files = {}
+
+    @app.route('/<name>')
+    def serve(name):
+        return send_file(io.BytesIO(files[name]), mimetype='audio/mpeg', conditional=True)
+
+    httpd = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield files, f'http://127.0.0.1:{httpd.server_port}'
+    httpd.shutdown()
+
+
+def test_resume_past_end_with_stale_part_restarts(origin, tmp_path):
+    files, url = origin
+    files['a.mp3'] = b'new' * 1000
+    dest = tmp_path / 'a.mp3'
+    # an older, longer copy left behind: the Range request gets a 416
+    (tmp_path / 'a.mp3.part').write_bytes(b'old' * 2000)
+    assert MirrorSelector().download([f'{url}/a.mp3'], dest) == dest
+    assert dest.read_bytes() == files['a.mp3']
+
+
+def test_resume_of_complete_part_is_accepted(origin, tmp_path):
+    files, url = origin
+    files['a.mp3'] = b'abc' * 1000
+    dest = tmp_path / 'a.mp3'
+    (tmp_path / 'a.mp3.part').write_bytes(files['a.mp3'])
+    assert MirrorSelector().download([f'{url}/a.mp3'], dest, size=3000) == dest
+    assert dest.read_bytes() == files['a.mp3']
@@ -0,0 +1,88 @@
+import json
+import shutil
+import subprocess
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+from scheduler import Scheduler, parse_weights
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def curated(counts):
+    """{curator: number of tracks} -> tracks with distinct artists."""
+    return [{'title': f'{name} artist {i} - Song', 'selectedBy': name, 'sha256': f'{name}-{i}'}
+            for name, n in counts.items() for i in range(n)]
+
+
+def curator_share(sched, picks):
+    return Counter(sched.tracks[sched.next()]['selectedBy'] for _ in range(picks))
+
+
+def test_weights_set_curator_share():
+    sched = Scheduler(curated({'alice': 10, 'bob': 10}), seed='w', weights=parse_weights('alice=10,bob=1'))
+    share = curator_share(sched, 220)    # two full cycles of 110 slots
+    assert share == {'alice': 200, 'bob': 20}
+
+
+def test_unweighted_cycle_plays_every_track_once():
+    tracks = curated({'alice': 7, 'bob': 5})
+    sched = Scheduler(tracks, seed='u')
+    assert sorted(sched.next() for _ in range(len(tracks))) == list(range(len(tracks)))
+    assert sched.remaining() == 0
+
+
+def test_zero_weight_leaves_curator_out():
+    sched = Scheduler(curated({'alice': 4, 'bob': 4}), seed='z', weights={'bob': 0})
+    assert curator_share(sched, 40) == {'alice': 40}
+    everyone_muted = Scheduler(curated({'alice': 2}), seed='z', weights={'alice': 0})
+    assert everyone_muted.remaining() == 2
+
+
+def test_duplicate_keys_survive_update():
+    tracks = [{'title': f'Artist {i} - Song', 'sha256': 'same' if i < 2 else f's{i}'} for i in range(6)]
+    sched = Scheduler(tracks, seed='dup')
+    sched.update(list(tracks))
+    assert sorted(sched.order) == list(range(6))
+
+
+def test_update_keeps_cycle_and_adds_slots():
+    tracks = curated({'alice': 3, 'bob': 3})
+    sched = Scheduler(tracks, seed='u', weights={'alice': 2})
+    played = [sched.next() for _ in range(4)]
+    added = sched.update(tracks + curated({'carol': 2}))
+    assert added == [6, 7]
+    assert list(sched.order[:4]) == played
+    assert sorted(sched.order) == [0, 0, 1, 1, 2, 2, 3, 4, 5, 6, 7]
+
+
+@pytest.mark.skipif(not shutil.which('node'), reason='node not installed')
+def test_javascript_port_matches():
+    tracks = curated({'alice': 6, 'bob': 4, 'carol': 3})
+    weights = {'alice': 3, 'bob': 1, 'carol': 0}
+    sched = Scheduler(tracks, seed='parity', weights=weights)
+    expected = [sched.next() for _ in range(30)]
+    sched.update(tracks[2:] + curated({'dave': 2}))
+    expected += [sched.next() for _ in range(30)]
+
+    script = f"""
+        import {{ Scheduler }} from {json.dumps((ROOT / 'scheduler.js').as_uri())};
+        const tracks = {json.dumps(tracks)};
+        const more = {json.dumps(tracks[2:] + curated({'dave': 2}))};
+        const sched = new Scheduler(tracks, {{ seed: 'parity', weights: {json.dumps(weights)} }});
+        const out = [];
+        for (let i = 0; i < 30; i++) out.push(sched.next());
+        sched.update(more);
+        for (let i = 0; i < 30; i++) out.push(sched.next());
+        console.log(JSON.stringify(out));
+    """
+    result = subprocess.run(['node', '--input-type=module', '-e', script],
+                            capture_output=True, text=True, check=True)
+    assert json.loads(result.stdout) == expected
+
+
+def test_malformed_weights_are_skipped(caplog):
+    assert parse_weights('alice=x,bob=2,carol=,dave') == {'bob': 2}
+    assert 'alice=x' in caplog.text and 'carol=' in caplog.text
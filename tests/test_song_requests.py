@@ -0,0 +1,116 @@
+from types import SimpleNamespace
+
+import pytest
+
+import server
+import song_requests
+from song_requests import APPROVED, PLAYED, RATE_LIMIT, REJECTED, InvalidTransition, SongRequests
+
+
+@pytest.fixture
+def requests_log(tmp_path):
+    log = SongRequests(tmp_path / 'requests.jsonl', commit_interval=0).start()
+    yield log
+    log.stop()
+
+
+def submit(log, track='a' * 64):
+    record, done, _ = log.submit('main', track, 'Title', 'someone', 'client')
+    assert done.wait(2)
+    return record
+
+
+def test_allowed_transitions(requests_log):
+    record = submit(requests_log)
+    assert requests_log.set_status(record['id'], APPROVED)['status'] == APPROVED
+    assert requests_log.set_status(record['id'], REJECTED)['status'] == REJECTED
+    assert requests_log.queue() == []
+
+
+@pytest.mark.parametrize('first, then', [
+    (REJECTED, APPROVED),
+    (PLAYED, APPROVED),
+    (PLAYED, REJECTED),
+])
+def test_finished_requests_stay_finished(requests_log, first, then):
+    record = submit(requests_log)
+    if first == PLAYED:
+        requests_log.set_status(record['id'], APPROVED)
+        assert requests_log.pop_approved('main', lambda key: 0)[0]['id'] == record['id']
+    else:
+        requests_log.set_status(record['id'], first)
+    with pytest.raises(InvalidTransition):
+        requests_log.set_status(record['id'], then)
+    assert record['status'] == first
+    assert requests_log.pop_approved('main', lambda key: 0) is None
+
+
+def test_bookkeeping_survives_reload(tmp_path, requests_log):
+    record = submit(requests_log)
+    requests_log.set_status(record['id'], REJECTED)
+    with pytest.raises(InvalidTransition):
+        requests_log.set_status(record['id'], APPROVED)
+    requests_log.stop()
+
+    reloaded = SongRequests(tmp_path / 'requests.jsonl')
+    assert reloaded._live == 0
+    assert reloaded.requests[record['id']]['status'] == REJECTED
+    # the track can be requested again, and is deduplicated while live
+    again = submit(reloaded.start())
+    assert reloaded._live == 1
+    assert reloaded.submit('main', 'a' * 64, 'Title', 'someone', 'other')[2]
+    reloaded.stop()
+    assert again['status'] != REJECTED
+
+
+def test_api_returns_409(requests_log, monkeypatch):
+    monkeypatch.setattr(server, 'song_requests', requests_log)
+    record = submit(requests_log)
+    client = server.app.test_client()
+    assert client.post(f'/api/requests/{record["id"]}/reject').status_code == 200
+    response = client.post(f'/api/requests/{record["id"]}/approve')
+    assert response.status_code == 409
+    assert record['status'] == REJECTED
+
+
+class _Stations:
+    """Just enough of StationRegistry for POST /api/requests."""
+
+    def __init__(self, tracks):
+        clock = SimpleNamespace(tracks=tracks, index_of=lambda key: 0 if key == 'a' * 64 else None)
+        self.default = SimpleNamespace(id='main', clock=clock)
+
+    def get(self, station_id):
+        return self.default if station_id == 'main' else None
+
+    def __bool__(self):
+        return True
+
+
+@pytest.fixture
+def api(requests_log, monkeypatch):
+    monkeypatch.setattr(server, 'song_requests', requests_log)
+    monkeypatch.setattr(server, 'stations', _Stations([{'title': 'Title', 'sha256': 'a' * 64}]))
+    return server.app.test_client()
+
+
+def test_failed_fsync_is_not_acknowledged(api, monkeypatch):
+    def broken_fsync(fd):
+        raise OSError(5, 'Input/output error')
+
+    monkeypatch.setattr(song_requests.os, 'fsync', broken_fsync)
+    response = api.post('/api/requests', json={'track': 'a' * 64})
+    assert response.status_code == 503
+    assert response.json['durable'] is False
+
+
+def test_rate_limit_ignores_client_id(api):
+    statuses = []
+    for i in range(RATE_LIMIT + 1):
+        response = api.post('/api/requests', json={'track': 'a' * 64},
+                            headers={'X-Radio-Client': f'client-{i}'})
+        statuses.append(response.status_code)
+        if response.status_code == 201:
+            # free the track again so the next POST is not a duplicate
+            api.post(f'/api/requests/{response.json["request"]["id"]}/reject')
+    assert statuses == [201] * RATE_LIMIT + [429]
@@ -0,0 +1,45 @@
+import pytest
+
+import server
+from telemetry import OTHER_CLIENT, TelemetryRollup
+
+
+@pytest.mark.parametrize('batch', [
+    {'client': 'pi', 'events': ['not an event']},
+    {'client': 'pi', 'events': [{'event': 'download', 'bytes': '100', 'seconds': '2'}]},
+    {'client': 'pi', 'events': [{'event': 'play_start', 'ttfa': 'soon'}]},
+    {'client': 'pi', 'events': [{'event': 'gap', 'seconds': [1]}]},
+    {'client': 'pi', 'events': [{'event': 'play_end', 'ts': 'now'}], 'dropped': 'lots'},
+    {'client': 'pi', 'events': [{'event': {'nested': True}}]},
+])
+def test_malformed_events_are_skipped(batch):
+    response = server.app.test_client().post('/api/telemetry', json=batch)
+    assert response.status_code == 200
+
+
+def test_non_object_batch_is_rejected():
+    assert server.app.test_client().post('/api/telemetry', json=[1, 2]).status_code == 400
+
+
+def test_valid_events_are_counted():
+    rollup = TelemetryRollup(registry=None)
+    accepted = rollup.ingest('pi', [
+        {'event': 'download', 'bytes': 1000, 'seconds': 0.5},
+        {'event': 'download', 'bytes': 'x', 'seconds': 0.5},
+        {'event': 'play_start', 'ttfa': 0.2},
+        {'event': 'made_up'},
+    ], dropped=3)
+    assert accepted == 3
+    stats = rollup.summary('pi')['pi']
+    assert stats['downloads'] == 2 and stats['plays'] == 1 and stats['dropped'] == 3
+
+
+def test_client_labels_are_capped():
+    registry = []
+    rollup = TelemetryRollup(registry=registry, max_clients=4)
+    for i in range(50):
+        rollup.ingest(f'client-{i}', [{'event': 'play_start', 'ttfa': 0.1}])
+    assert sorted(rollup.summary()) == ['client-0', 'client-1', 'client-2', 'client-3', OTHER_CLIENT]
+    assert rollup.summary(OTHER_CLIENT)[OTHER_CLIENT]['plays'] == 46
+    assert len(rollup.ttfa._children) == 5
+    assert len(registry) == 4
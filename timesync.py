@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Client-side clock sync against server.py's /api/time.
+
+Playback positions are `now - startTime`, where startTime comes from the
+station clock on the server. A Pi without an RTC can be seconds off, so
+clients use `ClockSync.now()` (server time) instead of `time.time()`.
+
+Each sync is an NTP-style burst: SAMPLES requests over one keep-alive
+connection, each giving
+
+    t0 client send, t1 server receive, t2 server send, t3 client receive
+    offset = ((t1 - t0) + (t2 - t3)) / 2
+    rtt    = (t3 - t0) - (t2 - t1)
+
+The sample with the smallest RTT is kept (least queueing, so least
+asymmetry) and folded into the running estimate with an EWMA; a jump larger
+than STEP_THRESHOLD replaces the estimate outright. The true offset is
+within rtt/2 of the sample, which is reported as `error`.
+
+Offsets are taken against time.monotonic(), so the estimate survives the
+local wall clock being stepped (ntpd, a user, a late RTC read) between
+syncs. Until the first successful sync, now() is the local wall clock.
+
+    clock = ClockSync('http://localhost:5000').start()
+    elapsed = clock.now() - state['startTime'] / 1000
+"""
+
+import threading
+import time
+
+import requests
+
+SAMPLES = 8
+SAMPLE_SPACING = 0.05       # seconds between requests in a burst
+RESYNC_INTERVAL = 300.0
+RETRY_INTERVAL = 15.0       # after a failed burst
+ALPHA = 0.3                 # EWMA weight of a new burst
+STEP_THRESHOLD = 0.5        # seconds; larger changes are applied at once
+
+
+class ClockSync:
+    """Filtered estimate of the server's wall clock."""
+
+    def __init__(self, server_url, samples=SAMPLES, interval=RESYNC_INTERVAL, alpha=ALPHA):
+        self.url = f'{server_url}/api/time' if server_url else None
+        self.samples = samples
+        self.interval = interval
+        self.alpha = alpha
+        # server time = monotonic() + _offset; starts as the local wall clock
+        self._offset = time.time() - time.monotonic()
+        self.synced = False
+        self.error = None       # seconds, half the best round trip
+        self.rtt = None
+        self._session = requests.Session()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def now(self):
+        """Server wall-clock time in seconds."""
+        return time.monotonic() + self._offset
+
+    def now_ms(self):
+        return int(self.now() * 1000)
+
+    @property
+    def offset(self):
+        """Seconds to add to the local wall clock to get server time."""
+        return self.now() - time.time()
+
+    def sample(self):
+        """One exchange: (offset against monotonic, rtt) in seconds."""
+        t0 = time.monotonic()
+        res = self._session.get(self.url, params={'t0': int(t0 * 1000)}, timeout=2)
+        t3 = time.monotonic()
+        res.raise_for_status()
+        data = res.json()
+        t1, t2 = data['t1'] / 1000, data['t2'] / 1000
+        return ((t1 - t0) + (t2 - t3)) / 2, (t3 - t0) - (t2 - t1)
+
+    def sync(self):
+        """Run one burst and update the estimate. Returns False if every sample failed."""
+        if not self.url:
+            return False
+        results = []
+        for i in range(self.samples):
+            if i:
+                time.sleep(SAMPLE_SPACING)
+            try:
+                results.append(self.sample())
+            except Exception as e:
+                last_error = e
+        if not results:
+            print(f'[Clock] Sync failed: {last_error}')
+            return False
+
+        offset, rtt = min(results, key=lambda r: r[1])
+        if not self.synced or abs(offset - self._offset) > STEP_THRESHOLD:
+            self._offset = offset
+        else:
+            self._offset += self.alpha * (offset - self._offset)
+        self.synced = True
+        self.rtt = rtt
+        self.error = rtt / 2
+        print(f'[Clock] Offset {self.offset * 1000:+.1f} ms ± {self.error * 1000:.1f} ms '
+              f'({len(results)}/{self.samples} samples)')
+        return True
+
+    def start(self):
+        """Sync (unless already synced) and then every `interval` seconds in the background."""
+        if self._thread is None and self.url:
+            self._thread = threading.Thread(target=self._run, name='clock-sync', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        wait = self.interval if self.synced else 0   # main() may have synced already
+        while not self._stop.wait(wait):
+            wait = self.interval if self.sync() else RETRY_INTERVAL
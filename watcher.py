@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Watch music/ and report which files changed, a burst at a time.
+
+On Linux the directory is watched with inotify (through ctypes, no extra
+package): the kernel queues an event when a file is finished being written
+(IN_CLOSE_WRITE), moved in or out, or deleted, so a new song is noticed
+within milliseconds and an idle library costs nothing. Elsewhere, or if
+inotify is unavailable (e.g. the watch limit is reached), the directory is
+polled every POLL_INTERVAL seconds and compared by size and mtime.
+
+Changes are debounced: after the first event the watcher keeps collecting
+until DEBOUNCE seconds pass without another (or MAX_DELAY since the first),
+then calls `on_change(names)` once with every affected filename. Copying
+an album in therefore costs one incremental rebuild, not one per file.
+
+    watcher = LibraryWatcher('music', lambda names: build(only=names)).start()
+
+Used by `build.py --watch` and by server.py with RADIO_WATCH=1.
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+DEBOUNCE = 0.25         # seconds of quiet that end a burst
+MAX_DELAY = 2.0         # a burst is reported after this long regardless
+POLL_INTERVAL = 1.0     # polling fallback period
+
+# <sys/inotify.h>
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_Q_OVERFLOW = 0x4000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+EVENT_HEADER = struct.Struct('iIII')    # wd, mask, cookie, len
+
+logger = logging.getLogger(__name__)
+
+
+class Inotify:
+    """inotify watch on one directory; read() returns the names that changed."""
+
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE | IN_DELETE_SELF
+
+    def __init__(self, path):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        if libc.inotify_add_watch(self.fd, os.fsencode(path), self.MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f'inotify_add_watch failed for {path}')
+        self.path = path
+
+    def read(self, timeout):
+        """Names with events within `timeout` seconds (empty set if none)."""
+        names = set()
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return names
+        try:
+            data = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return names
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # events were dropped: let the rescan check everything
+                names.update(os.listdir(self.path))
+            elif name:
+                names.add(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class Poller:
+    """Portable fallback: compare (size, mtime) of every entry each read()."""
+
+    def __init__(self, path):
+        self.path = path
+        self.seen = self._scan()
+
+    def _scan(self):
+        seen = {}
+        try:
+            with os.scandir(self.path) as it:
+                for entry in it:
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue    # deleted while scanning
+                    seen[entry.name] = (st.st_size, st.st_mtime_ns)
+        except OSError:
+            pass
+        return seen
+
+    def read(self, timeout):
+        time.sleep(max(timeout, POLL_INTERVAL))
+        current = self._scan()
+        changed = {name for name in current.keys() | self.seen.keys()
+                   if current.get(name) != self.seen.get(name)}
+        self.seen = current
+        return changed
+
+    def close(self):
+        pass
+
+
+def open_source(path):
+    """Inotify on `path` when the platform allows it, else a Poller."""
+    if sys.platform.startswith('linux'):
+        try:
+            return Inotify(path)
+        except (OSError, AttributeError) as e:
+            logger.warning(f'[Watch] inotify unavailable ({e}); polling every {POLL_INTERVAL:.0f}s')
+    return Poller(path)
+
+
+class LibraryWatcher:
+    """Calls `on_change(names)` once per debounced burst of changes in `path`."""
+
+    def __init__(self, path, on_change, debounce=DEBOUNCE, suffix='.mp3'):
+        self.path = str(path)
+        self.on_change = on_change
+        self.debounce = debounce
+        self.suffix = suffix
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Watch in a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name='library-watch', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _wanted(self, names):
+        return {n for n in names if n.lower().endswith(self.suffix) and not n.startswith('.')}
+
+    def run(self):
+        """Watch in the calling thread until stop()."""
+        source = open_source(self.path)
+        logger.info(f'[Watch] Watching {self.path} ({type(source).__name__.lower()})')
+        try:
+            while not self._stop.is_set():
+                changed = self._wanted(source.read(1.0))
+                if not changed:
+                    continue
+                deadline = time.monotonic() + MAX_DELAY
+                while time.monotonic() < deadline:
+                    more = self._wanted(source.read(self.debounce))
+                    if not more:
+                        break
+                    changed |= more
+                try:
+                    self.on_change(changed)
+                except Exception:
+                    logger.exception(f'[Watch] Handling {len(changed)} changed files failed')
+        finally:
+            source.close()